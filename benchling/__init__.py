@@ -1,7 +1,10 @@
 """Benchling API integration package."""
 
 from .auth import BenchlingAuth
-from .client import BenchlingClient
+from .client import BenchlingClient, BenchlingPaginationError
 from .config import get_config, BenchlingConfig
+from .async_client import AsyncBenchlingClient
+from .resilience import CircuitOpenError
+from .scheduler import current_job, job_context
 
-__all__ = ['BenchlingAuth', 'BenchlingClient', 'get_config', 'BenchlingConfig']
+__all__ = ['BenchlingAuth', 'BenchlingClient', 'BenchlingPaginationError', 'AsyncBenchlingClient', 'CircuitOpenError', 'current_job', 'job_context', 'get_config', 'BenchlingConfig']
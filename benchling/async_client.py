@@ -0,0 +1,306 @@
+"""Asyncio counterpart of BenchlingClient for high-fanout, network-bound work."""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+from .auth import BenchlingAuth
+from .client import BenchlingPaginationError
+from .config import get_config
+from .resilience import IDEMPOTENT_METHODS, RETRY_STATUSES, get_resilience, retry_delay
+from .scheduler import get_scheduler
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class AsyncBenchlingClient:
+    """
+    Asyncio client with the same request surface as BenchlingClient.
+
+    One pooled keep-alive connection set is shared by every coroutine, and at
+    most `config.async_concurrency` requests are in flight at once (the
+    scheduler's per-process `BENCHLING_MAX_IN_FLIGHT`, capped by `BENCHLING_MAX_CONCURRENCY`). Retries follow
+    the sync client: up to `config.max_retries` attempts on 429/5xx and
+    connection errors with exponential backoff, honouring Retry-After on 429,
+    gated by the same per-endpoint circuit breakers and shared retry budget.
+
+    Use as an async context manager (or call `aclose()`), since the connection
+    pool is bound to the event loop it was created in:
+
+        async with AsyncBenchlingClient() as client:
+            response = await client.make_request('GET', '/containers', params={...})
+    """
+
+    def __init__(self, auth: Optional[BenchlingAuth] = None):
+        if httpx is None:
+            raise RuntimeError("httpx is required for AsyncBenchlingClient")
+        self.config = get_config()
+        # Token state may be shared with a sync BenchlingClient to avoid refetching
+        self.auth = auth or BenchlingAuth()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.config.request_timeout, connect=self.config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.config.async_concurrency,
+                max_keepalive_connections=self.config.async_concurrency,
+            ),
+        )
+        self._token_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.config.async_concurrency)
+
+    async def __aenter__(self) -> "AsyncBenchlingClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+    async def _fetch_token(self) -> str:
+        """Fetch a new access token using client credentials."""
+        try:
+            resp = await self._client.post(
+                self.config.benchling_token_url,
+                data={"grant_type": "client_credentials"},
+                auth=(self.config.benchling_client_id, self.config.benchling_client_secret),
+            )
+            resp.raise_for_status()
+            payload = resp.json()
+            access_token = payload.get("access_token")
+            if not access_token:
+                raise RuntimeError("No access_token in token response")
+            self.auth.set_token(access_token, payload.get("expires_in", 3600))
+            logger.info("Fetched new OAuth access token")
+            return access_token
+        except httpx.HTTPError as e:
+            logger.error("Failed to fetch OAuth token")
+            logger.error(e)
+            raise
+
+    async def _token(self) -> str:
+        token = self.auth.token()
+        if token is None:
+            # Only one coroutine refreshes, over httpx so the event loop keeps running;
+            # the rest wait and reuse its token
+            async with self._token_lock:
+                token = self.auth.token() or await self._fetch_token()
+        return token
+
+    @staticmethod
+    def _headers(token: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+
+    @staticmethod
+    def _body_kwargs(data: Any) -> Dict[str, Any]:
+        """Dicts go as JSON; pre-encoded bodies (bytes or sized iterables) are sent as-is."""
+        if data is None or isinstance(data, (dict, list)):
+            return {"json": data}
+        if isinstance(data, bytes):
+            return {"content": data}
+
+        async def chunks():
+            # Reading the files behind the payload blocks, so it happens off the event loop
+            iterator = iter(data)
+            done = object()
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, done)
+                if chunk is done:
+                    return
+                yield chunk
+
+        return {"content": chunks(), "headers": {"Content-Length": str(len(data))}}
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Any] = None,
+        params: Optional[Dict] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs
+    ) -> "httpx.Response":
+        """
+        Internal method for making HTTP requests with common logic.
+        Scheduler, breaker, retry budget and POST safety rules as in `BenchlingClient._make_request`.
+        """
+        url = f"{self.config.benchling_base_url}{endpoint}"
+        resilience = get_resilience()
+        scheduler = get_scheduler()
+        breaker = resilience.breaker(method, endpoint)
+        resend_safe = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        resilience.retry_budget.record_request()
+        refreshed = False
+        attempt = 0
+
+        while True:
+            # Token before the breaker, as in BenchlingClient: token failures just propagate
+            token = await self._token()
+            breaker.before_call()
+            response = None
+            error: Optional[Exception] = None
+            try:
+                body = self._body_kwargs(data)
+                headers = {**self._headers(token), **body.pop("headers", {})}
+                async with scheduler.slot_async(), self._slots:
+                    try:
+                        response = await self._client.request(
+                            method, url, headers=headers, params=params, **body, **kwargs
+                        )
+                    except httpx.TransportError as e:
+                        error = e
+            except BaseException:
+                # Cancelled while waiting, ...: free the half-open probe slot (see BenchlingClient)
+                breaker.record_neutral()
+                raise
+
+            if response is not None and response.status_code == 401 and not refreshed:
+                # Token revoked or expired early; refresh once and try again
+                breaker.record_neutral()
+                self.auth.invalidate(token)
+                refreshed = True
+                continue
+
+            if error is not None:
+                breaker.record_failure()
+                # Connect failures never reached Benchling, so even a POST is safe to resend
+                can_retry = resend_safe or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+            elif response.status_code == 429:
+                breaker.record_neutral()
+                can_retry = True
+            elif response.status_code >= 500:
+                breaker.record_failure()
+                can_retry = resend_safe and response.status_code in RETRY_STATUSES
+            else:
+                breaker.record_success()
+                can_retry = False
+
+            if (
+                can_retry
+                and attempt < self.config.max_retries
+                and resilience.retry_budget.try_acquire_retry()
+            ):
+                retry_after = None
+                if response is not None and response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After")
+                delay = retry_delay(attempt, retry_after)
+                logger.warning(f"Retrying {method} {endpoint} in {delay:.0f}s (attempt {attempt + 1})")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            if error is not None:
+                logger.error(f"Request failed: {method} {endpoint}")
+                logger.error(error)
+                raise error
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Request failed: {method} {endpoint}")
+                logger.error(e)
+                raise
+            return response
+
+    async def make_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Any] = None,
+        params: Optional[Dict] = None,
+        safe_mode: bool = False,
+        error_message: str = "API request failed",
+        **kwargs
+    ) -> Union["httpx.Response", bool]:
+        """
+        Public method for making custom HTTP requests to the Benchling API.
+        Same arguments and return values as `BenchlingClient.make_request`,
+        except that responses are `httpx.Response` objects.
+        """
+        try:
+            response = await self._make_request(method, endpoint, data, params, **kwargs)
+            if safe_mode:
+                return True
+            return response
+        except Exception as e:
+            logger.error(f"{error_message}. Reason: {e}")
+            if safe_mode:
+                return False
+            raise
+
+    async def _fetch_page(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: int,
+        next_token: Optional[str]
+    ) -> Tuple[List[Dict], Optional[str]]:
+        page_params = params.copy()
+        page_params['pageSize'] = page_size
+        if next_token:
+            page_params['nextToken'] = next_token
+        response = await self._make_request('GET', endpoint, params=page_params)
+        data = response.json()
+        return data.get(response_key, []), data.get('nextToken')
+
+    async def iter_paginated(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: Optional[int] = None,
+        next_token: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Async generator over every item of a paginated endpoint; the next page is
+        requested while the current one is consumed.
+
+        Raises:
+            BenchlingPaginationError: If any page fails (see BenchlingClient.iter_pages).
+        """
+        page_size = page_size or self.config.page_size
+        items_fetched = 0
+        token = next_token
+        pending = asyncio.ensure_future(self._fetch_page(endpoint, params, response_key, page_size, token))
+        try:
+            while True:
+                try:
+                    items, new_token = await pending
+                except Exception as e:
+                    logger.error(f"Error during paginated request to {endpoint}: {e}")
+                    raise BenchlingPaginationError(endpoint, token, items_fetched, e) from e
+
+                more = bool(items) and bool(new_token)
+                if more:
+                    pending = asyncio.ensure_future(
+                        self._fetch_page(endpoint, params, response_key, page_size, new_token)
+                    )
+                for item in items:
+                    items_fetched += 1
+                    yield item
+                if not more:
+                    return
+                token = new_token
+        finally:
+            if not pending.done():
+                pending.cancel()
+
+    async def paginated_request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: Optional[int] = None
+    ) -> List[Dict]:
+        """Collect every item of a paginated endpoint into a list."""
+        return [item async for item in self.iter_paginated(endpoint, params, response_key, page_size)]
@@ -1,5 +1,6 @@
 """Authentication handling for Benchling API."""
 
+import threading
 import time
 import logging
 from typing import Dict, Optional
@@ -11,19 +12,37 @@ logger = logging.getLogger(__name__)
 
 
 class BenchlingAuth:
-    """Handles OAuth2 Client Credentials authentication for Benchling Apps."""
+    """
+    Handles OAuth2 Client Credentials authentication for Benchling Apps.
+
+    The token state may be shared by sync client threads and an async client;
+    it is only read and written under `_lock` (use `token`, `set_token` and
+    `invalidate` from outside this class).
+    """
     
     def __init__(self):
         self.config = get_config()
         self._access_token: Optional[str] = None
         self._token_expires_at: float = 0.0
         self._headers: Optional[Dict[str, str]] = None
+        self._lock = threading.RLock()
         
         # Safety margin to refresh before actual expiry (in seconds)
         self._refresh_margin = 60
     
     def _token_is_valid(self) -> bool:
         return self._access_token is not None and time.time() < (self._token_expires_at - self._refresh_margin)
+
+    def token(self) -> Optional[str]:
+        """The current access token, or None when it is missing or about to expire."""
+        with self._lock:
+            return self._access_token if self._token_is_valid() else None
+
+    def set_token(self, access_token: str, expires_in: int) -> None:
+        """Store a token fetched elsewhere (e.g. by the async client)."""
+        with self._lock:
+            self._access_token = access_token
+            self._token_expires_at = time.time() + int(expires_in)
     
     def _fetch_token(self) -> None:
         """Fetch a new access token using client credentials."""
@@ -47,28 +66,30 @@ class BenchlingAuth:
             if not access_token:
                 raise RuntimeError("No access_token in token response")
             
-            self._access_token = access_token
-            self._token_expires_at = time.time() + int(expires_in)
+            self.set_token(access_token, expires_in)
             logger.info("Fetched new OAuth access token")
         except requests.RequestException as e:
             logger.error("Failed to fetch OAuth token")
             logger.error(e)
             raise
     
-    def _ensure_token(self) -> None:
-        if not self._token_is_valid():
-            self._fetch_token()
+    def _ensure_token(self) -> str:
+        # One thread fetches; the others wait for its token
+        with self._lock:
+            if not self._token_is_valid():
+                self._fetch_token()
+            return self._access_token
     
     @property
     def headers(self) -> Dict[str, str]:
         """Get Authorization headers for API requests."""
-        self._ensure_token()
-        self._headers = {
-            "Authorization": f"Bearer {self._access_token}",
+        headers = {
+            "Authorization": f"Bearer {self._ensure_token()}",
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
-        return self._headers
+        self._headers = headers
+        return headers
     
     def validate_credentials(self) -> bool:
         """Validate OAuth credentials by fetching a token and making a small API call."""
@@ -101,9 +122,20 @@ class BenchlingAuth:
             "has_token": bool(self._access_token),
         }
     
+    def invalidate(self, access_token: Optional[str] = None) -> None:
+        """
+        Drop the token so the next request fetches a new one (no network call).
+        With `access_token`, only if that is still the current token, so a
+        token another thread already refreshed isn't thrown away.
+        """
+        with self._lock:
+            if access_token is not None and access_token != self._access_token:
+                return
+            self._access_token = None
+            self._token_expires_at = 0.0
+            self._headers = None
+        logger.info("Access token invalidated; will refresh on next request")
+
     def refresh_auth(self) -> None:
         """Force refresh of the access token."""
-        self._access_token = None
-        self._token_expires_at = 0.0
-        self._headers = None
-        logger.info("Access token invalidated; will refresh on next request")
+        self.invalidate()
@@ -1,18 +1,43 @@
 """Main API client wrapper for Benchling API operations."""
 
+import contextvars
 import time
 import logging
-from typing import Dict, List, Optional, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from urllib3.util.retry import Retry
 from .config import get_config
 from .auth import BenchlingAuth
+from .resilience import IDEMPOTENT_METHODS, RETRY_STATUSES, get_resilience, retry_delay
+from .scheduler import get_scheduler
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
 
+class BenchlingPaginationError(Exception):
+    """
+    Raised when a paginated request fails part-way through.
+
+    Attributes:
+        endpoint: The endpoint being paginated.
+        next_token: Token of the page that failed; pass it back as `next_token`
+            to resume without re-fetching the pages already consumed.
+        items_fetched: Number of items yielded before the failure.
+    """
+
+    def __init__(self, endpoint: str, next_token: Optional[str], items_fetched: int, cause: Exception):
+        super().__init__(
+            f"Paginated request to {endpoint} failed after {items_fetched} items: {cause}"
+        )
+        self.endpoint = endpoint
+        self.next_token = next_token
+        self.items_fetched = items_fetched
+
+
 class BenchlingClient:
     """Main client for interacting with Benchling API."""
     
@@ -22,80 +47,136 @@ class BenchlingClient:
         self.session = self._create_session()
         
     def _create_session(self) -> requests.Session:
-        """Create a requests session with retry logic."""
+        """Create a pooled requests session; retries are handled in `_make_request`."""
         session = requests.Session()
         
-        # Configure retry strategy
-        retry_strategy = Retry(
-            total=self.config.max_retries,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=frozenset(["HEAD", "GET", "OPTIONS", "POST", "PUT", "DELETE", "PATCH"]),
-            backoff_factor=1
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # No transport-level retries: every retry has to pass the circuit breaker,
+        # the shared retry budget and the POST safety check in `_make_request`
+        adapter = HTTPAdapter(max_retries=Retry(total=0, connect=0, read=0, redirect=0, status=0))
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
         return session
+
+    @staticmethod
+    def _never_sent(error: requests.exceptions.RequestException) -> bool:
+        """True if the request provably never reached Benchling (safe to resend any method)."""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+            return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+        return False
     
     def _make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None,
+        data: Optional[Any] = None,
         params: Optional[Dict] = None,
+        idempotent: Optional[bool] = None,
         **kwargs
     ) -> requests.Response:
-        """Internal method for making HTTP requests with common logic."""
+        """
+        Internal method for making HTTP requests with common logic.
+
+        Each attempt waits for a slot from the fair scheduler, then goes through
+        the endpoint's circuit breaker (raising CircuitOpenError while it is
+        open). Calls are retried on 429/5xx/connection errors within the
+        shared retry budget. Non-idempotent methods (POST, PATCH) are only resent
+        when the first attempt provably never reached the server or was rate
+        limited, unless the caller passes `idempotent=True`.
+        """
         url = f"{self.config.benchling_base_url}{endpoint}"
-        headers = self.auth.headers
         
-        # Add timeout
-        kwargs.setdefault("timeout", self.config.request_timeout)
+        # Add timeout: fail fast on connect, allow slow responses
+        kwargs.setdefault("timeout", (self.config.connect_timeout, self.config.request_timeout))
         
-        logger.debug(
-            f"Making {method} request",
-            url=url,
-            method=method,
-            params=params
-        )
+        logger.debug(f"Making {method} request to {url} with params {params}")
         
-        try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
-                **kwargs
-            )
+        # Dicts are serialised as JSON; pre-encoded bodies (bytes or a re-iterable
+        # object with __len__) are streamed as-is with a Content-Length
+        if data is None or isinstance(data, (dict, list)):
+            body = {"json": data}
+        else:
+            body = {"data": data}
+        
+        resilience = get_resilience()
+        scheduler = get_scheduler()
+        breaker = resilience.breaker(method, endpoint)
+        resend_safe = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        resilience.retry_budget.record_request()
+        attempt = 0
+        
+        while True:
+            # Token first: a token-endpoint failure says nothing about this endpoint, so it
+            # propagates without touching its breaker, the retry budget or a scheduler slot
+            headers = self.auth.headers
+            breaker.before_call()
+            response = None
+            error = None
+            try:
+                with scheduler.slot():
+                    response = self.session.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        **body,
+                        **kwargs
+                    )
+            except requests.exceptions.RequestException as e:
+                error = e
+            except BaseException:
+                # Failed before reaching Benchling (scheduler, interrupted): says nothing about
+                # availability, but must free the half-open probe slot or the circuit stays open
+                breaker.record_neutral()
+                raise
             
-            # Handle rate limiting
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 60))
-                logger.warning(
-                    "Rate limited, waiting before retry",
-                    retry_after=retry_after
-                )
-                time.sleep(retry_after)
-                return self._make_request(method, endpoint, data, params, **kwargs)
+            if error is not None:
+                breaker.record_failure()
+                can_retry = resend_safe or self._never_sent(error)
+            elif response.status_code == 429:
+                # Rate limited: rejected before processing, so safe to resend
+                breaker.record_neutral()
+                can_retry = True
+            elif response.status_code >= 500:
+                breaker.record_failure()
+                can_retry = resend_safe and response.status_code in RETRY_STATUSES
+            else:
+                breaker.record_success()
+                can_retry = False
             
-            response.raise_for_status()
-            return response
+            if (
+                can_retry
+                and attempt < self.config.max_retries
+                and resilience.retry_budget.try_acquire_retry()
+            ):
+                retry_after = None
+                if response is not None and response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After")
+                delay = retry_delay(attempt, retry_after)
+                logger.warning(f"Retrying {method} {endpoint} in {delay:.0f}s (attempt {attempt + 1})")
+                time.sleep(delay)
+                attempt += 1
+                continue
             
-        except requests.exceptions.RequestException as e:
-            logger.error(
-                f"Request failed: {method} {endpoint}"
-            )
-            logger.error(e)
-            raise
+            try:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException as e:
+                logger.error(
+                    f"Request failed: {method} {endpoint}"
+                )
+                logger.error(e)
+                raise
     
     def make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None,
+        data: Optional[Any] = None,
         params: Optional[Dict] = None,
         safe_mode: bool = False,
         error_message: str = "API request failed",
@@ -107,7 +188,9 @@ class BenchlingClient:
         Args:
             method: HTTP method (GET, POST, PUT, PATCH, DELETE)
             endpoint: API endpoint (e.g., '/records', '/projects')
-            data: Request body data (for POST, PUT, PATCH)
+            data: Request body data (for POST, PUT, PATCH). A dict is sent as JSON;
+                a pre-encoded JSON body (bytes, or a re-iterable object with __len__
+                such as a streaming payload) is sent as-is.
             params: Query parameters
             safe_mode: If True, returns boolean success/failure instead of raising exceptions
             error_message: Custom error message when safe_mode is True
@@ -140,6 +223,22 @@ class BenchlingClient:
                 return False
             raise
     
+    def iter_entities_by_schema(
+        self,
+        schema_id: str,
+        endpoint: str,
+        response_key: str,
+        page_size: Optional[int] = None,
+        next_token: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream all entities of a specific schema from a given endpoint, page by page.
+        Same arguments as `get_entities_by_schema`; see `iter_paginated` for
+        `page_size`, `next_token` and error behaviour.
+        """
+        params = {'schemaId': schema_id}
+        return self.iter_paginated(endpoint, params, response_key, page_size=page_size, next_token=next_token)
+
     def get_entities_by_schema(
         self, 
         schema_id: str, 
@@ -157,10 +256,12 @@ class BenchlingClient:
 
         Returns:
             List[Dict]: A list of all found entity/container dictionaries.
+
+        Raises:
+            BenchlingPaginationError: If a page fails; no partial list is returned.
         """
         logger.info(f"Fetching all entities with schema '{schema_id}' from endpoint '{endpoint}'...")
-        params = {'schemaId': schema_id}
-        entities = self.paginated_request(endpoint, params, response_key)
+        entities = list(self.iter_entities_by_schema(schema_id, endpoint, response_key))
         logger.info(f"Successfully retrieved {len(entities)} total entities.")
         return entities
     
@@ -203,15 +304,113 @@ class BenchlingClient:
             return {}
 
             
+    def _fetch_page(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: int,
+        next_token: Optional[str]
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Fetch a single page; returns (items, nextToken)."""
+        page_params = params.copy()
+        page_params['pageSize'] = page_size
+        if next_token:
+            page_params['nextToken'] = next_token
+        response = self._make_request('GET', endpoint, params=page_params)
+        data = response.json()
+        return data.get(response_key, []), data.get('nextToken')
+
+    def iter_pages(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: Optional[int] = None,
+        next_token: Optional[str] = None,
+        prefetch: bool = True
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """
+        Yield (items, nextToken) for each page of a paginated endpoint.
+
+        While the caller processes one page, the next one is already being fetched
+        in the background (disable with `prefetch=False`). Store the yielded
+        nextToken to resume a later scan from that point via `next_token`.
+
+        Args:
+            endpoint: API endpoint to query
+            params: Query parameters (pageSize/nextToken will be added/overwritten)
+            response_key: Key in response containing the list of items
+            page_size: Number of items per page (defaults to config.page_size)
+            next_token: Resume from this nextToken instead of the first page
+            prefetch: Fetch the next page while the current one is being consumed
+
+        Raises:
+            BenchlingPaginationError: If any page fails. Pages yielded before the
+                failure are complete; `next_token` on the error resumes from the failed page.
+        """
+        page_size = page_size or self.config.page_size
+        items_fetched = 0
+        token = next_token
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            # Prefetches run in the caller's context, so they count against the caller's job
+            pending = executor.submit(
+                contextvars.copy_context().run, self._fetch_page, endpoint, params, response_key, page_size, token
+            ) if executor else None
+            while True:
+                try:
+                    if pending is not None:
+                        items, new_token = pending.result()
+                    else:
+                        items, new_token = self._fetch_page(endpoint, params, response_key, page_size, token)
+                except Exception as e:
+                    logger.error(f"Error during paginated request to {endpoint}: {e}")
+                    raise BenchlingPaginationError(endpoint, token, items_fetched, e) from e
+
+                more = bool(items) and bool(new_token)
+                if executor and more:
+                    pending = executor.submit(
+                        contextvars.copy_context().run,
+                        self._fetch_page, endpoint, params, response_key, page_size, new_token
+                    )
+                if items:
+                    items_fetched += len(items)
+                    yield items, new_token
+                if not more:
+                    return
+                token = new_token
+        finally:
+            if executor:
+                # Don't block an early-exiting caller on a prefetch nobody will read
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_paginated(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        response_key: str,
+        page_size: Optional[int] = None,
+        next_token: Optional[str] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Stream items from a paginated endpoint as pages arrive, in constant memory.
+        Arguments and errors as for `iter_pages`.
+        """
+        for items, _ in self.iter_pages(endpoint, params, response_key, page_size, next_token, prefetch):
+            yield from items
+
     def paginated_request(
         self,
         endpoint: str,
         params: Dict[str, Any],
         response_key: str,
-        page_size: int = 100
+        page_size: Optional[int] = None
     ) -> List[Dict]:
         """
-        Internal method to handle paginated API requests with automatic pagination.
+        Collect every item of a paginated endpoint into a list.
+        Prefer `iter_paginated` for large result sets.
         
         Args:
             endpoint: API endpoint to query
@@ -221,34 +420,11 @@ class BenchlingClient:
             
         Returns:
             List of all items from all pages
+
+        Raises:
+            BenchlingPaginationError: If a page fails, instead of returning a partial list.
         """
-        all_items = []
-        next_token = None
-        
-        while True:
-            # Prepare parameters for this page
-            page_params = params.copy()
-            page_params['pageSize'] = page_size
-            if next_token:
-                page_params['nextToken'] = next_token
-                
-            try:
-                response = self._make_request('GET', endpoint, params=page_params)
-                data = response.json()
-            except Exception as e:
-                logger.error(f"Error during paginated request to {endpoint}: {e}")
-                break
-                
-            items_on_page = data.get(response_key, [])
-            if not items_on_page:
-                break
-                
-            all_items.extend(items_on_page)
-            next_token = data.get('nextToken')
-            if not next_token:
-                break
-                
-        return all_items
+        return list(self.iter_paginated(endpoint, params, response_key, page_size=page_size))
     
     def get_projects(self, pageSize: int = 50) -> List[Dict]:
         """Get projects from Benchling."""
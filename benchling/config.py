@@ -29,6 +29,33 @@ class BenchlingConfig:
         # Request Configuration
         self.request_timeout: int = int(os.getenv('REQUEST_TIMEOUT', '30'))
         self.max_retries: int = int(os.getenv('MAX_RETRIES', '3'))
+        self.connect_timeout: float = float(os.getenv('CONNECT_TIMEOUT', '5'))
+        
+        # Outage handling: consecutive failures before an endpoint's circuit opens,
+        # seconds before a half-open probe, and the process-wide retry budget
+        # (retries per 10s window = min + ratio * requests)
+        self.circuit_failure_threshold: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+        self.circuit_reset_timeout: float = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+        self.retry_budget_ratio: float = float(os.getenv('RETRY_BUDGET_RATIO', '0.2'))
+        self.retry_budget_min: int = int(os.getenv('RETRY_BUDGET_MIN', '10'))
+        self.page_size: int = int(os.getenv('BENCHLING_PAGE_SIZE', '100'))
+        # Ceiling on in-flight requests (and pooled connections) for one asyncio client; the
+        # scheduler's max_in_flight below applies on top, so this only binds when it is lower
+        # or the scheduler is unlimited (BENCHLING_MAX_IN_FLIGHT=0)
+        self.max_concurrency: int = int(os.getenv('BENCHLING_MAX_CONCURRENCY', '100'))
+        # Largest request body we send in one call (checked before streaming alignment payloads)
+        self.max_request_bytes: int = int(os.getenv('BENCHLING_MAX_REQUEST_BYTES', str(50 * 1024 * 1024)))
+        # Fair scheduling of calls between jobs (see benchling/scheduler.py): calls in flight and
+        # requests per second per process (0 = unlimited), each class's minimum share of them
+        # under contention, and the job size (tubes, primers) above which a job counts as bulk.
+        # The limits are per worker process: the app as a whole sends up to workers x these.
+        # Shares only take effect while calls wait, so the in-flight limit is kept small enough
+        # that a QC pass (8 threads) or an async run fills it
+        self.max_in_flight: int = int(os.getenv('BENCHLING_MAX_IN_FLIGHT', '8'))
+        self.rate_limit: float = float(os.getenv('BENCHLING_RATE_LIMIT', '0'))
+        self.interactive_share: float = float(os.getenv('SCHEDULER_INTERACTIVE_SHARE', '0.75'))
+        self.bulk_share: float = float(os.getenv('SCHEDULER_BULK_SHARE', '0.25'))
+        self.bulk_job_size: int = int(os.getenv('SCHEDULER_BULK_JOB_SIZE', '96'))
         
         # Validate required settings
         self._validate_config()
@@ -39,6 +66,13 @@ class BenchlingConfig:
             raise ValueError("BENCHLING_CLIENT_ID environment variable is required")
         if not self.benchling_client_secret:
             raise ValueError("BENCHLING_CLIENT_SECRET environment variable is required")
+
+    @property
+    def async_concurrency(self) -> int:
+        """Requests one asyncio client can have in flight: no more than the scheduler admits."""
+        if self.max_in_flight:
+            return max(1, min(self.max_concurrency, self.max_in_flight))
+        return self.max_concurrency
     
     def get_auth_info(self) -> dict:
         """Get authentication configuration info (without secrets)."""
@@ -48,7 +82,15 @@ class BenchlingConfig:
             "has_client_id": bool(self.benchling_client_id),
             "has_client_secret": bool(self.benchling_client_secret),
             "request_timeout": self.request_timeout,
-            "max_retries": self.max_retries
+            "max_retries": self.max_retries,
+            "connect_timeout": self.connect_timeout,
+            "circuit_failure_threshold": self.circuit_failure_threshold,
+            "circuit_reset_timeout": self.circuit_reset_timeout,
+            "page_size": self.page_size,
+            "max_concurrency": self.max_concurrency,
+            "max_request_bytes": self.max_request_bytes,
+            "max_in_flight": self.max_in_flight,
+            "rate_limit": self.rate_limit
         }
 
 
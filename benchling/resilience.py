@@ -0,0 +1,188 @@
+"""Circuit breakers and a shared retry budget for Benchling API calls."""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .config import get_config
+
+# Benchling API ids look like `con_abc123`, `seq_XyZ` (task ids are UUIDs);
+# collapse them so all calls to the same route share one breaker
+_ID_SEGMENT = re.compile(
+    r'^([a-z]+_[A-Za-z0-9]+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$'
+)
+
+# Statuses worth retrying, and methods that are safe to resend after an
+# ambiguous failure (the server may already have acted on the first attempt)
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(["HEAD", "GET", "OPTIONS", "PUT", "DELETE"])
+# Longest backoff between retries when the server doesn't say how long to wait
+MAX_BACKOFF = 8
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Backoff before retry number `attempt` (0-based), capped; Retry-After wins when given."""
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return float(min(2 ** attempt, MAX_BACKOFF))
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while an endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(
+            f"Benchling API unavailable for {endpoint} (circuit open); "
+            f"failing fast, next probe in {retry_in:.0f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def endpoint_key(method: str, endpoint: str) -> str:
+    """Normalise a method + path into a breaker key, e.g. 'GET /containers/{id}/contents'."""
+    path = endpoint.split('?', 1)[0]
+    segments = ['{id}' if _ID_SEGMENT.match(seg) else seg for seg in path.split('/')]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker for one endpoint.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately. Once `reset_timeout` has passed a single probe call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, key: str, failure_threshold: int, reset_timeout: float):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless this call may go through."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == self.OPEN and elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.key, max(self.reset_timeout - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_neutral(self) -> None:
+        """The call says nothing about availability (e.g. rate limited); free the probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures}
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries: within a sliding `window` seconds, retries may
+    not exceed `min_retries` plus `ratio` times the number of original requests.
+    During an outage this stops every caller from multiplying its load by
+    max_retries.
+    """
+
+    def __init__(self, ratio: float, min_retries: int, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire_retry(self) -> bool:
+        """Take one retry from the budget; False means the caller must not retry."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class ResilienceRegistry:
+    """Per-endpoint circuit breakers plus the shared retry budget."""
+
+    def __init__(self):
+        config = get_config()
+        self.failure_threshold = config.circuit_failure_threshold
+        self.reset_timeout = config.circuit_reset_timeout
+        self.retry_budget = RetryBudget(config.retry_budget_ratio, config.retry_budget_min)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, method: str, endpoint: str) -> CircuitBreaker:
+        key = endpoint_key(method, endpoint)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(key, self.failure_threshold, self.reset_timeout)
+            return self._breakers[key]
+
+    def open_circuits(self) -> Dict[str, Dict]:
+        """Breakers that are currently not closed, for status reporting."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.key: b.snapshot() for b in breakers if b.state != CircuitBreaker.CLOSED}
+
+
+# Global registry shared by the sync and async clients in this process
+_registry_instance: Optional[ResilienceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_resilience() -> ResilienceRegistry:
+    """Get the global breaker/budget registry."""
+    global _registry_instance
+    with _registry_lock:
+        if _registry_instance is None:
+            _registry_instance = ResilienceRegistry()
+        return _registry_instance
@@ -0,0 +1,318 @@
+"""
+Fair scheduling of Benchling API calls between jobs.
+
+Every request the sync and async clients send first takes a slot from the
+process-wide `FairScheduler`. Slots are limited by the number of calls in
+flight (`BENCHLING_MAX_IN_FLIGHT`) and, optionally, by a request rate
+(`BENCHLING_RATE_LIMIT` per second). While calls have to wait, slots are handed
+out:
+
+- across priority classes by weighted fair queuing: each class gets at least
+  its share (`SCHEDULER_INTERACTIVE_SHARE` / `SCHEDULER_BULK_SHARE`) of the
+  slots, and a class with nothing waiting leaves its share to the others;
+- within a class round-robin across users (or jobs, when there is no user), so
+  one large batch can't hold back everyone else in its class.
+
+Which job a call belongs to is taken from the `job_context` active where it is
+made (a contextvar, so it follows asyncio tasks; code handing work to other
+threads must copy the context). Calls outside any job count as interactive.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Iterator, Optional
+
+from .config import get_config
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+
+class JobContext:
+    """Who a Benchling call is made for. `priority` None means "not classified yet"."""
+
+    def __init__(self, job_id: Optional[str] = None, owner: Optional[str] = None,
+                 priority: Optional[str] = None):
+        if priority not in (None,) + PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority!r}")
+        self.job_id = job_id or uuid.uuid4().hex
+        self.owner = owner
+        self.priority = priority
+
+    @property
+    def priority_class(self) -> str:
+        return self.priority or INTERACTIVE
+
+    @property
+    def flow(self) -> str:
+        return f'user:{self.owner}' if self.owner else f'job:{self.job_id}'
+
+    def classify(self, size: int) -> str:
+        """Set the class from the job's size (tubes, primers) unless the caller chose one."""
+        if self.priority is None:
+            self.priority = BULK if size > get_config().bulk_job_size else INTERACTIVE
+        return self.priority
+
+    def as_dict(self) -> Dict:
+        return {'job_id': self.job_id, 'owner': self.owner, 'priority': self.priority}
+
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar('benchling_job', default=None)
+
+
+def current_job() -> Optional[JobContext]:
+    return _current_job.get()
+
+
+@contextmanager
+def job_context(job_id: Optional[str] = None, owner: Optional[str] = None,
+                priority: Optional[str] = None) -> Iterator[JobContext]:
+    """Attribute Benchling calls made in the block to one job."""
+    job = JobContext(job_id, owner, priority)
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+class _Waiter:
+    __slots__ = ('priority_class', 'enqueued_at', 'event', 'future', 'loop', 'granted')
+
+    def __init__(self, priority_class: str):
+        self.priority_class = priority_class
+        self.enqueued_at = time.monotonic()
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.granted = False
+
+
+class FairScheduler:
+    """
+    Admission control for Benchling calls: at most `max_in_flight` at once
+    (0 = no limit) and at most `rate` per second (0 = no limit, bursts of up to
+    one second's worth), shared out between waiting jobs as described above.
+    """
+
+    def __init__(self, max_in_flight: int, rate: float, shares: Dict[str, float]):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.shares = {name: max(shares.get(name, 0.0), 0.01) for name in PRIORITY_CLASSES}
+        self.in_flight = 0
+        self._tokens = max(rate, 1.0)
+        self._refilled_at = time.monotonic()
+        # Per class: flow -> waiters (round-robin over flows), and the class's virtual time
+        self._queues: Dict[str, OrderedDict] = {name: OrderedDict() for name in PRIORITY_CLASSES}
+        self._waiting = {name: 0 for name in PRIORITY_CLASSES}
+        self._vtime = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._clock = 0.0
+        self._stats = {
+            name: {'granted': 0, 'queued': 0, 'in_flight': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+            for name in PRIORITY_CLASSES
+        }
+        self._cond = threading.Condition()
+        self._ticker: Optional[threading.Thread] = None
+
+    # Token bucket
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _can_admit(self) -> bool:
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return False
+        return not self.rate or self._tokens >= 1.0
+
+    def _take(self, priority_class: str, waited: float) -> None:
+        self.in_flight += 1
+        if self.rate:
+            self._tokens -= 1.0
+        stats = self._stats[priority_class]
+        stats['granted'] += 1
+        stats['in_flight'] += 1
+        if waited:
+            stats['queued'] += 1
+            stats['wait_seconds'] += waited
+            stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+
+    # Queueing (all called with self._cond held)
+
+    def _enqueue(self, waiter: _Waiter, flow: str) -> None:
+        name = waiter.priority_class
+        if not self._waiting[name]:
+            # A class that was idle starts at the current virtual time, without saved-up credit
+            self._vtime[name] = max(self._vtime[name], self._clock)
+        self._queues[name].setdefault(flow, deque()).append(waiter)
+        self._waiting[name] += 1
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        active = [name for name in PRIORITY_CLASSES if self._waiting[name]]
+        if not active:
+            return None
+        name = min(active, key=lambda n: self._vtime[n])
+        self._clock = self._vtime[name]
+        self._vtime[name] += 1.0 / self.shares[name]
+        flows = self._queues[name]
+        flow, waiters = next(iter(flows.items()))
+        waiter = waiters.popleft()
+        del flows[flow]
+        if waiters:
+            flows[flow] = waiters  # back of the line
+        self._waiting[name] -= 1
+        return waiter
+
+    def _remove(self, waiter: _Waiter) -> None:
+        flows = self._queues[waiter.priority_class]
+        for flow, waiters in list(flows.items()):
+            if waiter in waiters:
+                waiters.remove(waiter)
+                self._waiting[waiter.priority_class] -= 1
+                if not waiters:
+                    del flows[flow]
+                return
+
+    def _dispatch(self) -> None:
+        self._refill(time.monotonic())
+        while self._can_admit():
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._take(waiter.priority_class, time.monotonic() - waiter.enqueued_at)
+            waiter.granted = True
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                waiter.loop.call_soon_threadsafe(self._wake_future, waiter.future)
+        if self.rate and any(self._waiting.values()):
+            self._start_ticker()
+
+    @staticmethod
+    def _wake_future(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def _start_ticker(self) -> None:
+        # Rate-limited waiters need waking when tokens come back; threads don't survive a fork
+        if self._ticker is None or not self._ticker.is_alive():
+            self._ticker = threading.Thread(target=self._tick, name='benchling-scheduler', daemon=True)
+            self._ticker.start()
+
+    def _tick(self) -> None:
+        with self._cond:
+            while True:
+                if not any(self._waiting.values()):
+                    self._cond.wait()
+                    continue
+                self._dispatch()
+                self._cond.wait(max((1.0 - self._tokens) / self.rate, 0.001))
+
+    def _try_fast(self, priority_class: str) -> bool:
+        """Take a slot right away if nobody is waiting and one is free."""
+        self._refill(time.monotonic())
+        if any(self._waiting.values()) or not self._can_admit():
+            return False
+        self._take(priority_class, 0.0)
+        return True
+
+    def _release(self, priority_class: str) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._stats[priority_class]['in_flight'] -= 1
+            self._dispatch()
+            self._cond.notify_all()
+
+    # Public API
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot for a blocking call made by the current job."""
+        job = current_job()
+        priority_class = job.priority_class if job else INTERACTIVE
+        waiter = None
+        with self._cond:
+            if not self._try_fast(priority_class):
+                waiter = _Waiter(priority_class)
+                waiter.event = threading.Event()
+                self._enqueue(waiter, job.flow if job else 'anonymous')
+                self._cond.notify_all()
+                self._dispatch()
+        if waiter is not None:
+            waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(priority_class)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Same as `slot` for coroutines; waits without blocking the event loop."""
+        job = current_job()
+        priority_class = job.priority_class if job else INTERACTIVE
+        waiter = None
+        with self._cond:
+            if not self._try_fast(priority_class):
+                waiter = _Waiter(priority_class)
+                waiter.loop = asyncio.get_running_loop()
+                waiter.future = waiter.loop.create_future()
+                self._enqueue(waiter, job.flow if job else 'anonymous')
+                self._cond.notify_all()
+                self._dispatch()
+        if waiter is not None:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                with self._cond:
+                    granted = waiter.granted
+                    if not granted:
+                        self._remove(waiter)
+                if granted:
+                    self._release(priority_class)
+                raise
+        try:
+            yield
+        finally:
+            self._release(priority_class)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            classes = {}
+            for name in PRIORITY_CLASSES:
+                stats = dict(self._stats[name])
+                stats['waiting'] = self._waiting[name]
+                stats['flows_waiting'] = len(self._queues[name])
+                stats['share'] = self.shares[name]
+                stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+                stats['max_wait_seconds'] = round(stats['max_wait_seconds'], 3)
+                classes[name] = stats
+            return {
+                'max_in_flight': self.max_in_flight,
+                'rate_limit': self.rate,
+                'in_flight': self.in_flight,
+                'classes': classes,
+            }
+
+
+_scheduler_instance: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Get the process-wide scheduler shared by the sync and async clients."""
+    global _scheduler_instance
+    with _scheduler_lock:
+        if _scheduler_instance is None:
+            config = get_config()
+            _scheduler_instance = FairScheduler(
+                config.max_in_flight,
+                config.rate_limit,
+                {INTERACTIVE: config.interactive_share, BULK: config.bulk_share},
+            )
+        return _scheduler_instance
@@ -9,6 +9,13 @@ bind = os.getenv("GUNICORN_BIND", os.getenv("PORT", "0.0.0.0:8080"))
 # Workers/threads
 workers = os.getenv("GUNICORN_WORKERS", max(2, multiprocessing.cpu_count()))
 threads = os.getenv("GUNICORN_THREADS", 4)
+# Requests are served by threads; large runs fan out their Benchling I/O on an
+# asyncio event loop inside the request when ALIGNER_ASYNC is enabled
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Load the app (pandas, Biopython, openpyxl, Benchling clients) once in the
+# master before forking, instead of once per worker
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
 
 # Timeouts
 timeout = os.getenv("GUNICORN_TIMEOUT", 60)
@@ -22,4 +29,22 @@ proxy_allow_ips = os.getenv("PROXY_ALLOW_FROM", "*")
 # Logging
 accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
 errorlog = os.getenv("GUNICORN_ERRORLOG", "-")
-loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
\ No newline at end of file
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def when_ready(server):
+    """Fetch the Benchling OAuth token in the master so every forked worker inherits it."""
+    if preload_app:
+        from src.app import warm_token
+        warm_token()
+
+
+def post_fork(server, worker):
+    """Open pooled connections and prime caches in each worker, off the request path (see /readyz).
+    Also start the upload collector and, with WORK_QUEUE_ENABLED, the worker's queue threads
+    (threads don't survive a fork)."""
+    from src.app import start_upload_gc, start_warm_up
+    from src.microsynth_auto_aligner import start_queue_workers
+    start_warm_up()
+    start_upload_gc()
+    start_queue_workers()
@@ -0,0 +1 @@
+"""HTTP load testing against a local Benchling stand-in (see loadtest/run.py)."""
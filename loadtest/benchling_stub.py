@@ -0,0 +1,194 @@
+"""
+Local stand-in for the Benchling API, just enough for the app's routes.
+
+Every request sleeps for `latency` seconds (plus up to `jitter`) and fails with
+a 503 with probability `error_rate`, so load tests can see how the web tier
+behaves when Benchling is slow or flaky. Container names starting with
+``MISSING`` have no container, like tubes that were never registered.
+"""
+import base64
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class BenchlingStub:
+    """Threaded HTTP server answering the Benchling endpoints the app calls."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.05,
+                 jitter: float = 0.02, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.counts: Dict[str, int] = {}
+        # Alignment task id -> (created at, alignment), finished `task_seconds` after creation
+        self.task_seconds = 1.0
+        self.tasks: Dict[str, tuple] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'BenchlingStub':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='benchling-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _create_alignment(self, body: Dict) -> str:
+        """Record a template alignment task: the read against a template with a few substitutions."""
+        read = ''
+        for file in body.get('files', []):
+            fasta = base64.b64decode(file.get('data', '')).decode('utf-8', 'replace')
+            read = ''.join(line.strip() for line in fasta.splitlines() if not line.startswith('>'))
+            break
+        template = ''.join(
+            random.choice('ACGT'.replace(base, '')) if base in 'ACGT' and random.random() < 0.005 else base
+            for base in read
+        )
+        alignment = {
+            'id': f'seqanl_{self._next_id()}',
+            'name': body.get('name', ''),
+            'alignedSequences': [
+                {'sequenceId': body.get('templateSequenceId'), 'name': 'template', 'bases': template},
+                {'sequenceId': None, 'name': body.get('name', ''), 'bases': read},
+            ],
+        }
+        task_id = str(uuid.uuid4())
+        with self._lock:
+            self.tasks[task_id] = (time.monotonic(), alignment)
+        return task_id
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: Dict) -> None:
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                try:
+                    return json.loads(body) if body else {}
+                except ValueError:
+                    return {}
+
+            def _simulate(self, route: str) -> bool:
+                """Apply latency and injected errors; False means an error was sent."""
+                stub._count(route)
+                time.sleep(stub.latency + random.random() * stub.jitter)
+                if stub.error_rate and random.random() < stub.error_rate:
+                    self._send(503, {'error': {'message': 'Injected failure'}})
+                    return False
+                return True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip('/').split('/')
+                query = parse_qs(url.query)
+                if parts == ['containers']:
+                    if not self._simulate('GET /containers'):
+                        return
+                    name = (query.get('name') or [None])[0]
+                    if not name or name.startswith('MISSING'):
+                        return self._send(200, {'containers': []})
+                    return self._send(200, {'containers': [{'id': f'con_{name}', 'name': name}]})
+                if len(parts) == 3 and parts[0] == 'containers' and parts[2] == 'contents':
+                    if not self._simulate('GET /containers/{id}/contents'):
+                        return
+                    entity_id = 'seq_' + parts[1][len('con_'):]
+                    return self._send(200, {'contents': [{'entity': {
+                        'id': entity_id, 'webURL': f'https://benchling.invalid/{entity_id}'
+                    }}]})
+                if len(parts) == 2 and parts[0] == 'tasks':
+                    if not self._simulate('GET /tasks/{id}'):
+                        return
+                    created_at, alignment = stub.tasks.get(parts[1], (None, None))
+                    if alignment is None:
+                        return self._send(404, {'error': {'message': 'Task not found'}})
+                    if time.monotonic() - created_at < stub.task_seconds:
+                        return self._send(200, {'status': 'RUNNING'})
+                    return self._send(200, {'status': 'SUCCEEDED', 'response': alignment})
+                if parts == ['users']:
+                    if not self._simulate('GET /users'):
+                        return
+                    return self._send(200, {'users': [{'id': 'ent_loadtest', 'name': 'Load Test'}]})
+                if len(parts) == 2 and parts[0] == 'entity-schemas':
+                    if not self._simulate('GET /entity-schemas/{id}'):
+                        return
+                    return self._send(200, {'fieldDefinitions': [
+                        {'name': 'Direction', 'type': 'dropdown', 'dropdownId': 'sfs_loadtest'}
+                    ]})
+                if len(parts) == 2 and parts[0] == 'dropdowns':
+                    if not self._simulate('GET /dropdowns/{id}'):
+                        return
+                    return self._send(200, {'options': [{'id': 'sfso_fwd', 'name': 'Forward'},
+                                                        {'id': 'sfso_rev', 'name': 'Reverse'}]})
+                if len(parts) == 2 and parts[0] == 'dna-oligos':
+                    if not self._simulate('GET /dna-oligos/{id}'):
+                        return
+                    return self._send(200, {'id': parts[1], 'entityRegistryId': 'PRM' + parts[1].split('_')[-1]})
+                self._send(404, {'error': {'message': f'Not found: {url.path}'}})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = self._read_json()
+                if url.path == '/token':
+                    stub._count('POST /token')
+                    return self._send(200, {'access_token': 'loadtest-token', 'expires_in': 3600})
+                if url.path == '/nucleotide-alignments:create-template-alignment':
+                    if not self._simulate('POST /nucleotide-alignments:create-template-alignment'):
+                        return
+                    return self._send(202, {'taskId': stub._create_alignment(body)})
+                if url.path == '/dna-oligos':
+                    if not self._simulate('POST /dna-oligos'):
+                        return
+                    oligo_id = f'seq_oligo{stub._next_id()}'
+                    return self._send(201, {'id': oligo_id, 'name': body.get('name', '')})
+                self._send(404, {'error': {'message': f'Not found: {url.path}'}})
+
+            def do_PATCH(self):
+                url = urlparse(self.path)
+                body = self._read_json()
+                parts = url.path.strip('/').split('/')
+                if len(parts) == 2 and parts[0] == 'dna-oligos':
+                    if not self._simulate('PATCH /dna-oligos/{id}'):
+                        return
+                    return self._send(200, {'id': parts[1], 'name': body.get('name', '')})
+                self._send(404, {'error': {'message': f'Not found: {url.path}'}})
+
+        return Handler
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+End-to-end HTTP load test for the web app.
+
+Starts the Benchling stand-in (loadtest/benchling_stub.py), launches the real
+app under docker/gunicorn.conf.py pointed at it, and has `--users` virtual
+users replay browser sessions for `--duration` seconds:
+
+- alignment: upload a zip of FASTA files -> run -> poll /api/status until done
+- primer: users/dropdown lookups -> preview CSV -> register -> Eurofins export
+
+Reports per-endpoint latency percentiles and error rates, session outcomes and
+per-worker saturation sampled from /api/metrics. Pass --base-url to drive an
+already running deployment instead (the Benchling stub is not used then).
+
+    python -m loadtest.run --users 12 --duration 60 --workers 2 --threads 4
+"""
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from loadtest.benchling_stub import BenchlingStub
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUNICORN_CONF = os.path.join(REPO_ROOT, 'docker', 'gunicorn.conf.py')
+# The app stores uploads here regardless of configuration
+UPLOAD_FOLDER = '/tmp/uploads'
+
+BASES = 'ACGT'
+# Status polling delays of the browser (seconds): while changes come in, and the backoff cap
+STATUS_MIN_DELAY = 0.5
+STATUS_MAX_DELAY = 10.0
+
+
+class Recorder:
+    """Thread-safe request latencies and outcomes, grouped by endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions: Dict[str, Dict[str, int]] = defaultdict(lambda: {'ok': 0, 'failed': 0})
+        self._lock = threading.Lock()
+
+    def request(self, http: requests.Session, name: str, method: str, url: str,
+                ok_statuses=(200,), **kwargs) -> Optional[requests.Response]:
+        """Send one request; returns None (and records an error) on failure."""
+        started = time.perf_counter()
+        try:
+            response = http.request(method, url, **kwargs)
+            failed = response.status_code not in ok_statuses
+        except requests.RequestException:
+            response = None
+            failed = True
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if failed:
+                self.errors[name] += 1
+        return None if failed else response
+
+    def session(self, kind: str, ok: bool) -> None:
+        with self._lock:
+            self.sessions[kind]['ok' if ok else 'failed'] += 1
+
+
+class WorkerSampler(threading.Thread):
+    """
+    Polls /api/metrics and keeps per-worker peaks. Each poll lands on whichever
+    worker accepts it, so with several workers the samples are spread across them.
+    """
+
+    def __init__(self, base_url: str, interval: float = 0.5):
+        super().__init__(name='metrics-sampler', daemon=True)
+        self.base_url = base_url
+        self.interval = interval
+        self.workers: Dict[int, Dict] = {}
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                # A new connection per sample, so polls aren't pinned to one worker
+                stats = requests.get(f'{self.base_url}/api/metrics', timeout=5,
+                                     headers={'Connection': 'close'}).json()
+            except (requests.RequestException, ValueError):
+                continue
+            worker = self.workers.setdefault(stats['pid'], {'first': stats, 'peak_busy': 0})
+            # The sampling request itself is in flight; don't count it as load
+            worker['peak_busy'] = max(worker['peak_busy'], stats['in_flight'] - 1)
+            worker['last'] = stats
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def _random_bases(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice(BASES) for _ in range(length))
+
+
+def make_plate_zip(rng: random.Random, plate: str, tubes: int, read_length: int, missing_rate: float) -> bytes:
+    """A zipped delivery of FASTA reads, one per tube; some tubes have no container."""
+    bio = io.BytesIO()
+    with zipfile.ZipFile(bio, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(tubes):
+            tube = f'{"MISSING" if rng.random() < missing_rate else "LT"}{plate}T{i:03d}'
+            zf.writestr(f'{tube}.fasta', f'>{tube}\n{_random_bases(rng, read_length)}\n')
+    return bio.getvalue()
+
+
+def make_primer_csv(rng: random.Random, session: str, count: int) -> bytes:
+    lines = ['Name,Sequence']
+    lines += [f'LT{session}P{i:02d},{_random_bases(rng, 24)}' for i in range(count)]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def alignment_session(rec: Recorder, http: requests.Session, base: str, rng: random.Random,
+                      session: str, args) -> bool:
+    plate = make_plate_zip(rng, session, args.tubes, args.read_length, args.missing_rate)
+    response = rec.request(http, 'POST /api/upload', 'POST', f'{base}/api/upload',
+                           files={'files': (f'{session}.zip', plate, 'application/zip')},
+                           timeout=args.timeout)
+    if response is None:
+        return False
+    upload_dir = response.json()['upload_dir']
+
+    # /api/run blocks until the run finishes; poll like the browser meanwhile
+    outcome = {}
+
+    def run():
+        run_response = rec.request(requests.Session(), 'POST /api/run', 'POST', f'{base}/api/run',
+                                   json={'upload_dir': upload_dir}, timeout=args.timeout)
+        outcome['success'] = run_response is not None and run_response.json().get('success', False)
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    # One status poll per tick, backing off while nothing changes (like static/js/app.js)
+    logs_cursor, version, etag = None, None, None
+    delay = STATUS_MIN_DELAY
+    while runner.is_alive():
+        params = {}
+        if logs_cursor is not None:
+            params['logs_since'] = logs_cursor
+        if version is not None:
+            params['results_since'] = version
+        headers = {'If-None-Match': etag} if etag else {}
+        response = rec.request(http, 'GET /api/status', 'GET', f'{base}/api/status', params=params,
+                               ok_statuses=(200, 304), headers=headers, timeout=args.timeout)
+        if response is not None and response.status_code == 200:
+            etag = response.headers.get('ETag')
+            status = response.json()
+            logs_cursor = status['logs']['cursor']
+            version = status['results']['version']
+            delay = STATUS_MIN_DELAY
+        else:
+            delay = min(delay * 2, STATUS_MAX_DELAY)
+        runner.join(delay)
+    # QC summaries are added in the background; take the CSV like a user would at the end
+    rec.request(http, 'GET /api/results.csv', 'GET', f'{base}/api/results.csv', timeout=args.timeout)
+    return outcome.get('success', False)
+
+
+def primer_session(rec: Recorder, http: requests.Session, base: str, rng: random.Random,
+                   session: str, args) -> bool:
+    users = rec.request(http, 'GET /api/users', 'GET', f'{base}/api/users', timeout=args.timeout)
+    rec.request(http, 'GET /api/dropdown/options', 'GET', f'{base}/api/dropdown/options', timeout=args.timeout)
+    if users is None or not users.json().get('users'):
+        return False
+    user_id = users.json()['users'][0]['value']
+
+    sheet = make_primer_csv(rng, session, args.primers)
+    preview = rec.request(http, 'POST /api/primer/preview', 'POST', f'{base}/api/primer/preview',
+                          files={'file': (f'{session}.csv', sheet, 'text/csv')}, timeout=args.timeout)
+    if preview is None:
+        return False
+
+    register = rec.request(http, 'POST /api/primer/register', 'POST', f'{base}/api/primer/register',
+                           json={'userId': user_id, 'rows': preview.json()['rows']}, timeout=args.timeout)
+    if register is None:
+        return False
+    results = register.json()['results']
+
+    export = rec.request(http, 'POST /api/primer/eurofins', 'POST', f'{base}/api/primer/eurofins',
+                         json={'rows': results}, timeout=args.timeout)
+    return export is not None and not any('ERROR' in r.get('Personal Note', '') for r in results)
+
+
+def virtual_user(rec: Recorder, base: str, user: int, deadline: float, args) -> None:
+    rng = random.Random(args.seed * 1000 + user)
+    http = requests.Session()
+    iteration = 0
+    while time.monotonic() < deadline:
+        session = f'{user:02d}x{iteration:03d}'
+        kind = 'primer' if rng.random() < args.primer_ratio else 'alignment'
+        handler = primer_session if kind == 'primer' else alignment_session
+        try:
+            ok = handler(rec, http, base, rng, session, args)
+        except Exception as e:  # a malformed response shouldn't kill the user
+            print(f'user {user}: {kind} session crashed: {e}', file=sys.stderr)
+            ok = False
+        rec.session(kind, ok)
+        iteration += 1
+        time.sleep(rng.uniform(0, args.think_time))
+
+
+def make_eurofins_template(path: str) -> None:
+    """Minimal order form with the 'Form' sheet the exporter fills from row 9."""
+    import openpyxl
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Form'
+    ws['B8'], ws['C8'], ws['D8'] = 'Oligo Name', 'Sequence', 'Personal Note'
+    wb.save(path)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, stub: BenchlingStub, workdir: str) -> Tuple[subprocess.Popen, str, str]:
+    """Launch gunicorn with the production config; returns (process, base URL, log path)."""
+    port = _free_port()
+    template = os.path.join(workdir, 'eurofins_template.xlsx')
+    make_eurofins_template(template)
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    env = dict(os.environ)
+    env.update({
+        'BENCHLING_BASE_URL': stub.base_url,
+        'BENCHLING_TOKEN_URL': f'{stub.base_url}/token',
+        'BENCHLING_CLIENT_ID': 'loadtest',
+        'BENCHLING_CLIENT_SECRET': 'loadtest',
+        'EUROFINS_TEMPLATE_PATH': template,
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_WORKERS': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_TIMEOUT': str(int(args.timeout)),
+    })
+    log_path = os.path.join(workdir, 'gunicorn.log')
+    with open(log_path, 'wb') as log_file:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONF, 'src.app:app'],
+            cwd=REPO_ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+        )
+    return process, f'http://127.0.0.1:{port}', log_path
+
+
+def wait_ready(base: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    """Wait until /readyz has answered 200 from several polls in a row (workers warm independently)."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            streak = streak + 1 if requests.get(f'{base}/readyz', timeout=2).status_code == 200 else 0
+        except requests.RequestException:
+            streak = 0
+        if streak >= 5:
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'{base} not ready after {timeout:.0f}s')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def build_report(rec: Recorder, sampler: WorkerSampler, elapsed: float,
+                 stub: Optional[BenchlingStub]) -> Dict:
+    endpoints = {}
+    for name in sorted(rec.latencies):
+        values = sorted(rec.latencies[name])
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': rec.errors[name],
+            'error_rate': rec.errors[name] / len(values),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p90_ms': percentile(values, 90) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000,
+        }
+    workers = {}
+    for pid, sample in sorted(sampler.workers.items()):
+        first, last = sample['first'], sample.get('last', sample['first'])
+        window = last['uptime_seconds'] - first['uptime_seconds']
+        busy = last['busy_seconds'] - first['busy_seconds']
+        workers[pid] = {
+            'threads': last['threads'],
+            'peak_busy_threads': sample['peak_busy'],
+            'utilization': busy / (window * last['threads']) if window > 0 else None,
+            'requests': last['requests'] - first['requests'],
+            'server_errors': last['errors'] - first['errors'],
+            'rss_mb': (last['memory']['rss_bytes'] or 0) / (1024 * 1024),
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'elapsed_seconds': elapsed,
+        'requests': total,
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'error_rate': sum(rec.errors.values()) / total if total else 0.0,
+        'sessions': {k: dict(v) for k, v in rec.sessions.items()},
+        'endpoints': endpoints,
+        'workers': workers,
+        'benchling_calls': dict(stub.counts) if stub else None,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{report['requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s), error rate {report['error_rate']:.2%}")
+    for kind, counts in sorted(report['sessions'].items()):
+        print(f"  {kind} sessions: {counts['ok']} ok, {counts['failed']} failed")
+
+    print(f"\n{'endpoint':<30} {'reqs':>6} {'err%':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, e in report['endpoints'].items():
+        print(f"{name:<30} {e['requests']:>6} {e['error_rate']:>6.1%} {e['p50_ms']:>9.0f} "
+              f"{e['p90_ms']:>9.0f} {e['p99_ms']:>9.0f} {e['max_ms']:>9.0f}")
+
+    print(f"\n{'worker pid':<12} {'threads':>7} {'peak busy':>9} {'utilization':>11} {'requests':>8} {'5xx':>5} {'RSS MB':>7}")
+    for pid, w in report['workers'].items():
+        utilization = f"{w['utilization']:.0%}" if w['utilization'] is not None else 'n/a'
+        print(f"{pid:<12} {w['threads']:>7} {w['peak_busy_threads']:>9} {utilization:>11} "
+              f"{w['requests']:>8} {w['server_errors']:>5} {w['rss_mb']:>7.0f}")
+
+    if report['benchling_calls']:
+        print('\nBenchling stub calls:')
+        for route, count in sorted(report['benchling_calls'].items()):
+            print(f'  {route:<55} {count:>6}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Drive the web app with concurrent user sessions.')
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='seconds to keep starting sessions')
+    parser.add_argument('--primer-ratio', type=float, default=0.3, help='share of sessions that are primer sessions')
+    parser.add_argument('--think-time', type=float, default=1.0, help='max random pause between sessions (s)')
+    parser.add_argument('--tubes', type=int, default=24, help='FASTA files per uploaded plate')
+    parser.add_argument('--read-length', type=int, default=900, help='bases per FASTA read')
+    parser.add_argument('--missing-rate', type=float, default=0.05, help='share of tubes without a container')
+    parser.add_argument('--primers', type=int, default=8, help='primers per primer session')
+    parser.add_argument('--timeout', type=float, default=300, help='per-request timeout (s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--base-url', help='test a running deployment instead of launching gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (local run)')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker (local run)')
+    parser.add_argument('--stub-latency', type=float, default=0.05, help='Benchling stub latency (s)')
+    parser.add_argument('--stub-error-rate', type=float, default=0.0, help='share of stub calls failing with 503')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    stub, process, workdir = None, None, None
+    completed = False
+    try:
+        if args.base_url:
+            base = args.base_url.rstrip('/')
+        else:
+            stub = BenchlingStub(latency=args.stub_latency, error_rate=args.stub_error_rate).start()
+            workdir = tempfile.mkdtemp(prefix='loadtest-')
+            process, base, log_path = start_app(args, stub, workdir)
+            print(f'Benchling stub on {stub.base_url}; gunicorn on {base} (log: {log_path})')
+        wait_ready(base, timeout=60, process=process)
+
+        rec = Recorder()
+        sampler = WorkerSampler(base)
+        sampler.start()
+        started = time.monotonic()
+        deadline = started + args.duration
+        users = [
+            threading.Thread(target=virtual_user, args=(rec, base, i, deadline, args), daemon=True)
+            for i in range(args.users)
+        ]
+        print(f'Running {args.users} users for {args.duration:.0f}s...')
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+        sampler.stop()
+
+        report = build_report(rec, sampler, elapsed, stub)
+        print_report(report)
+        if args.json:
+            with open(args.json, 'w') as fh:
+                json.dump(report, fh, indent=2)
+        completed = True
+        return 0
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if stub is not None:
+            stub.stop()
+        # Keep the gunicorn log around when something went wrong
+        if workdir is not None and completed:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Streaming JSON request bodies for Benchling template alignments.
+
+`create-template-alignment` wants every read file embedded as a base64 string
+inside the JSON body. Instead of reading, encoding and serialising whole files
+in memory, `TemplateAlignmentPayload` produces the body on the fly: the JSON
+around the files is rendered once, and file contents are base64-encoded chunk
+by chunk while `requests` writes the body to the socket. The exact body length
+is known up front, so it is sent with a Content-Length (no chunked transfer
+encoding) and can be checked against the API limit before anything is sent.
+"""
+import base64
+import json
+import os
+from typing import Dict, Iterator, List, Tuple, Union
+
+# Must be a multiple of 3 so each chunk base64-encodes without padding
+READ_CHUNK_SIZE = 3 * 64 * 1024
+
+# A file is either a path on disk or its contents already in memory
+FileSource = Union[str, bytes]
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when a request body would exceed the configured API limit."""
+
+
+def _b64_length(size: int) -> int:
+    return 4 * ((size + 2) // 3)
+
+
+class TemplateAlignmentPayload:
+    """
+    Re-iterable, fixed-length JSON body: ``{**fields, "files": [{"name", "data"}]}``.
+
+    Iterating yields the encoded body as bytes; iterating again (e.g. when the
+    request is retried) starts over from the beginning of each file.
+    """
+
+    def __init__(self, fields: Dict, files: List[Tuple[str, FileSource]], chunk_size: int = READ_CHUNK_SIZE):
+        if chunk_size % 3:
+            raise ValueError('chunk_size must be a multiple of 3')
+        self.fields = fields
+        self.files = files
+        self.chunk_size = chunk_size
+
+        head = json.dumps(fields, separators=(',', ':'))[:-1]
+        self._prefix = (head + (',' if fields else '') + '"files":[').encode('utf-8')
+        self._suffix = b']}'
+        self._file_heads = [
+            ('{"name":' + json.dumps(name) + ',"data":"').encode('utf-8') for name, _ in files
+        ]
+        self._file_tail = b'"}'
+
+    @staticmethod
+    def _source_size(source: FileSource) -> int:
+        return len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+    def __len__(self) -> int:
+        length = len(self._prefix) + len(self._suffix)
+        length += max(len(self.files) - 1, 0)  # commas between file objects
+        for head, (_, source) in zip(self._file_heads, self.files):
+            length += len(head) + _b64_length(self._source_size(source)) + len(self._file_tail)
+        return length
+
+    def _encode_source(self, source: FileSource) -> Iterator[bytes]:
+        if isinstance(source, bytes):
+            for start in range(0, len(source), self.chunk_size):
+                yield base64.b64encode(source[start:start + self.chunk_size])
+            return
+        with open(source, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(self.chunk_size), b''):
+                yield base64.b64encode(chunk)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._prefix
+        for index, (head, (_, source)) in enumerate(zip(self._file_heads, self.files)):
+            if index:
+                yield b','
+            yield head
+            yield from self._encode_source(source)
+            yield self._file_tail
+        yield self._suffix
+
+    def buffered_bytes(self) -> int:
+        """Upper bound on memory held while the body is produced (in-memory files count in full)."""
+        in_memory = sum(len(source) for _, source in self.files if isinstance(source, bytes))
+        return in_memory + self.chunk_size + _b64_length(self.chunk_size) + len(self._prefix)
+
+    def check_size(self, limit: int) -> int:
+        """Return the body length, raising PayloadTooLargeError if it exceeds `limit` bytes."""
+        length = len(self)
+        if limit and length > limit:
+            raise PayloadTooLargeError(
+                f'Alignment payload is {length} bytes, above the API limit of {limit} bytes'
+            )
+        return length
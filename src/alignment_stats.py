@@ -0,0 +1,117 @@
+"""
+Per-read QC summaries of completed template alignments.
+
+Benchling returns an alignment as gapped strings of equal length, the template
+first and then the aligned reads. The strings are stacked into a byte matrix
+(one row per read) and every statistic is computed with NumPy column masks, so
+summarising a plate is a handful of array operations rather than a Python loop
+over bases.
+
+Only the span a read actually covers counts: leading and trailing gaps in a
+read are unsequenced template, not deletions.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+GAP = ord('-')
+
+# Columns written to the results CSV, after the tube/result fields
+STAT_FIELDS = ('identity', 'mismatches', 'insertions', 'deletions', 'coverage', 'first_mismatch')
+
+
+def _as_matrix(sequences: List[str]) -> np.ndarray:
+    return np.frombuffer(''.join(sequences).upper().encode('ascii'), dtype=np.uint8).reshape(len(sequences), -1)
+
+
+def _run_starts(mask: np.ndarray) -> np.ndarray:
+    """Number of runs of True per row (one indel event per run)."""
+    previous = np.zeros_like(mask)
+    previous[:, 1:] = mask[:, :-1]
+    return (mask & ~previous).sum(axis=1)
+
+
+def summarize_alignment(template: str, reads: List[str]) -> List[Dict]:
+    """
+    Summaries for each aligned read against the aligned template:
+
+    - identity: % of columns in the read's span that match the template
+      (mismatches and both kinds of gap count against it)
+    - mismatches: substituted bases (N counts as a mismatch)
+    - insertions / deletions: indel events, i.e. runs of gap columns
+    - coverage: % of template bases the read has a base aligned to
+    - first_mismatch: 1-based template position of the first mismatch or
+      indel, or None for a perfect read
+    """
+    if not reads:
+        return []
+    lengths = {len(template)} | {len(read) for read in reads}
+    if len(lengths) != 1:
+        raise ValueError('Aligned sequences must all have the same length')
+
+    t = _as_matrix([template])[0]
+    r = _as_matrix(reads)
+    t_gap = t == GAP
+    r_gap = r == GAP
+
+    # The read's span runs from its first to its last aligned base
+    columns = np.arange(r.shape[1])
+    has_base = ~r_gap
+    any_base = has_base.any(axis=1)
+    first = np.where(any_base, has_base.argmax(axis=1), 0)
+    last = np.where(any_base, r.shape[1] - 1 - has_base[:, ::-1].argmax(axis=1), -1)
+    in_span = (columns >= first[:, None]) & (columns <= last[:, None])
+
+    both = in_span & ~t_gap & ~r_gap
+    matches = both & (r == t)
+    mismatches = both & (r != t)
+    insertions = in_span & t_gap & ~r_gap
+    deletions = in_span & ~t_gap & r_gap
+
+    # Columns where both are gaps come from other reads' insertions and don't count
+    span_length = (in_span & ~(t_gap & r_gap)).sum(axis=1)
+    identity = np.divide(matches.sum(axis=1) * 100.0, span_length,
+                         out=np.zeros(len(reads)), where=span_length > 0)
+    template_length = int((~t_gap).sum())
+    coverage = both.sum(axis=1) * 100.0 / template_length if template_length else np.zeros(len(reads))
+
+    # Template coordinate of each column (1-based; gap columns take the previous base's)
+    template_position = np.maximum(np.cumsum(~t_gap), 1)
+    insertion_events = _run_starts(insertions)
+    deletion_events = _run_starts(deletions)
+    mismatch_counts = mismatches.sum(axis=1)
+    differs = mismatches | insertions | deletions
+    has_difference = differs.any(axis=1)
+    first_difference = differs.argmax(axis=1)
+
+    summaries = []
+    for i in range(len(reads)):
+        summaries.append({
+            'identity': round(float(identity[i]), 2),
+            'mismatches': int(mismatch_counts[i]),
+            'insertions': int(insertion_events[i]),
+            'deletions': int(deletion_events[i]),
+            'coverage': round(float(coverage[i]), 2),
+            'first_mismatch': int(template_position[first_difference[i]]) if has_difference[i] else None,
+        })
+    return summaries
+
+
+def split_alignment(alignment: Dict, template_id: Optional[str] = None):
+    """
+    (template bases, [(read name, read bases)]) from a Benchling alignment.
+    The template is the aligned sequence whose id is `template_id`, or the first one.
+    """
+    aligned = alignment.get('alignedSequences') or []
+    if not aligned:
+        raise ValueError('Alignment has no aligned sequences')
+    template_index = 0
+    for index, sequence in enumerate(aligned):
+        if template_id and template_id in (sequence.get('sequenceId'), sequence.get('dnaSequenceId')):
+            template_index = index
+            break
+    reads = [
+        (sequence.get('name', ''), sequence.get('bases', ''))
+        for index, sequence in enumerate(aligned) if index != template_index
+    ]
+    return aligned[template_index].get('bases', ''), reads
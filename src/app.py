@@ -2,59 +2,188 @@
 """
 Flask web server for Microsynth Auto Aligner
 """
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-import tempfile
 import zipfile
 import shutil
 import sys
 
 # Add the parent directory to the Python path so we can import from src
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.microsynth_auto_aligner import run_alignment, set_log_function
-from benchling.client import BenchlingClient
-import pandas as pd
-from io import BytesIO
+# Shares the aligner's Benchling client (OAuth2): one token and one connection pool per worker
+from src.microsynth_auto_aligner import (
+    ALIGNMENT_STATS_ENABLED, add_alignment_stats, benchling_client, run_alignment,
+    set_log_function, set_result_function, start_queue_workers
+)
+from src.chunked_upload import ChunkedUploadStore, ChunkedUploadError
+from src.upload_store import UploadNotFoundError, UploadStore
+from src.primer_io import EurofinsTemplate, PrimerFileError, read_primer_rows
+from src.helper_logs import HelperLogReader
+from src.ttl_cache import TTLCache
+from src.results_store import ResultsStore
+from src.log_buffer import LogBuffer
+from src.alignment_stats import STAT_FIELDS
+from src.job_memory import memory_snapshot
+from benchling.scheduler import BULK, INTERACTIVE, get_scheduler, job_context
+import csv
+import io
 import re
-import openpyxl  # for Eurofins export
+import threading
+import time
 try:
-    import docker  # docker SDK for helper logs
+    import openpyxl  # for Eurofins export
 except Exception:
-    docker = None
+    openpyxl = None
 
 # Get the absolute path to the templates and static directories
 template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'templates'))
 static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
 
 app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
+# Behind nginx: take the client address (used to schedule Benchling calls per user) from
+# X-Forwarded-For, trusting that many proxy hops. 0 when clients reach gunicorn directly
+TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', '0'))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES, x_host=TRUSTED_PROXIES)
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max upload size
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'  # Use persistent temp directory
+# Chunked uploads: each PUT stays well below MAX_CONTENT_LENGTH / nginx client_max_body_size
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+app.config['MAX_CHUNKED_UPLOAD_SIZE'] = int(os.getenv('MAX_CHUNKED_UPLOAD_SIZE', str(4 * 1024 * 1024 * 1024)))
+
+# Content-addressed store behind every upload dir: dedupes files, collects abandoned uploads
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'])
+chunked_uploads = ChunkedUploadStore(
+    app.config['UPLOAD_FOLDER'],
+    chunk_size=app.config['UPLOAD_CHUNK_SIZE'],
+    max_upload_size=app.config['MAX_CHUNKED_UPLOAD_SIZE'],
+    object_store=upload_store,
+)
 
 # Store logs and alignment results in memory for this session
-logs_buffer = []
-alignment_results = []
+log_buffer = LogBuffer(maxlen=100)
+results_store = ResultsStore()
+
+# Benchling users/dropdown options change rarely; cache them per worker
+lookup_cache = TTLCache(ttl=int(os.getenv('LOOKUP_CACHE_TTL', '600')))
+
+# Per-worker warm-up state reported by /readyz
+readiness = {'token': False, 'connection': False, 'caches': False}
 
-# Initialize Benchling client (OAuth2)
-benchling_client = BenchlingClient()
+# Per-worker request accounting reported by /api/metrics
+request_stats = {'in_flight': 0, 'peak_in_flight': 0, 'requests': 0, 'errors': 0, 'busy_seconds': 0.0}
+request_stats_lock = threading.Lock()
+WORKER_THREADS = int(os.getenv('GUNICORN_THREADS', '4'))
+app_started_at = time.monotonic()
 
 # Primer Registration constants (from legacy Dash app)
 REGISTRY_ID = 'src_LW5X8lCL'
 DROPDOWN_ID = 'sfs_kKhZZg7c'  # Direction dropdown
 SCHEMA_ID = 'ts_lFefhdfz'
 
+# Eurofins order template, parsed once per worker and reused across exports
+EUROFINS_TEMPLATE_PATH = os.path.abspath(os.getenv(
+    'EUROFINS_TEMPLATE_PATH',
+    os.path.join(os.path.dirname(__file__), '..', 'data', 'eurofins_upload-template_customdnaoligos.xlsx')
+))
+eurofins_template = EurofinsTemplate(EUROFINS_TEMPLATE_PATH)
+
+# One Docker client per worker for reading the benchling-helper container logs
+helper_logs = HelperLogReader()
+# Each log stream holds one of the WORKER_THREADS request threads; past this, clients poll instead
+HELPER_LOG_MAX_STREAMS = int(os.getenv('HELPER_LOG_MAX_STREAMS', '1'))
+helper_log_streams = threading.BoundedSemaphore(HELPER_LOG_MAX_STREAMS)
+
 def web_log(message: str) -> None:
     """Log function that sends messages to the web interface."""
-    logs_buffer.append(message)
+    log_buffer.append(message)  # Keeps only the last 100 messages
     print(message)  # Also print to console
-    # Keep only last 100 log messages
-    if len(logs_buffer) > 100:
-        logs_buffer.pop(0)
 
 @app.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
+def warm_token() -> bool:
+    """Fetch the OAuth token. Called in the gunicorn master so forked workers inherit it."""
+    try:
+        benchling_client.auth._ensure_token()
+        readiness['token'] = True
+    except Exception as e:
+        print(f"Warm-up: unable to fetch Benchling token: {e}")
+    return readiness['token']
+
+def warm_up() -> None:
+    """
+    Get this worker ready for its first request: token, a pooled connection to
+    Benchling (opened by the first lookup), the users/dropdown caches and the
+    Eurofins template. Retries with backoff until Benchling is reachable.
+    """
+    delay = 1.0
+    while True:
+        if readiness['token'] or warm_token():
+            try:
+                lookup_cache.set('users', _load_users())
+                readiness['connection'] = True
+                lookup_cache.set('direction_options', _load_direction_options())
+                readiness['caches'] = True
+            except Exception as e:
+                print(f"Warm-up: unable to prime Benchling caches: {e}")
+        if readiness['connection'] and readiness['caches']:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 60.0)
+    try:
+        eurofins_template.warm()
+    except Exception as e:
+        # Missing template only affects the Eurofins export, not readiness
+        print(f"Warm-up: Eurofins template not loaded: {e}")
+    print(f"Warm-up complete (pid {os.getpid()})")
+
+def start_warm_up() -> None:
+    """Run `warm_up` in the background so the worker can start accepting requests."""
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+def start_upload_gc() -> None:
+    """Collect abandoned uploads and unused stored files in the background of this worker."""
+    upload_store.start_collector(sessions_dir=chunked_uploads.sessions_dir)
+
+@app.before_request
+def _track_request_start():
+    request.environ['app.started_at'] = time.monotonic()
+    with request_stats_lock:
+        request_stats['in_flight'] += 1
+        request_stats['peak_in_flight'] = max(request_stats['peak_in_flight'], request_stats['in_flight'])
+
+@app.after_request
+def _track_request_status(response):
+    if response.status_code >= 500:
+        with request_stats_lock:
+            request_stats['errors'] += 1
+    return response
+
+@app.teardown_request
+def _track_request_end(_exc):
+    started_at = request.environ.get('app.started_at')
+    if started_at is None:
+        return
+    with request_stats_lock:
+        request_stats['in_flight'] -= 1
+        request_stats['requests'] += 1
+        request_stats['busy_seconds'] += time.monotonic() - started_at
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """This worker's request counters and memory use; `in_flight` includes this request."""
+    with request_stats_lock:
+        stats = dict(request_stats)
+    stats.update({'pid': os.getpid(), 'threads': WORKER_THREADS, 'uptime_seconds': time.monotonic() - app_started_at})
+    stats['memory'] = memory_snapshot()
+    stats['upload_gc'] = upload_store.last_gc
+    stats['scheduler'] = get_scheduler().snapshot()
+    return jsonify(stats)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Simple health endpoint for load balancers."""
@@ -65,15 +194,119 @@ def healthz():
     """Kubernetes/Compose-friendly health endpoint alias."""
     return jsonify({"status": "ok"}), 200
 
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once this worker has a token, a Benchling connection and primed caches."""
+    ready = all(readiness.values())
+    return jsonify({"status": "ready" if ready else "warming", "checks": dict(readiness), "pid": os.getpid()}), (200 if ready else 503)
+
 @app.route('/api/logs')
 def get_logs():
     """Get recent log messages"""
-    return jsonify({'logs': logs_buffer})
+    return jsonify({'logs': log_buffer.lines()})
+
+def _parse_version(value):
+    """Parse a log/results cursor from the query string; invalid or missing values mean 'none'."""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+@app.route('/api/status')
+def get_status():
+    """Logs and results changed since the caller's cursors, in one poll.
+
+    Pass ?logs_since=<logs.cursor>&results_since=<results.version> from the previous
+    response, and If-None-Match with its ETag to get a 304 while neither changed.
+    `full` in either part means "replace what you have" (a new run started, or
+    the client fell behind).
+    """
+    etag = f'l{log_buffer.cursor}-{results_store.etag}'
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({
+            'logs': log_buffer.since(_parse_version(request.args.get('logs_since'))),
+            'results': results_store.snapshot(_parse_version(request.args.get('results_since'))),
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/results')
 def get_results():
-    """Get alignment results with Benchling links"""
-    return jsonify({'results': alignment_results})
+    """Get alignment results with Benchling links.
+
+    Pass ?since=<version> from the previous response to only receive tubes that
+    changed since then, and If-None-Match with the previous ETag to get a 304 when
+    nothing changed. The full `response_data` is served by /api/results/<tube_name>.
+    """
+    etag = results_store.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            since = int(request.args['since']) if 'since' in request.args else None
+        except ValueError:
+            since = None
+        response = jsonify(results_store.snapshot(since))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/results.csv')
+def download_results_csv():
+    """Current results with their QC summaries as a CSV file, one row per tube."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['tube_name', 'success', 'alignment_id', 'sequence_url', *STAT_FIELDS, 'reads', 'error'])
+    for result in sorted(results_store.all(), key=lambda r: r['tube_name']):
+        stats = result.get('stats') or {}
+        writer.writerow([
+            result['tube_name'],
+            result.get('success'),
+            result.get('alignment_id') or '',
+            result.get('sequence_url') or '',
+            *['' if stats.get(field) is None else stats[field] for field in STAT_FIELDS],
+            stats.get('reads', ''),
+            result.get('error') or result.get('stats_error') or '',
+        ])
+    return Response(
+        out.getvalue(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=alignment_results.csv'},
+    )
+
+@app.route('/api/results/<path:tube_name>')
+def get_result_detail(tube_name):
+    """Full result for one tube, including the Benchling response used for debugging."""
+    result = results_store.detail(tube_name)
+    if result is None:
+        return jsonify({'error': f'No result for {tube_name}'}), 404
+    return jsonify(result)
+
+def _load_users() -> list:
+    """Fetch Benchling users as dropdown items (label=name, value=id)."""
+    resp = benchling_client.make_request('GET', '/users')
+    users = resp.json().get('users', [])
+    return [{"label": u.get('name'), "value": u.get('id')} for u in users if u.get('name') and u.get('id')]
+
+def _load_direction_options() -> list:
+    """Fetch the Direction dropdown options of the primer schema as dropdown items."""
+    options = benchling_client.get_dropdown_options(SCHEMA_ID, 'Direction')
+    # If the helper found nothing, fall back to the direct dropdowns endpoint
+    if not options:
+        resp_schema = benchling_client.make_request('GET', f'/entity-schemas/{SCHEMA_ID}')
+        dropdown_id = None
+        for fd in resp_schema.json().get('fieldDefinitions', []):
+            if fd.get('name') == 'Direction' and fd.get('type') == 'dropdown':
+                dropdown_id = fd.get('dropdownId')
+                break
+        if dropdown_id:
+            resp_dd = benchling_client.make_request('GET', f'/dropdowns/{dropdown_id}')
+            options = {opt['name']: opt['id'] for opt in resp_dd.json().get('options', [])}
+    # Map to simple list
+    return [{'label': k, 'value': v} for k, v in options.items()]
 
 @app.route('/api/users', methods=['GET'])
 def list_users():
@@ -81,11 +314,7 @@ def list_users():
     if benchling_client is None:
         return jsonify({"error": "Benchling client not initialized"}), 500
     try:
-        resp = benchling_client.make_request('GET', '/users')
-        data = resp.json()
-        users = data.get('users', [])
-        mapped = [{"label": u.get('name'), "value": u.get('id')} for u in users if u.get('name') and u.get('id')]
-        return jsonify({"users": mapped})
+        return jsonify({"users": lookup_cache.get_or_load('users', _load_users)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -95,27 +324,31 @@ def dropdown_options():
     if benchling_client is None:
         return jsonify({"error": "Benchling client not initialized"}), 500
     try:
-        # use helper to fetch dropdown options
-        from benchling.client import BenchlingClient as _BC  # type: ignore
-        # our client has get_dropdown_options method
-        options = benchling_client.get_dropdown_options(SCHEMA_ID, 'Direction') if hasattr(benchling_client, 'get_dropdown_options') else {}
-        # If helper unavailable, fall back to direct dropdowns endpoint
-        if not options:
-            resp_schema = benchling_client.make_request('GET', f'/entity-schemas/{SCHEMA_ID}')
-            dropdown_id = None
-            for fd in resp_schema.json().get('fieldDefinitions', []):
-                if fd.get('name') == 'Direction' and fd.get('type') == 'dropdown':
-                    dropdown_id = fd.get('dropdownId')
-                    break
-            if dropdown_id:
-                resp_dd = benchling_client.make_request('GET', f'/dropdowns/{dropdown_id}')
-                options = {opt['name']: opt['id'] for opt in resp_dd.json().get('options', [])}
-        # Map to simple list
-        items = [{'label': k, 'value': v} for k, v in options.items()]
-        return jsonify({'options': items})
+        return jsonify({'options': lookup_cache.get_or_load('direction_options', _load_direction_options)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _extract_if_zip(file_path: str, upload_dir: str) -> None:
+    """Extract a zip archive into the upload directory and remove the archive."""
+    if not file_path.lower().endswith('.zip'):
+        return
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        # Files already in the upload dir are links into the upload store; replace them, never write through
+        for name in zip_ref.namelist():
+            parts = [p for p in name.replace('\\', '/').split('/') if p not in ('', '.', '..')]
+            target = os.path.join(upload_dir, *parts) if parts else upload_dir
+            if os.path.isfile(target):
+                os.remove(target)
+        zip_ref.extractall(upload_dir)
+    os.remove(file_path)
+
+def _store_upload(upload_dir: str, paths: list, digests: dict = None) -> None:
+    """Move uploaded files into the upload store, then unzip archives and store their contents."""
+    upload_store.adopt(upload_dir, digests)
+    for file_path in paths:
+        _extract_if_zip(file_path, upload_dir)
+    upload_store.adopt(upload_dir)
+
 @app.route('/api/upload', methods=['POST'])
 def upload_files():
     """Handle file upload and extract if needed"""
@@ -126,26 +359,17 @@ def upload_files():
     if not files or files[0].filename == '':
         return jsonify({'error': 'No files selected'}), 400
     
-    # Create a temporary directory for this upload
-    upload_dir = tempfile.mkdtemp(dir=app.config['UPLOAD_FOLDER'])
+    # Create a directory for this upload in the upload store
+    upload_dir = upload_store.new_upload()
     
     try:
-        for file in files:
-            filename = file.filename
-            
-            # Check if it's a zip file
-            if filename.lower().endswith('.zip'):
-                # Save and extract zip
-                zip_path = os.path.join(upload_dir, filename)
-                file.save(zip_path)
-                
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(upload_dir)
-                
-                os.remove(zip_path)
-            else:
-                # Save individual file
-                file.save(os.path.join(upload_dir, filename))
+        with upload_store.hold(upload_dir):
+            paths = []
+            for file in files:
+                file_path = os.path.join(upload_dir, file.filename)
+                file.save(file_path)
+                paths.append(file_path)
+            _store_upload(upload_dir, paths)
         
         return jsonify({
             'success': True,
@@ -153,7 +377,80 @@ def upload_files():
             'message': f'Successfully uploaded {len(files)} file(s)'
         })
     except Exception as e:
-        shutil.rmtree(upload_dir, ignore_errors=True)
+        upload_store.discard(upload_dir)
+        return jsonify({'error': f'Error processing upload: {str(e)}'}), 500
+
+@app.route('/api/upload/chunked', methods=['POST'])
+def chunked_upload_init():
+    """
+    Start a resumable chunked upload: {files: [{name, size, sha256?}]} -> upload id, chunk size
+    and received ranges (files the upload store already has count as received).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(chunked_uploads.init(data.get('files', [])))
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """Report received byte ranges per file so an interrupted upload can resume."""
+    try:
+        return jsonify(chunked_uploads.status(upload_id))
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+def chunked_upload_abort(upload_id):
+    """Discard an unfinished chunked upload."""
+    try:
+        chunked_uploads.abort(upload_id)
+        return jsonify({'success': True})
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+@app.route('/api/upload/chunked/<upload_id>/<int:file_index>', methods=['PUT'])
+def chunked_upload_chunk(upload_id, file_index):
+    """Write one chunk (raw request body) of a file at ?offset=N, streamed to disk.
+    An X-Content-SHA256 header is checked against the chunk as it is written."""
+    try:
+        offset = int(request.args.get('offset', ''))
+    except ValueError:
+        return jsonify({'error': 'offset query parameter is required'}), 400
+    try:
+        written = chunked_uploads.write_chunk(
+            upload_id, file_index, offset, request.stream, request.content_length,
+            sha256=request.headers.get('X-Content-SHA256'),
+        )
+        return jsonify({'success': True, 'offset': offset, 'length': written})
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+@app.route('/api/upload/chunked/<upload_id>/finalize', methods=['POST'])
+def chunked_upload_finalize(upload_id):
+    """Verify checksums ({checksums: {file_index: sha256}}) and turn the chunks into an upload dir."""
+    data = request.get_json(silent=True) or {}
+    try:
+        checksums = {int(k): v for k, v in (data.get('checksums') or {}).items()}
+    except (TypeError, ValueError):
+        return jsonify({'error': 'checksums must map file index to sha256'}), 400
+    try:
+        upload_dir, paths = chunked_uploads.finalize(upload_id, checksums)
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    try:
+        with upload_store.hold(upload_dir):
+            # Checksums were verified by finalize, so the store needn't hash those files again
+            _store_upload(upload_dir, paths, {
+                path: checksums[index] for index, path in enumerate(paths) if checksums.get(index)
+            })
+        return jsonify({
+            'success': True,
+            'upload_dir': upload_dir,
+            'message': f'Successfully uploaded {len(paths)} file(s)'
+        })
+    except Exception as e:
+        upload_store.discard(upload_dir)
         return jsonify({'error': f'Error processing upload: {str(e)}'}), 500
 
 @app.route('/api/primer/preview', methods=['POST'])
@@ -165,18 +462,9 @@ def primer_preview():
     if f.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     try:
-        df = pd.read_csv(f)
-    except Exception:
-        try:
-            f.stream.seek(0)
-            df = pd.read_excel(f)
-        except Exception as e:
-            return jsonify({'error': f'Unable to parse file: {e}'}), 400
-    required = ['Name', 'Sequence']
-    for col in required:
-        if col not in df.columns:
-            return jsonify({'error': f"Missing required column: {col}"}), 400
-    rows = df[required].fillna("").to_dict(orient='records')
+        rows = read_primer_rows(f.stream)
+    except PrimerFileError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify({'rows': rows, 'count': len(rows)})
 
 @app.route('/api/primer/register', methods=['POST'])
@@ -191,6 +479,14 @@ def primer_register():
     rows = data.get('rows', [])
     if not user_id or not registry_id or not schema_id or not rows:
         return jsonify({'error': 'userId, registryId, schemaId and rows are required'}), 400
+    # Scheduled per user; large sheets register as bulk so quick ones aren't stuck behind them
+    with job_context(owner=user_id) as job:
+        job.classify(len(rows))
+        results = _register_primers(rows, user_id, registry_id, schema_id)
+    return jsonify({'results': results, 'count': len(results)})
+
+def _register_primers(rows: list, user_id: str, registry_id: str, schema_id: str) -> list:
+    """Create, then rename, one oligo per row; failures are reported per row."""
     results = []
     for row in rows:
         try:
@@ -217,7 +513,7 @@ def primer_register():
                 digits = ''.join(re.findall(r'\d+', str(eri)))
                 if digits:
                     patched_name = f"{digits}_{payload['name']}"
-                    benchling_client.make_request('PATCH', f"/dna-oligos/{ent_id}", data={"name": patched_name})
+                    benchling_client.make_request('PATCH', f"/dna-oligos/{ent_id}", data={"name": patched_name}, idempotent=True)
                     new_name = patched_name
             except Exception:
                 pass
@@ -231,7 +527,7 @@ def primer_register():
                 'Sequence': row.get('Sequence', ''),
                 'Personal Note': f'ERROR: {e}'
             })
-    return jsonify({'results': results, 'count': len(results)})
+    return results
 
 @app.route('/api/primer/eurofins', methods=['POST'])
 def primer_eurofins():
@@ -240,52 +536,84 @@ def primer_eurofins():
         return jsonify({'error': 'openpyxl not installed in container'}), 500
     data = request.get_json(silent=True) or {}
     rows = data.get('rows', [])
-    template_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'eurofins_upload-template_customdnaoligos.xlsx')
-    template_path = os.path.abspath(template_path)
-    if not os.path.exists(template_path):
-        return jsonify({'error': f'Template not found at {template_path}'}), 500
     try:
-        wb = openpyxl.load_workbook(template_path)
-        ws = wb['Form']
-        # Write starting at row 9: col2 Name, col3 Sequence, col4 Personal Note
-        r = 9
-        for row in rows:
-            ws.cell(row=r, column=2, value=str(row.get('Oligo Name', ''))[:25])
-            ws.cell(row=r, column=3, value=str(row.get('Sequence', '')))
-            ws.cell(row=r, column=4, value=str(row.get('Personal Note', '')))
-            r += 1
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        from flask import send_file
+        bio = eurofins_template.render(rows)
         return send_file(bio, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='bacta_eurofins_registered_primers.xlsx')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _parse_cursor(value):
+    """Parse a helper-log cursor (epoch ns); invalid or missing values mean 'no cursor'."""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
 @app.route('/api/benchling-helper/logs', methods=['GET'])
 def benchling_helper_logs():
     """Fetch recent logs from the 'benchling-helper' Docker container.
     Requires docker socket mounted and docker SDK available.
+    Pass ?since=<cursor> from a previous response to only receive newer lines.
+    """
+    tail = int(request.args.get('tail', 200))
+    cursor = _parse_cursor(request.args.get('since'))
+    if not helper_logs.available:
+        return jsonify({'error': 'Docker SDK not available in app container'}), 500
+    try:
+        lines, cursor = helper_logs.fetch(tail, cursor)
+        return jsonify({'lines': lines, 'cursor': str(cursor) if cursor else None})
+    except Exception as e:
+        return jsonify({'error': f'Unable to read logs: {e}'}), 500
+
+@app.route('/api/benchling-helper/logs/stream', methods=['GET'])
+def benchling_helper_logs_stream():
+    """Server-Sent Events stream following the 'benchling-helper' container log.
+    Starts with the last ?tail lines, or resumes after ?since / Last-Event-ID.
     """
     tail = int(request.args.get('tail', 200))
-    if docker is None:
+    cursor = _parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    if not helper_logs.available:
         return jsonify({'error': 'Docker SDK not available in app container'}), 500
+    if not helper_log_streams.acquire(blocking=False):
+        # EventSource gives up on a non-200; the page falls back to polling /api/benchling-helper/logs
+        return Response('retry: 30000\n\n', status=503, mimetype='text/event-stream',
+                        headers={'Retry-After': '30', 'Cache-Control': 'no-cache'})
     try:
-        client = docker.from_env()
-        container = client.containers.get('benchling-helper')
-        log_bytes = container.logs(tail=tail)
-        text = log_bytes.decode('utf-8', errors='replace')
-        lines = text.strip().split('\n') if text else []
-        return jsonify({'lines': lines[-tail:]})
+        events = helper_logs.stream(tail, cursor)
+        first = next(events)  # open the Docker stream before committing to a 200
     except Exception as e:
+        helper_log_streams.release()
         return jsonify({'error': f'Unable to read logs: {e}'}), 500
 
+    def generate():
+        yield first
+        yield from events
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+    # Runs when the server closes the response, even if the body was never iterated
+    @response.call_on_close
+    def release_stream():
+        events.close()
+        helper_log_streams.release()
+
+    return response
+
+def _add_stats_in_background(results: list, run: int, owner: str) -> None:
+    """QC summaries for a finished run, published to the results as they come in."""
+    # Polling finished alignments is background work; don't let it slow anyone's interactive run
+    with job_context(owner=owner, priority=BULK):
+        add_alignment_stats(results, on_result=lambda result: results_store.upsert(result, run=run))
+
 @app.route('/api/run', methods=['POST'])
 def run_alignment_api():
     """Run the alignment process"""
-    global logs_buffer, alignment_results
-    logs_buffer = []  # Clear logs
-    alignment_results = []  # Clear previous results
+    log_buffer.clear()  # Clear logs
+    run = results_store.reset()  # Clear previous results
     
     data = request.json
     upload_dir = data.get('upload_dir', '')
@@ -296,24 +624,48 @@ def run_alignment_api():
     if not os.path.exists(upload_dir):
         return jsonify({'error': 'Upload directory does not exist'}), 400
     
+    # Benchling calls are scheduled fairly per user (the caller's address unless given),
+    # as a bulk or interactive job by size unless `priority` says which
+    owner = data.get('user') or request.remote_addr
+    priority = data.get('priority')
+    if priority not in (None, INTERACTIVE, BULK):
+        return jsonify({'error': f'priority must be {INTERACTIVE!r} or {BULK!r}'}), 400
+    
     try:
         # Set up custom log function
         set_log_function(web_log)
+        set_result_function(results_store.upsert)
         
-        # Run the alignment
-        success, results = run_alignment(upload_dir)
-        alignment_results = results
+        # Run the alignment, keeping the upload collector off the files meanwhile
+        with upload_store.hold(upload_dir), job_context(owner=owner, priority=priority):
+            success, results = run_alignment(upload_dir)
+        results_store.update(results)
+        if success and ALIGNMENT_STATS_ENABLED:
+            # QC summaries need the finished alignments; add them to the results as they come in
+            threading.Thread(
+                target=_add_stats_in_background,
+                args=(results, run, owner),
+                name='alignment-stats',
+                daemon=True,
+            ).start()
         
         return jsonify({
             'success': success,
             'message': 'Alignment completed successfully' if success else 'Alignment failed',
             'results_count': len(results)
         })
+    except UploadNotFoundError:
+        return jsonify({'error': 'Upload directory does not exist'}), 400
     finally:
-        # Clean up temporary files
-        if upload_dir and os.path.exists(upload_dir):
+        # Clean up the upload; stored files stay so a repeat delivery is deduplicated
+        if upload_store.owns(upload_dir):
+            upload_store.discard(upload_dir)
+        elif upload_dir and os.path.exists(upload_dir):
             shutil.rmtree(upload_dir, ignore_errors=True)
 
 if __name__ == '__main__':
+    start_warm_up()
+    start_upload_gc()
+    start_queue_workers()
     app.run(host='0.0.0.0', port=8080, debug=False)
 
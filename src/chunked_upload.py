@@ -0,0 +1,290 @@
+"""
+Resumable chunked uploads for large Microsynth deliveries.
+
+A chunked upload is a three step protocol:
+
+1. ``init``: the client announces the files (name and size) it is going to send
+   and receives an upload id plus the chunk size to use.
+2. ``write_chunk``: the client PUTs byte ranges of each file at explicit offsets.
+   Chunks are streamed straight into a preallocated ``.part`` file on disk, so
+   they can arrive in any order, in parallel, and be re-sent after a failure.
+   A chunk sent with its SHA-256 is staged and verified first, and only
+   written (and counted as received) if it matches, so a corrupted resend
+   can't overwrite a range that was already accepted.
+3. ``finalize``: once every byte has been received the session is claimed
+   (renamed, so only one finalize call proceeds), the files are verified
+   against the client supplied SHA-256 checksums and handed over as a regular
+   upload directory, exactly like ``/api/upload`` produces.
+
+Received ranges are recorded as empty marker files next to the ``.part`` file.
+This keeps the state on disk (shared between gunicorn workers) without needing
+any cross-process locking.
+
+With an upload store attached, ``init`` also accepts each file's ``sha256``:
+files the store already holds are linked in straight away and reported as
+fully received, so a repeated delivery only sends what is new.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+SESSIONS_DIR_NAME = '.chunked'
+MANIFEST_NAME = 'manifest.json'
+FINALIZING_SUFFIX = '.finalizing'
+COPY_BUFFER_SIZE = 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_MARKER_RE = re.compile(r'^(\d+)\.(\d+)-(\d+)\.ok$')
+
+
+class ChunkedUploadError(Exception):
+    """Raised for invalid chunked upload operations; carries an HTTP status code."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[List[int]]:
+    """Merge overlapping/adjacent half-open ranges."""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _copy(src: BinaryIO, dest: BinaryIO, length: int, digest=None) -> int:
+    """Copy up to ``length`` bytes, feeding ``digest`` if given; returns bytes copied."""
+    copied = 0
+    while copied < length:
+        buf = src.read(min(COPY_BUFFER_SIZE, length - copied))
+        if not buf:
+            break
+        dest.write(buf)
+        if digest:
+            digest.update(buf)
+        copied += len(buf)
+    return copied
+
+
+class ChunkedUploadStore:
+    """On-disk store for in-progress chunked uploads."""
+
+    def __init__(self, upload_folder: str, chunk_size: int, max_upload_size: int, object_store=None):
+        self.upload_folder = upload_folder
+        self.sessions_dir = os.path.join(upload_folder, SESSIONS_DIR_NAME)
+        self.chunk_size = chunk_size
+        self.max_upload_size = max_upload_size
+        # Optional UploadStore: dedupes announced files and hands out the upload dirs
+        self.object_store = object_store
+
+    def _session_dir(self, upload_id: str) -> str:
+        if not _UPLOAD_ID_RE.match(upload_id or ''):
+            raise ChunkedUploadError('Invalid upload id', 400)
+        session_dir = os.path.join(self.sessions_dir, upload_id)
+        if not os.path.isdir(session_dir):
+            if os.path.isdir(session_dir + FINALIZING_SUFFIX):
+                raise ChunkedUploadError('Upload is already being finalized', 409)
+            raise ChunkedUploadError('Unknown or expired upload id', 404)
+        return session_dir
+
+    def _load_manifest(self, session_dir: str) -> Dict:
+        try:
+            with open(os.path.join(session_dir, MANIFEST_NAME), 'r') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            # Claimed by a finalize (or collected) since the session was looked up
+            raise ChunkedUploadError('Upload is being finalized or has expired', 409)
+
+    def _received_ranges(self, session_dir: str, file_index: int) -> List[List[int]]:
+        ranges = []
+        for entry in os.listdir(session_dir):
+            match = _MARKER_RE.match(entry)
+            if match and int(match.group(1)) == file_index:
+                ranges.append((int(match.group(2)), int(match.group(3))))
+        return _merge_ranges(ranges)
+
+    def init(self, files: List[Dict]) -> Dict:
+        """Create a new upload session for the given ``[{'name', 'size', 'sha256'?}]`` list."""
+        if not files:
+            raise ChunkedUploadError('No files announced')
+
+        entries = []
+        total = 0
+        for f in files:
+            name = os.path.basename(str(f.get('name', '')).replace('\\', '/'))
+            try:
+                size = int(f.get('size', -1))
+            except (TypeError, ValueError):
+                size = -1
+            if not name or name in ('.', '..'):
+                raise ChunkedUploadError('Every file needs a name')
+            if size < 0:
+                raise ChunkedUploadError(f'Invalid size for {name}')
+            entry = {'name': name, 'size': size}
+            digest = str(f.get('sha256') or '').lower()
+            if self.object_store and size and self.object_store.has_object(digest, size):
+                entry['sha256'] = digest
+            entries.append(entry)
+            total += size
+
+        if total > self.max_upload_size:
+            raise ChunkedUploadError(
+                f'Upload of {total} bytes exceeds the limit of {self.max_upload_size} bytes', 413
+            )
+
+        upload_id = uuid.uuid4().hex
+        session_dir = os.path.join(self.sessions_dir, upload_id)
+        os.makedirs(session_dir)
+        for index, entry in enumerate(entries):
+            part_path = os.path.join(session_dir, f'{index}.part')
+            # Already stored: link it in (which also keeps the collector off it) and mark it received
+            if entry.get('sha256') and self.object_store.link_object(entry['sha256'], part_path):
+                open(os.path.join(session_dir, f"{index}.0-{entry['size']}.ok"), 'w').close()
+                continue
+            entry.pop('sha256', None)
+            # Preallocate so chunks can be written at any offset, in any order
+            with open(part_path, 'wb') as fh:
+                fh.truncate(entry['size'])
+
+        manifest = {'upload_id': upload_id, 'created': time.time(), 'files': entries}
+        with open(os.path.join(session_dir, MANIFEST_NAME), 'w') as fh:
+            json.dump(manifest, fh)
+
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict:
+        """Return the byte ranges received so far for each file (used to resume)."""
+        session_dir = self._session_dir(upload_id)
+        manifest = self._load_manifest(session_dir)
+        files = []
+        for index, entry in enumerate(manifest['files']):
+            received = self._received_ranges(session_dir, index)
+            complete = entry['size'] == 0 or received == [[0, entry['size']]]
+            files.append({**entry, 'received': received, 'complete': complete})
+        return {'upload_id': upload_id, 'chunk_size': self.chunk_size, 'files': files}
+
+    def write_chunk(
+        self,
+        upload_id: str,
+        file_index: int,
+        offset: int,
+        stream: BinaryIO,
+        length: Optional[int],
+        sha256: Optional[str] = None,
+    ) -> int:
+        """
+        Stream one chunk from ``stream`` into the file at ``offset``; returns bytes
+        written. With ``sha256`` the chunk is rejected (422) unless it matches.
+        """
+        session_dir = self._session_dir(upload_id)
+        manifest = self._load_manifest(session_dir)
+        if file_index < 0 or file_index >= len(manifest['files']):
+            raise ChunkedUploadError('Invalid file index')
+        size = manifest['files'][file_index]['size']
+        if manifest['files'][file_index].get('sha256'):
+            # The .part file is a link into the upload store and must not be written to
+            raise ChunkedUploadError('File is already stored; no chunks needed', 409)
+        if length is None:
+            raise ChunkedUploadError('Content-Length is required', 411)
+        if length > self.chunk_size:
+            raise ChunkedUploadError(f'Chunk exceeds the chunk size of {self.chunk_size} bytes', 413)
+        if offset < 0 or offset + length > size:
+            raise ChunkedUploadError('Chunk lies outside the announced file size', 416)
+
+        part_path = os.path.join(session_dir, f'{file_index}.part')
+        if sha256:
+            # Stage and verify first: the range may already hold accepted bytes
+            digest = hashlib.sha256()
+            with tempfile.TemporaryFile(dir=session_dir) as staged:
+                written = _copy(stream, staged, length, digest)
+                if written != length:
+                    raise ChunkedUploadError(f'Incomplete chunk: got {written} of {length} bytes')
+                if digest.hexdigest() != sha256.lower():
+                    # Not written or recorded as received; the client resends it
+                    raise ChunkedUploadError('Chunk checksum mismatch', 422)
+                staged.seek(0)
+                with open(part_path, 'r+b') as fh:
+                    fh.seek(offset)
+                    _copy(staged, fh, length)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+        else:
+            with open(part_path, 'r+b') as fh:
+                fh.seek(offset)
+                written = _copy(stream, fh, length)
+                fh.flush()
+                os.fsync(fh.fileno())
+            if written != length:
+                # Don't record a partial chunk; the client will resend it
+                raise ChunkedUploadError(f'Incomplete chunk: got {written} of {length} bytes')
+
+        if written:
+            marker = os.path.join(session_dir, f'{file_index}.{offset}-{offset + written}.ok')
+            open(marker, 'w').close()
+        return written
+
+    def finalize(self, upload_id: str, checksums: Dict[int, str]) -> Tuple[str, List[str]]:
+        """
+        Verify every file is complete and matches its SHA-256, then move the files
+        into a fresh upload directory.
+
+        Returns:
+            (upload_dir, [file paths inside upload_dir])
+        """
+        session_dir = self._session_dir(upload_id)
+        status = self.status(upload_id)
+
+        missing = [f['name'] for f in status['files'] if not f['complete']]
+        if missing:
+            raise ChunkedUploadError(f"Upload incomplete for: {', '.join(missing)}", 409)
+
+        # Claim the session: the rename is atomic, so a concurrent finalize gets a 409
+        # instead of racing this one for the .part files
+        claimed_dir = session_dir + FINALIZING_SUFFIX
+        try:
+            os.rename(session_dir, claimed_dir)
+        except OSError:
+            raise ChunkedUploadError('Upload is already being finalized', 409)
+
+        try:
+            for index, entry in enumerate(status['files']):
+                expected = checksums.get(index)
+                if not expected or entry.get('sha256') == expected.lower():
+                    # Stored files are addressed by their checksum; no need to hash them again
+                    continue
+                digest = hashlib.sha256()
+                with open(os.path.join(claimed_dir, f'{index}.part'), 'rb') as fh:
+                    for buf in iter(lambda: fh.read(COPY_BUFFER_SIZE), b''):
+                        digest.update(buf)
+                if digest.hexdigest() != expected.lower():
+                    raise ChunkedUploadError(f"Checksum mismatch for {entry['name']}", 422)
+        except BaseException:
+            # Hand the session back so it can be inspected, resumed or aborted
+            os.rename(claimed_dir, session_dir)
+            raise
+
+        if self.object_store:
+            upload_dir = self.object_store.new_upload()
+        else:
+            upload_dir = tempfile.mkdtemp(dir=self.upload_folder)
+        paths = []
+        for index, entry in enumerate(status['files']):
+            dest = os.path.join(upload_dir, entry['name'])
+            os.replace(os.path.join(claimed_dir, f'{index}.part'), dest)
+            paths.append(dest)
+        shutil.rmtree(claimed_dir, ignore_errors=True)
+        return upload_dir, paths
+
+    def abort(self, upload_id: str) -> None:
+        """Discard an upload session and everything received for it."""
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
@@ -0,0 +1,156 @@
+"""
+Incremental log access for the 'benchling-helper' Docker container.
+
+Log lines are fetched with Docker timestamps so every response carries a
+cursor (nanoseconds since the epoch of the last line). Passing the cursor back
+only returns lines written after it, either as a one-off fetch or as a
+Server-Sent Events stream that follows the container's log output.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import docker  # docker SDK for helper logs
+except Exception:
+    docker = None
+
+HELPER_CONTAINER_NAME = 'benchling-helper'
+# A stream holds a request thread (and a pump thread); hand both back this often
+HELPER_LOG_STREAM_SECONDS = float(os.getenv('HELPER_LOG_STREAM_SECONDS', '60'))
+
+
+def _parse_timestamp_ns(stamp: str) -> Optional[int]:
+    """Parse Docker's RFC3339Nano timestamp (e.g. 2024-05-01T12:00:00.123456789Z) to epoch ns."""
+    try:
+        stamp = stamp.rstrip('Z')
+        seconds_part, _, fraction = stamp.partition('.')
+        dt = datetime.strptime(seconds_part, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+        return int(dt.timestamp()) * 1_000_000_000 + int((fraction or '0')[:9].ljust(9, '0'))
+    except ValueError:
+        return None
+
+
+def _sse_data(line: str) -> str:
+    """`data:` field(s) for one log line; a bare CR would otherwise end the field early."""
+    return ''.join(f'data: {part}\n' for part in line.replace('\r\n', '\n').replace('\r', '\n').split('\n'))
+
+
+def _split_line(raw: str) -> Tuple[Optional[int], str]:
+    """Split a timestamped log line into (epoch ns, text)."""
+    stamp, _, text = raw.partition(' ')
+    ts = _parse_timestamp_ns(stamp)
+    if ts is None:
+        return None, raw.rstrip('\r')
+    return ts, text.rstrip('\r')
+
+
+class HelperLogReader:
+    """Reads helper container logs through one reusable Docker client."""
+
+    def __init__(self, container_name: str = HELPER_CONTAINER_NAME):
+        self.container_name = container_name
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return docker is not None
+
+    def _container(self):
+        with self._lock:
+            if self._client is None:
+                self._client = docker.from_env()
+            client = self._client
+        try:
+            return client.containers.get(self.container_name)
+        except docker.errors.NotFound:
+            raise
+        except Exception:
+            # Drop a client whose connection went bad so the next call reconnects
+            with self._lock:
+                self._client = None
+            raise
+
+    @staticmethod
+    def _since_kwargs(cursor: Optional[int]) -> dict:
+        # Docker's `since` has second resolution on some engines and is inclusive,
+        # so lines at or before the cursor are filtered out again below
+        return {'since': cursor / 1e9} if cursor else {}
+
+    def fetch(self, tail: int, cursor: Optional[int] = None) -> Tuple[List[str], Optional[int]]:
+        """Return (lines, cursor): the last `tail` lines, or only the lines newer than `cursor`."""
+        container = self._container()
+        log_bytes = container.logs(tail=tail, timestamps=True, **self._since_kwargs(cursor))
+        text = log_bytes.decode('utf-8', errors='replace')
+
+        lines = []
+        for raw in text.splitlines():
+            ts, line = _split_line(raw)
+            if cursor and ts is not None and ts <= cursor:
+                continue
+            if ts is not None:
+                cursor = ts
+            lines.append(line)
+        return lines[-tail:], cursor
+
+    def stream(
+        self,
+        tail: int,
+        cursor: Optional[int] = None,
+        heartbeat: float = 15.0,
+        max_duration: float = HELPER_LOG_STREAM_SECONDS,
+    ) -> Iterator[str]:
+        """
+        Yield Server-Sent Events following the container log.
+
+        Each line is sent as a `data:` event whose `id` is the line's cursor, so a
+        reconnecting EventSource resumes via Last-Event-ID. The stream ends after
+        `max_duration` seconds to hand the worker thread back; the browser
+        reconnects on its own.
+        """
+        container = self._container()
+        kwargs = self._since_kwargs(cursor) if cursor else {'tail': tail}
+        log_stream = container.logs(stream=True, follow=True, timestamps=True, **kwargs)
+
+        lines: 'queue.Queue' = queue.Queue()
+
+        def pump():
+            buffer = b''
+            try:
+                for chunk in log_stream:
+                    buffer += chunk
+                    *complete, buffer = buffer.split(b'\n')
+                    for raw in complete:
+                        lines.put(raw.decode('utf-8', errors='replace'))
+            except Exception:
+                pass
+            finally:
+                lines.put(None)
+
+        threading.Thread(target=pump, daemon=True).start()
+
+        deadline = time.monotonic() + max_duration
+        try:
+            yield 'retry: 2000\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    raw = lines.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if raw is None:
+                    break
+                ts, line = _split_line(raw)
+                if cursor and ts is not None and ts <= cursor:
+                    continue
+                if ts is not None:
+                    cursor = ts
+                    yield f'id: {ts}\n{_sse_data(line)}\n'
+                else:
+                    yield f'{_sse_data(line)}\n'
+        finally:
+            log_stream.close()
@@ -0,0 +1,218 @@
+"""
+Per-job memory accounting and budgets for alignment runs.
+
+`JobMemory` times each stage of a run and records how much memory it used:
+resident set size always, plus Python allocations (current and peak) when
+`MEMORY_TRACE` is on. tracemalloc is process-wide and slows allocation-heavy
+code down noticeably, so it is opt-in, and while jobs overlap in one worker
+their traced figures include each other's allocations.
+
+Each job also gets a byte budget (`JOB_MEMORY_BUDGET_MB`). Stages reserve an
+estimate of what a tube will hold in memory before reading or submitting it,
+and wait while the job's reservations would exceed the budget, so a large
+delivery is processed a slice at a time instead of all at once.
+"""
+import asyncio
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List, Optional
+
+MB = 1024 * 1024
+
+MEMORY_TRACE = os.getenv('MEMORY_TRACE', 'false').lower() in ('1', 'true', 'yes')
+JOB_MEMORY_BUDGET = int(float(os.getenv('JOB_MEMORY_BUDGET_MB', '256')) * MB)
+
+# Parsing a FASTA/GenBank file holds the raw lines, the joined sequence and the
+# record at once; reserve this multiple of the file size while reading
+READ_MEMORY_FACTOR = 3
+
+if MEMORY_TRACE and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+# Reports of recently finished jobs in this worker, newest last
+recent_jobs: deque = deque(maxlen=20)
+_active_jobs: Dict[int, 'JobMemory'] = {}
+_active_lock = threading.Lock()
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (Linux only; None elsewhere)."""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_cost(path: str) -> int:
+    """Bytes to reserve while a sequence file is being parsed."""
+    try:
+        return os.path.getsize(path) * READ_MEMORY_FACTOR
+    except OSError:
+        return 0
+
+
+class MemoryBudget:
+    """
+    Counting semaphore over bytes. A reservation that doesn't fit waits until
+    earlier ones are released; one that is larger than the whole budget is let
+    through once nothing else is reserved, so oversized tubes still run alone.
+    A limit of 0 disables the budget.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.reserved = 0
+        self.peak = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._cond = threading.Condition()
+        self._async_cond: Optional[asyncio.Condition] = None
+
+    def _fits(self, nbytes: int) -> bool:
+        return not self.limit or self.reserved == 0 or self.reserved + nbytes <= self.limit
+
+    def _take(self, nbytes: int) -> None:
+        self.reserved += nbytes
+        self.peak = max(self.peak, self.reserved)
+
+    @contextmanager
+    def reserve(self, nbytes: int):
+        """Hold `nbytes` of the budget for the duration of the block (threads)."""
+        with self._cond:
+            if not self._fits(nbytes):
+                self.waits += 1
+                started = time.monotonic()
+                self._cond.wait_for(lambda: self._fits(nbytes))
+                self.wait_seconds += time.monotonic() - started
+            self._take(nbytes)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.reserved -= nbytes
+                self._cond.notify_all()
+
+    @asynccontextmanager
+    async def reserve_async(self, nbytes: int):
+        """Same as `reserve` for coroutines; all callers must share one event loop."""
+        if self._async_cond is None:
+            self._async_cond = asyncio.Condition()
+        cond = self._async_cond
+        async with cond:
+            if not self._fits(nbytes):
+                self.waits += 1
+                started = time.monotonic()
+                await cond.wait_for(lambda: self._fits(nbytes))
+                self.wait_seconds += time.monotonic() - started
+            self._take(nbytes)
+        try:
+            yield
+        finally:
+            async with cond:
+                self.reserved -= nbytes
+                cond.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            'limit_bytes': self.limit,
+            'reserved_bytes': self.reserved,
+            'peak_reserved_bytes': self.peak,
+            'waits': self.waits,
+            'wait_seconds': round(self.wait_seconds, 3),
+        }
+
+
+class JobMemory:
+    """Stage timings, memory figures and the memory budget of one alignment run."""
+
+    def __init__(self, name: str, budget_bytes: int = JOB_MEMORY_BUDGET):
+        self.name = name
+        self.budget = MemoryBudget(budget_bytes)
+        self.stages: List[Dict] = []
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def __enter__(self) -> 'JobMemory':
+        with _active_lock:
+            _active_jobs[id(self)] = self
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.finished_at = time.time()
+        with _active_lock:
+            _active_jobs.pop(id(self), None)
+        recent_jobs.append(self.report())
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record duration and memory use of the block as stage `name`."""
+        rss_before = current_rss()
+        traced_before = None
+        if tracemalloc.is_tracing():
+            traced_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            entry = {'stage': name, 'seconds': round(time.monotonic() - started, 3)}
+            rss_after = current_rss()
+            if rss_before is not None and rss_after is not None:
+                entry['rss_bytes'] = rss_after
+                entry['rss_delta_bytes'] = rss_after - rss_before
+            if traced_before is not None and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                entry['traced_delta_bytes'] = current - traced_before
+                entry['traced_peak_bytes'] = peak
+            self.stages.append(entry)
+
+    def report(self) -> Dict:
+        return {
+            'job': self.name,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'stages': list(self.stages),
+            'budget': self.budget.stats(),
+        }
+
+    def summary(self) -> str:
+        """One-line, human-readable version of the report for the run log."""
+        parts = []
+        for entry in self.stages:
+            text = f"{entry['stage']} {entry['seconds']:.1f}s"
+            if 'traced_peak_bytes' in entry:
+                text += f", peak {entry['traced_peak_bytes'] / MB:.1f} MB"
+            elif 'rss_delta_bytes' in entry:
+                text += f", RSS {entry['rss_delta_bytes'] / MB:+.1f} MB"
+            parts.append(text)
+        line = f"Memory: {'; '.join(parts)}."
+        budget = self.budget.stats()
+        if budget['peak_reserved_bytes']:
+            line += f" Budget peak {budget['peak_reserved_bytes'] / MB:.1f} MB"
+            if budget['limit_bytes']:
+                line += f" of {budget['limit_bytes'] / MB:.1f} MB"
+            if budget['waits']:
+                line += f" ({budget['waits']} throttled, {budget['wait_seconds']:.1f}s total wait)"
+        return line
+
+
+def memory_snapshot() -> Dict:
+    """Worker-wide memory figures plus active and recent job reports, for /api/metrics."""
+    with _active_lock:
+        active = list(_active_jobs.values())
+    snapshot = {
+        'rss_bytes': current_rss(),
+        'tracing': tracemalloc.is_tracing(),
+        'job_budget_bytes': JOB_MEMORY_BUDGET,
+        'active_jobs': [job.report() for job in active],
+        'reserved_bytes': sum(job.budget.reserved for job in active),
+        'recent_jobs': list(recent_jobs),
+    }
+    if tracemalloc.is_tracing():
+        snapshot['traced_bytes'], snapshot['traced_peak_bytes'] = tracemalloc.get_traced_memory()
+    return snapshot
@@ -0,0 +1,50 @@
+"""
+Recent run log lines with cursors for incremental polling.
+
+Every line gets a sequence number that keeps counting across runs. Pollers send
+the number of the last line they have and get back only newer lines, or all
+kept lines (`full`) when they fell behind the buffer or a new run cleared it.
+"""
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class LogBuffer:
+    """Thread-safe ring buffer of the last `maxlen` log lines."""
+
+    def __init__(self, maxlen: int = 100):
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=maxlen)
+        self._seq = 0
+        self._reset_seq = 0
+
+    @property
+    def cursor(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def append(self, line: str) -> None:
+        with self._lock:
+            self._seq += 1
+            self._lines.append(line)
+
+    def clear(self) -> None:
+        """Drop all lines (a new run is starting); pollers get a full snapshot next."""
+        with self._lock:
+            self._lines.clear()
+            # The clear takes a number of its own, so every earlier cursor is behind it
+            self._seq += 1
+            self._reset_seq = self._seq
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            return list(self._lines)
+
+    def since(self, cursor: Optional[int] = None) -> dict:
+        """Lines after `cursor`, or all kept lines when lines in between are gone."""
+        with self._lock:
+            first = self._seq - len(self._lines)  # sequence number before the oldest kept line
+            full = cursor is None or cursor < max(first, self._reset_seq) or cursor > self._seq
+            lines = list(self._lines) if full else list(self._lines)[len(self._lines) - (self._seq - cursor):]
+            return {'lines': lines, 'cursor': self._seq, 'full': full}
@@ -1,8 +1,15 @@
 # Boiler plate stuff
 import argparse
+import asyncio
 import base64
+import contextvars
+import io
+import itertools
 import os
 import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
 import pandas as pd
@@ -12,7 +19,17 @@ from dotenv import find_dotenv, load_dotenv
 
 # Import our custom Benchling client
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from benchling import BenchlingClient, get_config
+from benchling import AsyncBenchlingClient, BenchlingClient, CircuitOpenError, current_job, get_config, job_context
+from benchling.scheduler import BULK
+from src.alignment_payload import TemplateAlignmentPayload
+from src.alignment_stats import split_alignment, summarize_alignment
+from src.job_memory import JobMemory, read_cost
+from src.quality_trim import TRIM_METHOD, TRIM_MIN_LENGTH, read_trace, trim_traces
+from src.ttl_cache import TTLCache
+from src.work_queue import (
+    BULK_PRIORITY, FAILED, FINISHED_STATES, INTERACTIVE_PRIORITY, WORK_QUEUE_RETENTION, LeasedTask, QueueWorker,
+    get_work_queue
+)
 
 # Initialize Benchling client
 load_dotenv(find_dotenv())
@@ -21,8 +38,32 @@ try:
 except Exception as e:
     sys.exit(f"Error initializing Benchling client: {e}")
 
+# Tube identifier -> matched container, so repeat runs skip the search strategies
+container_cache = TTLCache(ttl=int(os.getenv('CONTAINER_CACHE_TTL', '3600')))
+
+# Run lookups/submissions concurrently on an asyncio event loop instead of one tube at a time
+USE_ASYNC = os.getenv('ALIGNER_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+
+# Split runs into per-tube tasks on the shared work queue (see src/work_queue.py),
+# processed by queue worker threads in every app process that has them enabled
+USE_WORK_QUEUE = os.getenv('WORK_QUEUE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+WORK_QUEUE_THREADS = int(os.getenv('WORK_QUEUE_THREADS', '2'))
+WORK_QUEUE_LEASE = float(os.getenv('WORK_QUEUE_LEASE', '60'))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', '3'))
+WORK_QUEUE_JOB_TIMEOUT = float(os.getenv('WORK_QUEUE_JOB_TIMEOUT', '3600'))
+ENQUEUE_BATCH = 50
+
+# QC summaries of finished alignments (fetched once; alignments never change afterwards)
+ALIGNMENT_STATS_ENABLED = os.getenv('ALIGNMENT_STATS', 'true').lower() in ('1', 'true', 'yes')
+ALIGNMENT_STATS_TIMEOUT = float(os.getenv('ALIGNMENT_STATS_TIMEOUT', '600'))
+ALIGNMENT_STATS_WORKERS = 8
+alignment_stats_cache = TTLCache(ttl=int(os.getenv('ALIGNMENT_STATS_CACHE_TTL', '86400')))
+
 LOG_FUNCTION: Callable[[str], None] = print
 
+# Set while a queue task runs, so its messages travel back to the job with the result
+_task_log: contextvars.ContextVar = contextvars.ContextVar('task_log', default=None)
+
 
 def set_log_function(func: Callable[[str], None]) -> None:
     """Allow callers to override how messages are surfaced."""
@@ -31,66 +72,106 @@ def set_log_function(func: Callable[[str], None]) -> None:
 
 
 def log(message: str) -> None:
+    task_log = _task_log.get()
+    if task_log is not None:
+        task_log.append(message)
+        return
     LOG_FUNCTION(message)
 
 
-def find_container(identifier: str):
-    """Find a container by name, display ID, or barcode using the Benchling API."""
-    # Search strategies for finding containers
-    search_strategies = [
+RESULT_FUNCTION: Callable[[dict], None] = lambda result: None
+
+
+def set_result_function(func: Callable[[dict], None]) -> None:
+    """Allow callers to receive each tube's result as soon as it is known."""
+    global RESULT_FUNCTION
+    RESULT_FUNCTION = func
+
+
+def publish_result(result: dict) -> dict:
+    RESULT_FUNCTION(result)
+    return result
+
+
+def _container_search_strategies(identifier: str) -> list:
+    """Search strategies for finding containers, in order of preference."""
+    return [
         ("name", {"name": identifier}),
         ("display ID", {"displayIds": [identifier]}),
         ("barcode", {"barcodes": [identifier]}),
     ]
 
-    for label, params in search_strategies:
+
+def _match_container(identifier: str, label: str, containers: list):
+    """Return the first container if it is a valid match for the identifier, else None."""
+    if not containers:
+        return None
+        
+    container = containers[0]  # Take the first match
+    
+    # Extract container attributes safely
+    container_name = container.get('name')
+    container_barcode = container.get('barcode')
+    container_display_id = container.get('displayId')
+
+    # Verify the match is correct
+    if (
+        container_name == identifier
+        or container_barcode == identifier
+        or container_display_id == identifier
+        or label in {"barcode", "display ID"}
+    ):
+        if label == "barcode" and container_name != identifier:
+            log(
+                f"Info: Matched {identifier} by barcode. Container name is {container_name} and barcode {container_barcode}."
+            )
+        elif label == "display ID" and container_display_id != identifier:
+            log(
+                f"Info: Matched {identifier} by display ID. Container name is {container_name} and display ID {container_display_id}."
+            )
+        return container
+    return None
+
+
+def find_container(identifier: str):
+    """Find a container by name, display ID, or barcode using the Benchling API."""
+    cached = container_cache.get(identifier)
+    if cached:
+        return cached
+
+    for label, params in _container_search_strategies(identifier):
         try:
             response = benchling_client.make_request('GET', '/containers', params=params)
-            containers = response.json().get('containers', [])
-            
-            if not containers:
-                continue
-                
-            container = containers[0]  # Take the first match
-            
-            # Extract container attributes safely
-            container_name = container.get('name')
-            container_barcode = container.get('barcode')
-            container_display_id = container.get('displayId')
-
-            # Verify the match is correct
-            if (
-                container_name == identifier
-                or container_barcode == identifier
-                or container_display_id == identifier
-                or label in {"barcode", "display ID"}
-            ):
-                if label == "barcode" and container_name != identifier:
-                    log(
-                        f"Info: Matched {identifier} by barcode. Container name is {container_name} and barcode {container_barcode}."
-                    )
-                elif label == "display ID" and container_display_id != identifier:
-                    log(
-                        f"Info: Matched {identifier} by display ID. Container name is {container_name} and display ID {container_display_id}."
-                    )
+            container = _match_container(identifier, label, response.json().get('containers', []))
+            if container:
+                container_cache.set(identifier, container)
                 return container
                 
+        except CircuitOpenError:
+            # Benchling is down; stop probing instead of trying every strategy
+            raise
         except Exception as exc:
             # Don't log the error here - just continue to try next search strategy
             continue
 
     return None
 
+def _is_trace(path: str) -> bool:
+    return path.lower().endswith(".ab1")
+
+
 # Function to read FASTA files from microsynth, pull the names of these files
-def get_fasta_filenames(input_path: str) -> dict:
-    """Scan input folder for FASTA files (.fasta, .fa) only.
+def get_fasta_filenames(input_path: str, fasta_fallbacks: Optional[dict] = None) -> dict:
+    """Scan input folder for FASTA files (.fasta, .fa) and ABI traces (.ab1).
     
     Note: We only extract FASTA files to avoid duplicates if both .fasta and .gbk files exist.
+    A tube's .ab1 trace is used instead of its FASTA, since it has the quality values for trimming;
+    the FASTA it replaced is recorded in `fasta_fallbacks` (if given) for when the trace can't be read.
     
     Returns a dictionary mapping tube_name (filename without extension) to full file path.
     """
     fasta_dict = {}
-    supported_extensions = (".fasta", ".fa")
+    supported_extensions = (".fasta", ".fa", ".ab1")
     
     for root, dirs, files in os.walk(input_path):
         for file in files:
@@ -106,21 +187,105 @@ def get_fasta_filenames(input_path: str) -> dict:
                         break
                 
                 if tube_name in fasta_dict:
+                    # Microsynth delivers a FASTA next to each trace; that's not a duplicate
+                    if _is_trace(fasta_dict[tube_name]) != _is_trace(full_path):
+                        fasta_path = full_path
+                        if _is_trace(full_path):
+                            fasta_path = fasta_dict[tube_name]
+                            fasta_dict[tube_name] = full_path
+                        if fasta_fallbacks is not None:
+                            fasta_fallbacks[tube_name] = fasta_path
+                        continue
                     log(f"Warning: Duplicate tube name found: {tube_name}")
                 fasta_dict[tube_name] = full_path
     return fasta_dict
 
-def create_file_payload_df(fasta_dict):
+
+def trim_reads(fasta_dict: dict, fasta_fallbacks: Optional[dict] = None) -> dict:
+    """
+    Quality-trim the tubes delivered as .ab1 traces, all at once (see src/quality_trim.py).
+    Returns {tube_name: trimmed FASTA bytes}. A trace that can't be read is replaced by
+    the tube's FASTA from `fasta_fallbacks` when there is one; otherwise it, and traces
+    too short after trimming, are logged and removed from `fasta_dict`.
+    """
+    fasta_fallbacks = fasta_fallbacks or {}
+    traces = {}
+    for tube_name, path in list(fasta_dict.items()):
+        if not _is_trace(path):
+            continue
+        try:
+            traces[tube_name] = read_trace(path)
+        except Exception as e:
+            log(f"Error reading trace file {path}: {e}")
+            if tube_name in fasta_fallbacks:
+                log(f"Using {fasta_fallbacks[tube_name]} for {tube_name} instead (untrimmed)")
+                fasta_dict[tube_name] = fasta_fallbacks[tube_name]
+            else:
+                del fasta_dict[tube_name]
+    if not traces:
+        return {}
+
+    started = time.perf_counter()
+    trimmed = trim_traces(traces)
+    elapsed = (time.perf_counter() - started) * 1000
+    reads = {}
+    for tube_name, read in trimmed.items():
+        if read['fasta'] is None:
+            log(f"Warning: {tube_name} has only {read['kept']} bases of usable quality "
+                f"(minimum {TRIM_MIN_LENGTH}); skipping it")
+            del fasta_dict[tube_name]
+        else:
+            reads[tube_name] = read['fasta']
+    total = sum(read['length'] for read in trimmed.values())
+    kept = sum(read['kept'] for read in trimmed.values() if read['fasta'] is not None)
+    log(f"Trimmed {len(trimmed)} traces ({TRIM_METHOD}) in {elapsed:.0f} ms: "
+        f"kept {kept} of {total} bases")
+    return reads
+
+def _read_record(sequence_path: str, data: Optional[bytes] = None):
+    """Read a single sequence record (supports FASTA and GenBank formats).
+
+    The format is taken from the file extension; pass `data` to parse file
+    contents already in memory instead of reading `sequence_path`.
+    """
+    # Determine file format from extension
+    file_ext = os.path.splitext(sequence_path)[1].lower()
+    if file_ext == '.ab1':
+        return SeqIO.read(io.BytesIO(data) if data is not None else sequence_path, "abi")
+    handle = io.StringIO(data.decode('utf-8')) if data is not None else sequence_path
+    if file_ext in ('.gbk', '.genbank'):
+        return SeqIO.read(handle, "genbank")
+    return SeqIO.read(handle, "fasta")
+
+
+def _first_entity(contents: list) -> tuple:
+    """Return (entity_id, web_url) of the first entity in a container's contents."""
+    if contents and contents[0].get('entity'):
+        entity = contents[0]['entity']
+        return entity.get('id'), entity.get('webURL')
+    return None, None
+
+
+def _payload_row(tube_name: str, fasta_path: str, entity_id: str, sequence_web_url: str,
+                 fasta_data: Optional[bytes] = None) -> dict:
+    return {
+        "tube_name": tube_name,
+        "template_id": entity_id,  # Entity ID for template alignment API
+        "sequence_web_url": sequence_web_url,  # Web URL directly from entity
+        "fasta_path": fasta_path,  # Streamed from disk at submission; the parsed record isn't kept
+        "fasta_data": fasta_data,  # Trimmed read of an .ab1 trace, sent instead of the file
+    }
+
+
+def create_file_payload_df(fasta_dict, reads: Optional[dict] = None):
+    reads = reads or {}
     rows = []
     for tube_name, fasta_path in fasta_dict.items():
-        # Read sequence from file (supports FASTA and GenBank formats)
+        # Check the file parses (supports FASTA and GenBank formats); the record is dropped.
+        # Trimmed traces were parsed already
         try:
-            # Determine file format from extension
-            file_ext = os.path.splitext(fasta_path)[1].lower()
-            if file_ext in ('.gbk', '.genbank'):
-                record = SeqIO.read(fasta_path, "genbank")
-            else:
-                record = SeqIO.read(fasta_path, "fasta")
+            if tube_name not in reads:
+                _read_record(fasta_path)
         except Exception as e:
             log(f"Error reading sequence file {fasta_path}: {e}")
             continue
@@ -132,18 +297,12 @@ def create_file_payload_df(fasta_dict):
             continue
 
         # Get the first entity inside that container
-        entity_id = None
-        sequence_web_url = None
         try:
             response = benchling_client.make_request('GET', f'/containers/{container["id"]}/contents')
-            contents = response.json().get('contents', [])
-            
-            # Get the first entity from contents
-            if contents and contents[0].get('entity'):
-                entity = contents[0]['entity']
-                entity_id = entity.get('id')
-                sequence_web_url = entity.get('webURL')
+            entity_id, sequence_web_url = _first_entity(response.json().get('contents', []))
                     
+        except CircuitOpenError:
+            raise
         except Exception as e:
             log(f"Warning: Error retrieving sequences from container {tube_name}: {e}")
             continue
@@ -153,27 +312,14 @@ def create_file_payload_df(fasta_dict):
             continue
 
         # Collect row for DataFrame
-        rows.append({
-            "tube_name": tube_name,
-            "template_id": entity_id,  # Entity ID for template alignment API
-            "sequence_web_url": sequence_web_url,  # Web URL directly from entity
-            "fasta_sequence": str(record.seq),
-            "fasta_path": fasta_path,
-        })
+        rows.append(_payload_row(tube_name, fasta_path, entity_id, sequence_web_url, reads.get(tube_name)))
     return pd.DataFrame(rows)
 
-def create_template_alignment_api(file_payload):
-    """Create template alignments using the Benchling API."""
-    config = get_config()
-    alignment_results = []
-    
-    for _, row in file_payload.iterrows():
-        # Read the FASTA file as binary and base64-encode it
-        with open(row["fasta_path"], "rb") as fasta_file:
-            raw_bytes = fasta_file.read()
-        encoded_file = base64.b64encode(raw_bytes).decode("ascii")
-        
-        payload = {
+def _alignment_payload(row) -> TemplateAlignmentPayload:
+    """Build the streaming create-template-alignment body for one tube."""
+    # The FASTA file is base64-encoded in chunks while the request body is sent
+    return TemplateAlignmentPayload(
+        {
             "algorithm": "mafft",
             "clustaloOptions": {
                 "maxGuidetreeIterations": -1,
@@ -191,69 +337,496 @@ def create_template_alignment_api(file_payload):
                 "strategy": "auto"
             },
             "templateSequenceId": row["template_id"],
-            "files": [
-                {
-                    "data": encoded_file,
-                    "name": f"{row['tube_name']}.fasta"
-                }
-            ],
             "name": row["tube_name"]
-        }
-        
+        },
+        # Trimmed traces and queue tasks carry the read in memory; FASTA files are streamed from disk
+        files=[(f"{row['tube_name']}.fasta", row.get("fasta_data") or row["fasta_path"])]
+    )
+
+
+def _alignment_success(row, response_data: dict) -> dict:
+    print(f"DEBUG: Response data for {row['tube_name']}: {response_data}")  # Console log
+    
+    # Check for both 'id' and 'taskId' fields
+    alignment_id = response_data.get('id') or response_data.get('taskId')
+    alignment_name = response_data.get('name', row['tube_name'])
+    
+    log(f"Template alignment created for {row['tube_name']}: {response_data}")
+    
+    # Store the result for returning to the caller
+    return {
+        'tube_name': row['tube_name'],
+        'alignment_id': alignment_id,
+        'alignment_name': alignment_name,
+        'sequence_url': row.get('sequence_web_url'),  # Web URL directly from entity
+        'template_id': row['template_id'],
+        'success': True,
+        'response_data': response_data  # Include full response for debugging
+    }
+
+
+def _alignment_failure(row, error: Exception) -> dict:
+    print(f"DEBUG: Error for {row['tube_name']}: {error}")  # Console log
+    log(f"Error creating alignment for {row['tube_name']}: {error}")
+    
+    return {
+        'tube_name': row['tube_name'],
+        'alignment_id': None,
+        'alignment_name': row['tube_name'],
+        'sequence_url': row.get('sequence_web_url'),  # Web URL even on error
+        'success': False,
+        'error': str(error)
+    }
+
+def _log_outage(error: CircuitOpenError) -> None:
+    log(
+        f"\nStopped: {error}. Benchling appears to be down or degraded; "
+        "no further requests were sent for this run. Try again in a few minutes."
+    )
+
+
+def _submit_alignment(row) -> dict:
+    """Create one template alignment; raises on failure."""
+    payload = _alignment_payload(row)
+    payload.check_size(get_config().max_request_bytes)
+    response = benchling_client.make_request(
+        'POST', 
+        '/nucleotide-alignments:create-template-alignment', 
+        data=payload
+    )
+    return _alignment_success(row, response.json())
+
+
+def create_template_alignment_api(file_payload):
+    """Create template alignments using the Benchling API."""
+    alignment_results = []
+    
+    for _, row in file_payload.iterrows():
         try:
-            response = benchling_client.make_request(
-                'POST', 
-                '/nucleotide-alignments:create-template-alignment', 
-                data=payload
-            )
-            response_data = response.json()
-            print(f"DEBUG: Response data for {row['tube_name']}: {response_data}")  # Console log
-            
-            # Check for both 'id' and 'taskId' fields
-            alignment_id = response_data.get('id') or response_data.get('taskId')
-            alignment_name = response_data.get('name', row['tube_name'])
-            
-            log(f"Template alignment created for {row['tube_name']}: {response_data}")
-            
-            # Store the result for returning to the caller
-            alignment_results.append({
-                'tube_name': row['tube_name'],
-                'alignment_id': alignment_id,
-                'alignment_name': alignment_name,
-                'sequence_url': row.get('sequence_web_url'),  # Web URL directly from entity
-                'success': True,
-                'response_data': response_data  # Include full response for debugging
-            })
-            
+            alignment_results.append(publish_result(_submit_alignment(row)))
         except Exception as e:
-            print(f"DEBUG: Error for {row['tube_name']}: {e}")  # Console log
-            log(f"Error creating alignment for {row['tube_name']}: {e}")
-            
-            alignment_results.append({
-                'tube_name': row['tube_name'],
-                'alignment_id': None,
-                'alignment_name': row['tube_name'],
-                'sequence_url': row.get('sequence_web_url'),  # Web URL even on error
-                'success': False,
-                'error': str(e)
-            })
+            alignment_results.append(publish_result(_alignment_failure(row, e)))
     
     return alignment_results
 
 
-def run_alignment(file_path: str) -> tuple[bool, list]:
-    """Run alignment process and return success status and alignment results."""
+def fetch_alignment(response_data: dict, timeout: float = ALIGNMENT_STATS_TIMEOUT) -> dict:
+    """
+    The finished alignment for a create-template-alignment response, waiting
+    for its task to complete when Benchling returned a task rather than the alignment.
+    """
+    task_id = response_data.get('taskId')
+    if not task_id:
+        return benchling_client.make_request('GET', f"/nucleotide-alignments/{response_data['id']}").json()
+
+    deadline = time.monotonic() + timeout
+    delay = 1.0
+    while True:
+        task = benchling_client.make_request('GET', f'/tasks/{task_id}').json()
+        status = task.get('status')
+        if status == 'SUCCEEDED':
+            alignment = task.get('response') or {}
+            if not alignment.get('alignedSequences') and alignment.get('id'):
+                alignment = benchling_client.make_request('GET', f"/nucleotide-alignments/{alignment['id']}").json()
+            return alignment
+        if status == 'FAILED':
+            raise RuntimeError(task.get('message') or 'Alignment task failed')
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f'Alignment task {task_id} still {status} after {timeout:.0f}s')
+        time.sleep(delay)
+        delay = min(delay * 1.5, 10.0)
+
+
+def alignment_stats(result: dict) -> dict:
+    """QC summary of the read in a successful result's alignment (see src/alignment_stats.py)."""
+    def load():
+        alignment = fetch_alignment(result['response_data'])
+        template, reads = split_alignment(alignment, result.get('template_id'))
+        if not reads:
+            raise ValueError('Alignment has no reads')
+        # One read per tube; extra reads (if any) are counted but not summarised
+        stats = summarize_alignment(template, [bases for _, bases in reads[:1]])[0]
+        stats['reads'] = len(reads)
+        return stats
+
+    return alignment_stats_cache.get_or_load(result['alignment_id'], load)
+
+
+def add_alignment_stats(results: list, on_result: Callable[[dict], None] = publish_result) -> list:
+    """
+    Post-processing stage: fetch each successful alignment once and add its
+    `stats` (or a `stats_error`). `on_result` gets each updated result as soon
+    as it is ready; the full updated list is returned.
+    """
+    def annotate(result: dict) -> dict:
+        if not result.get('success') or not result.get('response_data') or 'stats' in result:
+            return result
+        updated = dict(result)
+        try:
+            updated['stats'] = alignment_stats(result)
+        except Exception as e:
+            updated['stats_error'] = str(e)
+        on_result(updated)
+        return updated
+
+    with ThreadPoolExecutor(max_workers=ALIGNMENT_STATS_WORKERS) as executor:
+        # Each in a copy of the caller's context, so the Benchling calls count against its job
+        futures = [executor.submit(contextvars.copy_context().run, annotate, result) for result in results]
+        annotated = [future.result() for future in futures]
+
+    summarised = [r['stats'] for r in annotated if 'stats' in r]
+    if summarised:
+        low = [s for s in summarised if s['identity'] < 99.0]
+        log(f"\nQC: summarised {len(summarised)} alignments; {len(low)} below 99% identity.")
+    failed = sum(1 for r in annotated if 'stats_error' in r)
+    if failed:
+        log(f"QC: {failed} alignments could not be summarised (see the results table).")
+    return annotated
+
+
+def _process_tube(tube_name: str, file_name: str, data: bytes, task: Optional[LeasedTask] = None) -> Optional[dict]:
+    """Resolve and submit one tube from a queue task; None if it can't be aligned."""
+    # Creating an alignment isn't idempotent and the queue may deliver a task twice:
+    # a submission that was started by an earlier attempt is never sent again
+    checkpoint = (task.checkpoint if task else None) or {}
+    if 'result' in checkpoint:
+        log(f"{tube_name}: alignment already submitted by an earlier attempt")
+        return checkpoint['result']
+    if 'submission' in checkpoint:
+        row = _payload_row(tube_name, file_name, None, checkpoint.get('sequence_web_url'))
+        return _alignment_failure(row, RuntimeError(
+            f"an earlier attempt may already have created this alignment (submission {checkpoint['submission']}); "
+            "not resubmitted to avoid a duplicate, check Benchling"
+        ))
+
+    try:
+        _read_record(file_name, data)
+    except Exception as e:
+        log(f"Error reading sequence file {file_name}: {e}")
+        return None
+
+    # CircuitOpenError propagates so the task is retried once Benchling recovers
+    container = find_container(tube_name)
+    if not container:
+        log(f"Warning: No container found for {tube_name}")
+        return None
+    try:
+        response = benchling_client.make_request('GET', f'/containers/{container["id"]}/contents')
+        entity_id, sequence_web_url = _first_entity(response.json().get('contents', []))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        log(f"Warning: Error retrieving sequences from container {tube_name}: {e}")
+        return None
+    if not entity_id:
+        log(f"Warning: No entity found in container {tube_name}")
+        return None
+
+    row = _payload_row(tube_name, file_name, entity_id, sequence_web_url, data)
+    if task:
+        task.save_checkpoint({'submission': uuid.uuid4().hex, 'sequence_web_url': sequence_web_url})
+    try:
+        result = _submit_alignment(row)
+    except CircuitOpenError:
+        # Refused before sending, so a retry may submit it
+        if task:
+            task.save_checkpoint({})
+        raise
+    except Exception as e:
+        result = _alignment_failure(row, e)
+    if task:
+        task.save_checkpoint(dict(task.checkpoint, result=result))
+    return result
+
+
+def process_tube_task(payload: dict, task: Optional[LeasedTask] = None) -> dict:
+    """Work queue handler: the tube's alignment result (or None) and its log messages."""
+    messages = []
+    token = _task_log.set(messages)
+    try:
+        # Benchling calls are scheduled as part of the job that queued the tube
+        with job_context(**(payload.get('job') or {})):
+            result = _process_tube(payload['tube_name'], payload['file_name'], base64.b64decode(payload['data']), task)
+    finally:
+        _task_log.reset(token)
+    return {'result': result, 'messages': messages}
+
+
+_queue_worker: Optional[QueueWorker] = None
+
+
+def start_queue_workers() -> Optional[QueueWorker]:
+    """Start this process's queue worker threads (once) when the work queue is enabled."""
+    global _queue_worker
+    if USE_WORK_QUEUE and _queue_worker is None and WORK_QUEUE_THREADS > 0:
+        _queue_worker = QueueWorker(
+            get_work_queue(), process_tube_task, threads=WORK_QUEUE_THREADS, lease_seconds=WORK_QUEUE_LEASE
+        )
+        _queue_worker.start()
+    return _queue_worker
+
+
+def _tube_tasks(fasta_dict: dict, job: Optional[dict] = None, reads: Optional[dict] = None):
+    """(tube name, payload) per tube, reading one file at a time; trimmed traces go as FASTA."""
+    reads = reads or {}
+    for tube_name, fasta_path in fasta_dict.items():
+        if tube_name in reads:
+            data, file_name = reads[tube_name], f'{tube_name}.fasta'
+        else:
+            with open(fasta_path, 'rb') as fh:
+                data = fh.read()
+            file_name = os.path.basename(fasta_path)
+        yield tube_name, {
+            'tube_name': tube_name,
+            'file_name': file_name,
+            'data': base64.b64encode(data).decode('ascii'),
+            'job': job,
+        }
+
+
+def _classify_job(tube_count: int) -> Optional[str]:
+    """Schedule the current job as bulk or interactive by its number of tubes."""
+    job = current_job()
+    if job is None:
+        return None
+    if job.classify(tube_count) == BULK:
+        log(f"Scheduling {tube_count} tubes as a bulk job; smaller runs go first meanwhile.")
+    return job.priority
+
+
+async def find_container_async(client: AsyncBenchlingClient, identifier: str):
+    """Async counterpart of `find_container`."""
+    cached = container_cache.get(identifier)
+    if cached:
+        return cached
+
+    for label, params in _container_search_strategies(identifier):
+        try:
+            response = await client.make_request('GET', '/containers', params=params)
+            container = _match_container(identifier, label, response.json().get('containers', []))
+            if container:
+                container_cache.set(identifier, container)
+                return container
+        except CircuitOpenError:
+            raise
+        except Exception:
+            continue
+    return None
+
+
+async def _resolve_tube_async(client: AsyncBenchlingClient, job: JobMemory, tube_name: str, fasta_path: str,
+                              fasta_data: Optional[bytes] = None):
+    """Read one tube's file and look up its template entity; returns a payload row or None."""
+    try:
+        # Parse within the job's memory budget; only the path is kept afterwards
+        # (trimmed traces were parsed already and keep just the trimmed read)
+        if fasta_data is None:
+            async with job.budget.reserve_async(read_cost(fasta_path)):
+                await asyncio.to_thread(_read_record, fasta_path)
+    except Exception as e:
+        log(f"Error reading sequence file {fasta_path}: {e}")
+        return None
+
+    container = await find_container_async(client, tube_name)
+    if not container:
+        log(f"Warning: No container found for {tube_name}")
+        return None
+
+    try:
+        response = await client.make_request('GET', f'/containers/{container["id"]}/contents')
+        entity_id, sequence_web_url = _first_entity(response.json().get('contents', []))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        log(f"Warning: Error retrieving sequences from container {tube_name}: {e}")
+        return None
+
+    if not entity_id:
+        log(f"Warning: No entity found in container {tube_name}")
+        return None
+    return _payload_row(tube_name, fasta_path, entity_id, sequence_web_url, fasta_data)
+
+
+async def _submit_alignment_async(client: AsyncBenchlingClient, job: JobMemory, row: dict) -> dict:
+    config = get_config()
+    payload = _alignment_payload(row)
+    try:
+        payload.check_size(config.max_request_bytes)
+        async with job.budget.reserve_async(payload.buffered_bytes()):
+            response = await client.make_request(
+                'POST',
+                '/nucleotide-alignments:create-template-alignment',
+                data=payload
+            )
+        return publish_result(_alignment_success(row, response.json()))
+    except Exception as e:
+        return publish_result(_alignment_failure(row, e))
+
+
+async def _gather_all(coros) -> list:
+    """`asyncio.gather`, but if one fails the rest are cancelled and awaited before it is raised."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave siblings running against a client that is about to be closed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_alignment_async(file_path: str) -> tuple[bool, list]:
+    """
+    Same as `run_alignment`, but container lookups and alignment submissions for
+    all tubes run concurrently on one event loop. Requests in flight are bounded by the
+    scheduler's per-process BENCHLING_MAX_IN_FLIGHT (and BENCHLING_MAX_CONCURRENCY, if lower).
+    """
     log("\nworking...")
-    fasta_dict = get_fasta_filenames(file_path)
-    file_df = create_file_payload_df(fasta_dict)
-    if file_df.empty:
+    with JobMemory(os.path.basename(os.path.normpath(file_path))) as job:
+        with job.stage('scan'):
+            fasta_fallbacks = {}
+            fasta_dict = get_fasta_filenames(file_path, fasta_fallbacks)
+        _classify_job(len(fasta_dict))
+        with job.stage('trim'):
+            reads = await asyncio.to_thread(trim_reads, fasta_dict, fasta_fallbacks)
+        # Share token state with the sync client so runs don't refetch it
+        async with AsyncBenchlingClient(auth=benchling_client.auth) as client:
+            try:
+                with job.stage('resolve'):
+                    resolved = await _gather_all((
+                        _resolve_tube_async(client, job, tube_name, fasta_path, reads.get(tube_name))
+                        for tube_name, fasta_path in fasta_dict.items()
+                    ))
+            except CircuitOpenError as e:
+                _log_outage(e)
+                return False, []
+            rows = [row for row in resolved if row]
+            if not rows:
+                log(
+                    "\nNo containers with matching names or barcodes were found. "
+                    "Verify that your FASTA filenames match the Benchling container identifiers."
+                )
+                return False, []
+
+            with job.stage('submit'):
+                alignment_results = list(await _gather_all((
+                    _submit_alignment_async(client, job, row) for row in rows
+                )))
+        log(job.summary())
+
+    successful_alignments = [r for r in alignment_results if r['success']]
+    log(f"\nSuccessfully created template alignments for {len(successful_alignments)} tubes. Results uploaded to Benchling.")
+    return len(successful_alignments) > 0, alignment_results
+
+
+def run_alignment_distributed(file_path: str) -> tuple[bool, list]:
+    """
+    Same as `run_alignment`, but each tube becomes a task on the work queue and
+    any process running queue workers may pick it up. This call waits for the
+    job, relaying task messages, progress and results as tasks finish.
+    """
+    queue = get_work_queue()
+    start_queue_workers()
+    log("\nworking...")
+    scheduled = current_job()
+    job_id = scheduled.job_id if scheduled else uuid.uuid4().hex
+    with JobMemory(os.path.basename(os.path.normpath(file_path))) as job:
+        with job.stage('enqueue'):
+            fasta_fallbacks = {}
+            fasta_dict = get_fasta_filenames(file_path, fasta_fallbacks)
+            priority = BULK_PRIORITY if _classify_job(len(fasta_dict)) == BULK else INTERACTIVE_PRIORITY
+            reads = trim_reads(fasta_dict, fasta_fallbacks)
+            tasks = _tube_tasks(fasta_dict, scheduled.as_dict() if scheduled else None, reads)
+            total = 0
+            # In batches, so workers can start while the rest is queued and only
+            # one batch of file contents is held at a time
+            while True:
+                added = queue.enqueue(
+                    job_id, itertools.islice(tasks, ENQUEUE_BATCH), WORK_QUEUE_MAX_ATTEMPTS, priority
+                )
+                if not added:
+                    break
+                total += added
+        queue.purge(WORK_QUEUE_RETENTION)
+        log(f"Queued {total} tubes as job {job_id[:8]}")
+
+        seen = set()
+        alignment_results = []
+        deadline = time.monotonic() + WORK_QUEUE_JOB_TIMEOUT
+        with job.stage('wait'):
+            while len(seen) < total:
+                newly_finished = 0
+                for task in queue.job_tasks(job_id):
+                    if task['state'] not in FINISHED_STATES or task['id'] in seen:
+                        continue
+                    newly_finished += 1
+                    seen.add(task['id'])
+                    outcome = task['result'] or {}
+                    for message in outcome.get('messages', []):
+                        log(message)
+                    if task['state'] == FAILED:
+                        # Out of attempts (e.g. Benchling down throughout, or the worker kept dying)
+                        row = {'tube_name': task['name']}
+                        result = _alignment_failure(row, RuntimeError(task['error'] or 'task failed'))
+                    else:
+                        result = outcome.get('result')
+                    if result:
+                        alignment_results.append(publish_result(result))
+                if newly_finished:
+                    log(f"Progress: {len(seen)}/{total} tubes processed")
+                if len(seen) < total:
+                    if time.monotonic() > deadline:
+                        log(f"\nStopped waiting for job {job_id[:8]} after {WORK_QUEUE_JOB_TIMEOUT:.0f}s; "
+                            f"{total - len(seen)} tubes are still queued or in progress.")
+                        break
+                    time.sleep(0.5)
+        log(job.summary())
+
+    if not alignment_results:
         log(
             "\nNo containers with matching names or barcodes were found. "
             "Verify that your FASTA filenames match the Benchling container identifiers."
         )
         return False, []
-    
-    alignment_results = create_template_alignment_api(file_df)
+    successful_alignments = [r for r in alignment_results if r['success']]
+    log(f"\nSuccessfully created template alignments for {len(successful_alignments)} tubes. Results uploaded to Benchling.")
+    return len(successful_alignments) > 0, alignment_results
+
+
+def run_alignment(file_path: str) -> tuple[bool, list]:
+    """Run alignment process and return success status and alignment results."""
+    if USE_WORK_QUEUE:
+        return run_alignment_distributed(file_path)
+    if USE_ASYNC:
+        return asyncio.run(run_alignment_async(file_path))
+
+    log("\nworking...")
+    # Tubes are handled one at a time here, so the budget never has to throttle;
+    # the job is still accounted for in the run log and /api/metrics
+    with JobMemory(os.path.basename(os.path.normpath(file_path))) as job:
+        with job.stage('scan'):
+            fasta_fallbacks = {}
+            fasta_dict = get_fasta_filenames(file_path, fasta_fallbacks)
+        _classify_job(len(fasta_dict))
+        with job.stage('trim'):
+            reads = trim_reads(fasta_dict, fasta_fallbacks)
+        try:
+            with job.stage('resolve'):
+                file_df = create_file_payload_df(fasta_dict, reads)
+        except CircuitOpenError as e:
+            _log_outage(e)
+            return False, []
+        if file_df.empty:
+            log(
+                "\nNo containers with matching names or barcodes were found. "
+                "Verify that your FASTA filenames match the Benchling container identifiers."
+            )
+            return False, []
+
+        with job.stage('submit'):
+            alignment_results = create_template_alignment_api(file_df)
+        log(job.summary())
     successful_alignments = [r for r in alignment_results if r['success']]
     
     log(f"\nSuccessfully created template alignments for {len(successful_alignments)} tubes. Results uploaded to Benchling.")
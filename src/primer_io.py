@@ -0,0 +1,166 @@
+"""
+Primer sheet parsing and Eurofins order workbook generation.
+
+Primer sheets are sniffed once (XLSX is a zip container, everything else is
+treated as CSV) and only the ``Name``/``Sequence`` columns are extracted, using
+``csv`` streaming or openpyxl's read-only mode instead of a full pandas parse.
+
+The Eurofins template is parsed once per process and kept in a small pool of
+in-memory workbooks. Each export checks one out, fills in the order rows, saves
+it and restores the touched cells before returning it to the pool, so
+concurrent exports never share a workbook and never reparse the template.
+"""
+import csv
+import io
+import os
+import queue
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+PRIMER_COLUMNS = ('Name', 'Sequence')
+
+_XLSX_MAGIC = b'PK\x03\x04'
+_OLE_MAGIC = b'\xd0\xcf\x11\xe0'  # legacy .xls
+
+
+class PrimerFileError(ValueError):
+    """Raised when a primer sheet can't be parsed."""
+
+
+def _column_indexes(header: Tuple) -> Dict[str, int]:
+    positions = {str(h).strip(): i for i, h in enumerate(header) if h is not None}
+    for col in PRIMER_COLUMNS:
+        if col not in positions:
+            raise PrimerFileError(f"Missing required column: {col}")
+    return {col: positions[col] for col in PRIMER_COLUMNS}
+
+
+def _rows_from_records(records) -> List[Dict[str, str]]:
+    """Turn an iterator of row tuples (header first) into Name/Sequence dicts."""
+    try:
+        header = next(records)
+    except StopIteration:
+        raise PrimerFileError('File is empty')
+    indexes = _column_indexes(header)
+
+    rows = []
+    for record in records:
+        if not any(v not in (None, '') for v in record):
+            continue  # skip blank lines
+        row = {}
+        for col, i in indexes.items():
+            value = record[i] if i < len(record) else None
+            row[col] = '' if value is None else str(value)
+        rows.append(row)
+    return rows
+
+
+def _read_csv(stream: BinaryIO) -> List[Dict[str, str]]:
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        return _rows_from_records(iter(csv.reader(text)))
+    finally:
+        text.detach()
+
+
+def _read_xlsx(stream: BinaryIO) -> List[Dict[str, str]]:
+    if openpyxl is None:
+        raise PrimerFileError('openpyxl not installed in container')
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        return _rows_from_records(wb.worksheets[0].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def read_primer_rows(stream: BinaryIO) -> List[Dict[str, str]]:
+    """
+    Parse a CSV or XLSX primer sheet into ``[{'Name': ..., 'Sequence': ...}]``.
+
+    Raises:
+        PrimerFileError: if the format is unsupported, unreadable, or a column is missing.
+    """
+    head = stream.read(len(_XLSX_MAGIC))
+    stream.seek(0)
+    try:
+        if head.startswith(_XLSX_MAGIC):
+            return _read_xlsx(stream)
+        if head.startswith(_OLE_MAGIC):
+            raise PrimerFileError('Legacy .xls files are not supported; save the sheet as .xlsx or .csv')
+        return _read_csv(stream)
+    except PrimerFileError:
+        raise
+    except Exception as e:
+        raise PrimerFileError(f'Unable to parse file: {e}')
+
+
+class EurofinsTemplate:
+    """Pool of pre-parsed copies of the Eurofins upload template."""
+
+    def __init__(self, template_path: str, sheet_name: str = 'Form', first_row: int = 9):
+        self.template_path = template_path
+        self.sheet_name = sheet_name
+        self.first_row = first_row
+        self._template_bytes: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self._pool: 'queue.LifoQueue' = queue.LifoQueue()
+
+    def _load(self):
+        """Parse a fresh workbook from the cached template bytes."""
+        with self._lock:
+            if self._template_bytes is None:
+                if not os.path.exists(self.template_path):
+                    raise FileNotFoundError(f'Template not found at {self.template_path}')
+                with open(self.template_path, 'rb') as fh:
+                    self._template_bytes = fh.read()
+        return openpyxl.load_workbook(io.BytesIO(self._template_bytes))
+
+    def warm(self) -> None:
+        """Parse one workbook ahead of the first export."""
+        if self._pool.empty():
+            self._pool.put(self._load())
+
+    def render(self, rows: List[Dict]) -> io.BytesIO:
+        """Fill the order rows (col 2 Name, col 3 Sequence, col 4 Personal Note) and save to memory."""
+        if openpyxl is None:
+            raise RuntimeError('openpyxl not installed in container')
+        try:
+            wb = self._pool.get_nowait()
+        except queue.Empty:
+            wb = self._load()
+
+        # A workbook that fails midway is dropped rather than returned to the pool
+        ws = wb[self.sheet_name]
+        originals = {}
+        added = []
+        r = self.first_row
+        for row in rows:
+            values = (
+                str(row.get('Oligo Name', ''))[:25],
+                str(row.get('Sequence', '')),
+                str(row.get('Personal Note', '')),
+            )
+            for column, value in enumerate(values, start=2):
+                if (r, column) in ws._cells:
+                    originals[(r, column)] = ws._cells[(r, column)].value
+                else:
+                    added.append((r, column))
+                ws.cell(row=r, column=column).value = value
+            r += 1
+        bio = io.BytesIO()
+        wb.save(bio)
+        bio.seek(0)
+
+        # Put the sheet back exactly as parsed: cells this export created are removed, not
+        # blanked, so max_row/max_column (and the next export's used range) don't grow
+        for (r, column), value in originals.items():
+            ws._cells[(r, column)].value = value
+        for key in added:
+            del ws._cells[key]
+        self._pool.put(wb)
+        return bio
@@ -0,0 +1,128 @@
+"""
+Quality trimming of Sanger reads from ABI (.ab1) chromatograms.
+
+Base calls at both ends of a Sanger read are unreliable, so trimming them
+before submission keeps MAFFT from aligning noise and makes payloads smaller.
+Two methods are available (`TRIM_METHOD`):
+
+- ``mott``: scoring after Richard Mott: each base scores
+  ``cutoff - P(error)`` (``P(error) = 10 ** (-Q / 10)``), and the read is cut
+  to its maximum-scoring contiguous segment. Spans differ from Biopython's
+  ``_abi_trim``, which starts at the first base whose running sum turns
+  positive (keeping low-quality bases before a later restart) and stops
+  one base short of the best position.
+- ``window``: keep the span from the first to the last window of `window`
+  bases whose mean quality reaches `min_quality`.
+
+A plate is trimmed in one go: the Phred arrays are padded into one matrix
+and each method is a handful of NumPy operations along its rows.
+"""
+import io
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from Bio import SeqIO
+
+TRIM_METHOD = os.getenv('TRIM_METHOD', 'mott').lower()
+TRIM_CUTOFF = float(os.getenv('TRIM_CUTOFF', '0.05'))
+TRIM_WINDOW = int(os.getenv('TRIM_WINDOW', '10'))
+TRIM_MIN_QUALITY = float(os.getenv('TRIM_MIN_QUALITY', '20'))
+# Reads shorter than this after trimming are not worth aligning
+TRIM_MIN_LENGTH = int(os.getenv('TRIM_MIN_LENGTH', '50'))
+
+TRIM_METHODS = ('mott', 'window', 'none')
+
+
+def _quality_matrix(qualities: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(reads x longest read matrix, padded with -1; read lengths)."""
+    lengths = np.array([len(q) for q in qualities], dtype=np.int64)
+    matrix = np.full((len(qualities), int(lengths.max(initial=0))), -1.0)
+    for i, q in enumerate(qualities):
+        matrix[i, :len(q)] = q
+    return matrix, lengths
+
+
+def mott_trim(qualities: List[np.ndarray], cutoff: float = TRIM_CUTOFF) -> np.ndarray:
+    """[start, end) of each read's maximum-scoring segment (empty when no base beats `cutoff`)."""
+    matrix, _lengths = _quality_matrix(qualities)
+    if not matrix.size:
+        return np.zeros((len(qualities), 2), dtype=np.int64)
+    # Padding scores -1 so it never joins a segment
+    scores = np.where(matrix >= 0, cutoff - np.power(10.0, -matrix / 10.0), -1.0)
+    # Best segment ending at j: prefix[j + 1] minus the lowest prefix sum up to j
+    prefix = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(scores, axis=1, out=prefix[:, 1:])
+    lowest = np.minimum.accumulate(prefix, axis=1)
+    gain = prefix - lowest
+    end = gain.argmax(axis=1)
+    best = gain[np.arange(len(end)), end]
+    # The segment starts just after the (last) lowest prefix sum before its end
+    columns = np.arange(prefix.shape[1])
+    at_lowest = (prefix == lowest[np.arange(len(end)), end][:, None]) & (columns <= end[:, None])
+    start = prefix.shape[1] - 1 - at_lowest[:, ::-1].argmax(axis=1)
+    start = np.where(best > 0, start, 0)
+    end = np.where(best > 0, end, 0)
+    return np.stack([start, end], axis=1)
+
+
+def window_trim(qualities: List[np.ndarray], window: int = TRIM_WINDOW,
+                min_quality: float = TRIM_MIN_QUALITY) -> np.ndarray:
+    """[start, end) from the first to the last `window`-base window averaging `min_quality` or more."""
+    matrix, lengths = _quality_matrix(qualities)
+    window = max(1, window)
+    if matrix.shape[1] < window:
+        return np.zeros((len(qualities), 2), dtype=np.int64)
+    prefix = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(np.clip(matrix, 0, None), axis=1, out=prefix[:, 1:])
+    means = (prefix[:, window:] - prefix[:, :-window]) / window
+    # Windows running into the padding don't count
+    starts = np.arange(means.shape[1])
+    good = (means >= min_quality) & (starts + window <= lengths[:, None])
+    any_good = good.any(axis=1)
+    start = good.argmax(axis=1)
+    end = means.shape[1] - 1 - good[:, ::-1].argmax(axis=1) + window
+    return np.stack([np.where(any_good, start, 0), np.where(any_good, end, 0)], axis=1)
+
+
+def trim_spans(qualities: List[np.ndarray], method: str = TRIM_METHOD) -> np.ndarray:
+    if method == 'mott':
+        return mott_trim(qualities)
+    if method == 'window':
+        return window_trim(qualities)
+    if method == 'none':
+        return np.array([[0, len(q)] for q in qualities], dtype=np.int64).reshape(-1, 2)
+    raise ValueError(f"Unknown TRIM_METHOD {method!r}; use one of {', '.join(TRIM_METHODS)}")
+
+
+def read_trace(path: str, data: Optional[bytes] = None) -> Tuple[str, np.ndarray]:
+    """(base calls, Phred qualities) of an .ab1 file; the chromatogram itself is dropped."""
+    handle = io.BytesIO(data) if data is not None else path
+    record = SeqIO.read(handle, 'abi')
+    qualities = record.letter_annotations.get('phred_quality')
+    if not qualities:
+        raise ValueError('trace has no quality values')
+    return str(record.seq), np.asarray(qualities, dtype=np.float64)
+
+
+def trim_traces(traces: Dict[str, Tuple[str, np.ndarray]], method: str = TRIM_METHOD,
+                min_length: int = TRIM_MIN_LENGTH) -> Dict[str, Dict]:
+    """
+    Trim a plate of {tube: (bases, qualities)}. Per tube: `fasta` (bytes of the
+    trimmed read, or None when fewer than `min_length` bases are left), `start`,
+    `end` (0-based, half-open), `length` before and `kept` after trimming.
+    """
+    names = list(traces)
+    spans = trim_spans([traces[name][1] for name in names], method)
+    trimmed = {}
+    for name, (start, end) in zip(names, spans.tolist()):
+        bases = traces[name][0]
+        read = bases[start:end]
+        trimmed[name] = {
+            'fasta': f'>{name}\n{read}\n'.encode('ascii') if len(read) >= min_length else None,
+            'start': start,
+            'end': end,
+            'length': len(bases),
+            'kept': len(read),
+        }
+    return trimmed
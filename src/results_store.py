@@ -0,0 +1,95 @@
+"""
+Versioned, per-tube alignment results for cheap polling.
+
+Every change to a tube's result bumps a process-wide version counter and stamps
+the tube with it. Pollers send the last version they saw and get back only the
+tubes changed since then (or a full snapshot if a new run has started since),
+and the version doubles as the ETag so unchanged polls can be answered with a
+304. The heavy `response_data` debugging payload is kept out of the summaries
+and served per tube on request.
+"""
+import threading
+from typing import Dict, List, Optional
+
+# Fields kept out of the polled summaries (served by the per-tube detail endpoint)
+DETAIL_ONLY_FIELDS = ('response_data',)
+
+
+class ResultsStore:
+    """Thread-safe store of the current run's results, keyed by tube name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._reset_version = 0
+        self._results: Dict[str, dict] = {}
+        self._versions: Dict[str, int] = {}
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    @property
+    def etag(self) -> str:
+        return f'v{self.version}'
+
+    def reset(self) -> int:
+        """
+        Forget all results (a new run is starting); pollers get a full snapshot next.
+        Returns the new run's number, for `upsert(..., run=)` from background work.
+        """
+        with self._lock:
+            self._version += 1
+            self._reset_version = self._version
+            self._results.clear()
+            self._versions.clear()
+            return self._reset_version
+
+    def upsert(self, result: dict, run: Optional[int] = None) -> None:
+        """
+        Add or update one tube's result; identical results don't bump the version.
+        With `run`, the update is dropped if another run has started since.
+        """
+        tube_name = result['tube_name']
+        with self._lock:
+            if run is not None and run != self._reset_version:
+                return
+            if self._results.get(tube_name) == result:
+                return
+            self._version += 1
+            self._results[tube_name] = dict(result)
+            self._versions[tube_name] = self._version
+
+    def update(self, results: List[dict], run: Optional[int] = None) -> None:
+        for result in results:
+            self.upsert(result, run)
+
+    @staticmethod
+    def _summary(result: dict) -> dict:
+        return {k: v for k, v in result.items() if k not in DETAIL_ONLY_FIELDS}
+
+    def snapshot(self, since: Optional[int] = None) -> dict:
+        """
+        Results changed after version `since`, or all results when `since` is
+        missing or predates the current run (`full` tells the client to replace
+        rather than merge).
+        """
+        with self._lock:
+            full = since is None or since < self._reset_version or since > self._version
+            results = [
+                self._summary(result)
+                for tube_name, result in self._results.items()
+                if full or self._versions[tube_name] > since
+            ]
+            return {'version': self._version, 'full': full, 'results': results}
+
+    def detail(self, tube_name: str) -> Optional[dict]:
+        """Full result for one tube, including `response_data`."""
+        with self._lock:
+            result = self._results.get(tube_name)
+            return dict(result) if result is not None else None
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            return [dict(r) for r in self._results.values()]
@@ -0,0 +1,315 @@
+"""
+Content-addressed storage for uploaded deliveries, with garbage collection.
+
+Every uploaded (or unzipped) file is stored once under its SHA-256 in
+``.objects/`` and the upload directory handed to ``/api/run`` holds hard links
+to those objects. Identical files therefore take their space only once, and a
+chunked upload that announces a file the store already has skips sending it.
+
+The number of hard links is the reference count of an object: an object whose
+link count is 1 is not part of any upload and may be evicted. Upload
+directories are reference counted with shared ``flock`` locks on a per-upload
+lock file in ``.handles/``: a run holds one for as long as it reads the files,
+and the collector only removes an upload it can lock exclusively. Both kinds of
+count live in the filesystem, so they are shared by every gunicorn worker and
+are released automatically when a process dies.
+
+The collector runs in the background of each worker (one at a time per host):
+it removes uploads and chunked sessions idle for longer than ``UPLOAD_TTL``,
+unreferenced objects idle for longer than ``UPLOAD_OBJECT_TTL``, and then, while
+the store is above ``UPLOAD_QUOTA_MB``, the least recently used unreferenced
+objects and idle uploads.
+"""
+import fcntl
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+OBJECTS_DIR_NAME = '.objects'
+HANDLES_DIR_NAME = '.handles'
+GC_LOCK_NAME = '.gc.lock'
+COPY_BUFFER_SIZE = 1024 * 1024
+
+UPLOAD_TTL = int(os.getenv('UPLOAD_TTL', '86400'))
+UPLOAD_OBJECT_TTL = int(os.getenv('UPLOAD_OBJECT_TTL', str(7 * 86400)))
+UPLOAD_QUOTA = int(float(os.getenv('UPLOAD_QUOTA_MB', '10240')) * 1024 * 1024)
+UPLOAD_GC_INTERVAL = int(os.getenv('UPLOAD_GC_INTERVAL', '600'))
+
+
+class UploadNotFoundError(FileNotFoundError):
+    """The upload directory no longer exists (collected or already run)."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for buf in iter(lambda: fh.read(COPY_BUFFER_SIZE), b''):
+            digest.update(buf)
+    return digest.hexdigest()
+
+
+def _is_digest(value: str) -> bool:
+    return isinstance(value, str) and len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+
+class UploadStore:
+    """Deduplicating object store plus reference-counted upload directories under `root`."""
+
+    def __init__(self, root: str, ttl: int = UPLOAD_TTL, object_ttl: int = UPLOAD_OBJECT_TTL,
+                 quota_bytes: int = UPLOAD_QUOTA):
+        self.root = os.path.abspath(root)
+        self.objects_dir = os.path.join(self.root, OBJECTS_DIR_NAME)
+        self.handles_dir = os.path.join(self.root, HANDLES_DIR_NAME)
+        self.ttl = ttl
+        self.object_ttl = object_ttl
+        self.quota_bytes = quota_bytes
+        self.last_gc: Optional[Dict] = None
+        self._gc_thread: Optional[threading.Thread] = None
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.handles_dir, exist_ok=True)
+
+    # Objects
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has_object(self, digest: str, size: Optional[int] = None) -> bool:
+        if not _is_digest(digest):
+            return False
+        try:
+            st = os.stat(self.object_path(digest))
+        except OSError:
+            return False
+        return size is None or st.st_size == size
+
+    def link_object(self, digest: str, dest: str) -> bool:
+        """Hard-link object `digest` to `dest` (replacing it); False if the store doesn't have it."""
+        if not _is_digest(digest):
+            return False
+        tmp = f'{dest}.{os.getpid()}.link'
+        try:
+            os.link(self.object_path(digest), tmp)
+        except FileNotFoundError:
+            return False
+        os.replace(tmp, dest)
+        # Reuse counts as access for the collector's LRU order
+        os.utime(dest)
+        return True
+
+    def _adopt_file(self, path: str, digest: Optional[str] = None) -> str:
+        """Make `path` a link to its object, storing it first if it's new."""
+        digest = digest if _is_digest(digest) else file_sha256(path)
+        if self.link_object(digest, path):
+            return digest
+        object_path = self.object_path(digest)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        try:
+            os.link(path, object_path)
+        except FileExistsError:
+            # Stored concurrently by another upload
+            self.link_object(digest, path)
+        return digest
+
+    # Uploads
+
+    def new_upload(self) -> str:
+        """Create an empty upload directory; call `adopt` once its files are in place."""
+        upload_dir = tempfile.mkdtemp(dir=self.root)
+        open(self._lock_path(upload_dir), 'a').close()
+        return upload_dir
+
+    def adopt(self, upload_dir: str, digests: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Move the files of `upload_dir` into the store, replacing duplicates with
+        links to the copy already stored. Files that are already links (more than
+        one link) are left alone, so this can run again after unzipping. `digests`
+        maps paths to verified SHA-256s so they aren't hashed again.
+        Returns {path: digest} for the files it stored.
+        """
+        digests = digests or {}
+        adopted = {}
+        for dirpath, _dirnames, filenames in os.walk(upload_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                st = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode) or st.st_nlink > 1:
+                    continue
+                adopted[path] = self._adopt_file(path, digests.get(path))
+        return adopted
+
+    def owns(self, upload_dir: str) -> bool:
+        path = os.path.abspath(upload_dir)
+        return os.path.dirname(path) == self.root and os.path.exists(self._lock_path(path))
+
+    def _lock_path(self, upload_dir: str) -> str:
+        return os.path.join(self.handles_dir, os.path.basename(os.path.abspath(upload_dir)) + '.lock')
+
+    @contextmanager
+    def hold(self, upload_dir: str) -> Iterator[None]:
+        """
+        Keep the collector off `upload_dir` for the duration of the block (no-op
+        for directories the store didn't create). Raises FileNotFoundError if the
+        upload was collected while waiting for the lock (UploadNotFoundError).
+        """
+        if not self.owns(upload_dir):
+            yield
+            return
+        with open(self._lock_path(upload_dir), 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH)
+            try:
+                if not os.path.isdir(upload_dir):
+                    raise UploadNotFoundError(upload_dir)
+                os.utime(fh.name)
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def discard(self, upload_dir: str) -> bool:
+        """Remove an upload unless another holder still has it; its objects stay for dedupe."""
+        return self._remove_upload(os.path.join(self.root, os.path.basename(os.path.abspath(upload_dir))))
+
+    def _remove_upload(self, upload_dir: str) -> bool:
+        lock_path = self._lock_path(upload_dir)
+        try:
+            fh = open(lock_path, 'a')
+        except OSError:
+            return False
+        with fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+        return True
+
+    # Garbage collection
+
+    def _uploads(self) -> List[Tuple[float, str]]:
+        """Upload directories as (last used, path), least recently used first."""
+        uploads = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                last_used = os.stat(self._lock_path(entry.path)).st_mtime
+            except OSError:
+                last_used = entry.stat().st_mtime  # made outside the store
+            uploads.append((last_used, entry.path))
+        return sorted(uploads)
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        """(unreferenced objects as (mtime, size, path), oldest first; bytes used under root)."""
+        seen = set()
+        used = 0
+        unreferenced = []
+        for dirpath, _dirnames, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                seen.add(st.st_ino)
+                used += st.st_size
+                if st.st_nlink == 1:
+                    unreferenced.append((st.st_mtime, st.st_size, path))
+
+        # Files not (yet) in the store: chunked sessions, uploads being written
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            if dirpath.startswith(self.objects_dir):
+                continue
+            for name in filenames:
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                if st.st_ino not in seen:
+                    seen.add(st.st_ino)
+                    used += st.st_size
+        return sorted(unreferenced), used
+
+    def _expire_sessions(self, sessions_dir: str, cutoff: float) -> int:
+        removed = 0
+        if not os.path.isdir(sessions_dir):
+            return removed
+        for entry in os.scandir(sessions_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def collect(self, sessions_dir: Optional[str] = None) -> Dict:
+        """One collection pass; returns what it removed (skipped while another process collects)."""
+        with open(os.path.join(self.root, GC_LOCK_NAME), 'a') as gc_lock:
+            try:
+                fcntl.flock(gc_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return {'skipped': True}
+            started = time.monotonic()
+            now = time.time()
+            report = {'uploads_removed': 0, 'objects_removed': 0, 'sessions_removed': 0, 'bytes_freed': 0}
+            if sessions_dir:
+                report['sessions_removed'] = self._expire_sessions(sessions_dir, now - self.ttl)
+
+            for last_used, path in self._uploads():
+                if last_used < now - self.ttl and self._remove_upload(path):
+                    report['uploads_removed'] += 1
+
+            unreferenced, used = self._scan()
+            uploads = self._uploads()
+            while True:
+                # Expired objects first, then least recently used ones while over quota
+                while unreferenced and (unreferenced[0][0] < now - self.object_ttl
+                                        or (self.quota_bytes and used > self.quota_bytes)):
+                    _mtime, size, path = unreferenced.pop(0)
+                    try:
+                        if os.stat(path).st_nlink == 1:
+                            os.remove(path)
+                            used -= size
+                            report['objects_removed'] += 1
+                            report['bytes_freed'] += size
+                    except OSError:
+                        pass
+                if not self.quota_bytes or used <= self.quota_bytes or not uploads:
+                    break
+                # Still over quota: give up the oldest idle upload and retry with its objects
+                _last_used, path = uploads.pop(0)
+                if self._remove_upload(path):
+                    report['uploads_removed'] += 1
+                    unreferenced, used = self._scan()
+
+            report['bytes_used'] = used
+            report['quota_bytes'] = self.quota_bytes
+            report['seconds'] = round(time.monotonic() - started, 3)
+            report['finished_at'] = now
+            self.last_gc = report
+            return report
+
+    def start_collector(self, interval: int = UPLOAD_GC_INTERVAL, sessions_dir: Optional[str] = None) -> None:
+        """Run `collect` every `interval` seconds in a daemon thread (once per process)."""
+        if interval <= 0 or (self._gc_thread and self._gc_thread.is_alive()):
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.collect(sessions_dir)
+                except Exception as e:
+                    print(f'Upload garbage collection failed: {e}')
+                time.sleep(interval)
+
+        self._gc_thread = threading.Thread(target=loop, name='upload-gc', daemon=True)
+        self._gc_thread.start()
@@ -0,0 +1,613 @@
+"""
+Durable task queue for splitting alignment runs across processes and hosts.
+
+A job is a batch of tasks (one per tube). Workers claim a task under a lease,
+extend the lease with heartbeats while they work on it and then complete or
+fail it. A task whose lease runs out (its worker died or hung) becomes
+claimable again, and failed tasks are retried with backoff up to
+`max_attempts`. Delivery is therefore at-least-once; a handler with side
+effects that must not happen twice saves a checkpoint on its task before
+and after them (`LeasedTask.save_checkpoint`) and checks it when the task
+comes back. Tasks of bulk jobs (`BULK_PRIORITY`) are only claimed when no
+interactive task is available.
+
+The backend is chosen by `WORK_QUEUE_URL`:
+
+- ``sqlite:///<path>`` (default): a SQLite file shared by every process on one
+  host, e.g. all gunicorn workers in the app container.
+- ``redis://host:6379/0``: a Redis server shared by several hosts or replicas
+  (needs the ``redis`` package).
+
+Other backends can be plugged in with `register_backend`.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import redis
+except Exception:
+    redis = None
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, FAILED)
+
+DEFAULT_QUEUE_URL = 'sqlite:////tmp/uploads/work_queue.sqlite3'
+# Seconds to keep finished jobs before they are purged (or expire in Redis)
+WORK_QUEUE_RETENTION = float(os.getenv('WORK_QUEUE_RETENTION', '86400'))
+
+# Task priorities; lower is claimed first
+INTERACTIVE_PRIORITY = 0
+BULK_PRIORITY = 1
+
+
+def _task_id(job_id: str, seq: int) -> str:
+    # Sorts in enqueue order, which Redis uses to break ties between equal scores
+    return f'{job_id}-{seq:06d}'
+
+
+class LeaseLostError(RuntimeError):
+    """The worker no longer holds the task's lease (it expired and may run elsewhere)."""
+
+
+class QueueBackend:
+    """
+    Storage interface for jobs and tasks. Tasks are returned as dicts with
+    ``id``, ``job_id``, ``name``, ``state``, ``attempts`` and, depending on the
+    call, ``payload``, ``checkpoint``, ``result`` and ``error``.
+    """
+
+    def enqueue(self, job_id: str, tasks: Iterable[Tuple[str, Dict]], max_attempts: int,
+                priority: int = INTERACTIVE_PRIORITY) -> int:
+        """Add (name, payload) tasks to a job; returns how many were added."""
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Lease the next available task (including ones whose lease expired), in
+        priority order, or return None.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the worker no longer holds it."""
+        raise NotImplementedError
+
+    def checkpoint(self, task_id: str, worker_id: str, checkpoint: Dict) -> bool:
+        """
+        Save handler state that survives retries and expired leases (returned
+        by later claims); False if the worker no longer holds the lease.
+        """
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str, result: Any) -> bool:
+        """Store a task's result; False if the worker no longer holds the lease."""
+        raise NotImplementedError
+
+    def fail(self, task_id: str, worker_id: str, error: str, retry_in: Optional[float]) -> bool:
+        """
+        Record a failed attempt. The task is queued again after `retry_in`
+        seconds unless it is out of attempts (or `retry_in` is None).
+        """
+        raise NotImplementedError
+
+    def job_tasks(self, job_id: str) -> List[Dict]:
+        """All tasks of a job in enqueue order, with results but without payloads."""
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """Delete jobs whose tasks all finished more than `older_than` seconds ago."""
+        raise NotImplementedError
+
+    def progress(self, job_id: str) -> Dict:
+        """Task counts per state for a job, plus `total` and `finished`."""
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for task in self.job_tasks(job_id):
+            counts[task['state']] += 1
+        total = sum(counts.values())
+        counts.update({'total': total, 'finished': counts[DONE] + counts[FAILED] == total})
+        return counts
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Queue in a SQLite file (WAL mode), safe for concurrent processes on one host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                checkpoint TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, available_at);
+            CREATE INDEX IF NOT EXISTS tasks_lease ON tasks (state, lease_expires);
+            CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, seq);
+        """)
+        # Queue files from before task priorities and checkpoints
+        for column in ('priority INTEGER NOT NULL DEFAULT 0', 'checkpoint TEXT'):
+            try:
+                self._connection().execute(f'ALTER TABLE tasks ADD COLUMN {column}')
+            except sqlite3.OperationalError:
+                pass
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, and never one inherited across a fork
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    class _Transaction:
+        def __init__(self, db: sqlite3.Connection):
+            self.db = db
+
+        def __enter__(self) -> sqlite3.Connection:
+            # IMMEDIATE takes the write lock up front so two claimers can't pick the same row
+            self.db.execute('BEGIN IMMEDIATE')
+            return self.db
+
+        def __exit__(self, exc_type, *exc_info) -> None:
+            self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+    def _transaction(self) -> '_Transaction':
+        return self._Transaction(self._connection())
+
+    def enqueue(self, job_id, tasks, max_attempts, priority=INTERACTIVE_PRIORITY):
+        now = time.time()
+        with self._transaction() as db:
+            start = db.execute('SELECT COUNT(*) FROM tasks WHERE job_id = ?', (job_id,)).fetchone()[0]
+            rows = [
+                (_task_id(job_id, start + i), job_id, start + i, priority, name, json.dumps(payload),
+                 QUEUED, max_attempts, now, now)
+                for i, (name, payload) in enumerate(tasks)
+            ]
+            db.executemany(
+                'INSERT INTO tasks (id, job_id, seq, priority, name, payload, state, max_attempts, available_at, '
+                'updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+        return len(rows)
+
+    def claim(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._transaction() as db:
+            # Expired leases of tasks that are out of attempts end here
+            db.execute(
+                "UPDATE tasks SET state = ?, error = COALESCE(error, 'lease expired'), lease_owner = NULL, "
+                "updated_at = ? WHERE state = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, LEASED, now),
+            )
+            row = db.execute(
+                'SELECT id, job_id, name, payload, checkpoint, attempts FROM tasks '
+                'WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires < ?) '
+                'ORDER BY priority, available_at, seq LIMIT 1',
+                (QUEUED, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                'UPDATE tasks SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, '
+                'updated_at = ? WHERE id = ?',
+                (LEASED, worker_id, now + lease_seconds, now, row['id']),
+            )
+        return {
+            'id': row['id'], 'job_id': row['job_id'], 'name': row['name'], 'state': LEASED,
+            'attempts': row['attempts'] + 1, 'payload': json.loads(row['payload']),
+            'checkpoint': json.loads(row['checkpoint']) if row['checkpoint'] is not None else None,
+        }
+
+    def heartbeat(self, task_id, worker_id, lease_seconds):
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                'UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND state = ? AND lease_owner = ?',
+                (now + lease_seconds, now, task_id, LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def checkpoint(self, task_id, worker_id, checkpoint):
+        with self._transaction() as db:
+            cursor = db.execute(
+                'UPDATE tasks SET checkpoint = ?, updated_at = ? WHERE id = ? AND state = ? AND lease_owner = ?',
+                (json.dumps(checkpoint), time.time(), task_id, LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker_id, result):
+        with self._transaction() as db:
+            cursor = db.execute(
+                'UPDATE tasks SET state = ?, result = ?, error = NULL, lease_owner = NULL, updated_at = ? '
+                'WHERE id = ? AND state = ? AND lease_owner = ?',
+                (DONE, json.dumps(result), time.time(), task_id, LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error, retry_in):
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT attempts, max_attempts FROM tasks WHERE id = ? AND state = ? AND lease_owner = ?',
+                (task_id, LEASED, worker_id),
+            ).fetchone()
+            if row is None:
+                return False
+            retry = retry_in is not None and row['attempts'] < row['max_attempts']
+            db.execute(
+                'UPDATE tasks SET state = ?, error = ?, available_at = ?, lease_owner = NULL, updated_at = ? '
+                'WHERE id = ?',
+                (QUEUED if retry else FAILED, error, now + (retry_in or 0), now, task_id),
+            )
+        return True
+
+    def job_tasks(self, job_id):
+        rows = self._connection().execute(
+            'SELECT id, job_id, name, state, attempts, result, error FROM tasks WHERE job_id = ? ORDER BY seq',
+            (job_id,),
+        ).fetchall()
+        return [
+            {
+                'id': row['id'], 'job_id': row['job_id'], 'name': row['name'], 'state': row['state'],
+                'attempts': row['attempts'], 'error': row['error'],
+                'result': json.loads(row['result']) if row['result'] is not None else None,
+            }
+            for row in rows
+        ]
+
+    def purge(self, older_than):
+        with self._transaction() as db:
+            cursor = db.execute(
+                'DELETE FROM tasks WHERE job_id IN ('
+                '  SELECT job_id FROM tasks GROUP BY job_id '
+                '  HAVING SUM(state NOT IN (?, ?)) = 0 AND MAX(updated_at) < ?)',
+                (DONE, FAILED, time.time() - older_than),
+            )
+        return cursor.rowcount
+
+
+# Redis layout: a hash per task, a list of task ids per job, sorted sets of
+# queued task ids scored by availability time (one for interactive and one for
+# bulk tasks) and one of leased task ids scored by lease expiry. State changes
+# run as Lua scripts so they are atomic.
+_REDIS_CLAIM = """
+local prefix, now, lease, worker = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+local ready = {KEYS[1], KEYS[3]}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    local key = prefix .. ':task:' .. id
+    redis.call('ZREM', KEYS[2], id)
+    if redis.call('EXISTS', key) == 0 then
+        -- expired with its job
+    elseif tonumber(redis.call('HGET', key, 'attempts')) >= tonumber(redis.call('HGET', key, 'max_attempts')) then
+        redis.call('HSET', key, 'state', 'failed', 'updated_at', now)
+        redis.call('HSETNX', key, 'error', 'lease expired')
+        redis.call('HDEL', key, 'lease_owner')
+    else
+        redis.call('HSET', key, 'state', 'queued', 'updated_at', now)
+        redis.call('ZADD', ready[tonumber(redis.call('HGET', key, 'priority') or '0') + 1], now, id)
+    end
+end
+for _, queue in ipairs(ready) do
+    while true do
+        local ids = redis.call('ZRANGEBYSCORE', queue, '-inf', now, 'LIMIT', 0, 1)
+        if #ids == 0 then break end
+        local id = ids[1]
+        local key = prefix .. ':task:' .. id
+        redis.call('ZREM', queue, id)
+        if redis.call('EXISTS', key) == 1 then
+            redis.call('HINCRBY', key, 'attempts', 1)
+            redis.call('HSET', key, 'state', 'leased', 'lease_owner', worker, 'updated_at', now)
+            redis.call('ZADD', KEYS[2], now + lease, id)
+            return id
+        end
+    end
+end
+return false
+"""
+
+_REDIS_HEARTBEAT = """
+local key = ARGV[1] .. ':task:' .. ARGV[2]
+if redis.call('HGET', key, 'state') ~= 'leased' or redis.call('HGET', key, 'lease_owner') ~= ARGV[3] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[4]) + tonumber(ARGV[5]), ARGV[2])
+redis.call('HSET', key, 'updated_at', ARGV[4])
+return 1
+"""
+
+_REDIS_CHECKPOINT = """
+local key = ARGV[1] .. ':task:' .. ARGV[2]
+if redis.call('HGET', key, 'state') ~= 'leased' or redis.call('HGET', key, 'lease_owner') ~= ARGV[3] then
+    return 0
+end
+redis.call('HSET', key, 'checkpoint', ARGV[4], 'updated_at', ARGV[5])
+return 1
+"""
+
+_REDIS_FINISH = """
+local key = ARGV[1] .. ':task:' .. ARGV[2]
+if redis.call('HGET', key, 'state') ~= 'leased' or redis.call('HGET', key, 'lease_owner') ~= ARGV[3] then
+    return 0
+end
+local now, outcome = tonumber(ARGV[4]), ARGV[5]
+redis.call('ZREM', KEYS[2], ARGV[2])
+-- Finished tasks are kept for the retention period from now (requeued ones too, to be safe)
+redis.call('EXPIRE', key, ARGV[8])
+redis.call('EXPIRE', ARGV[1] .. ':job:' .. redis.call('HGET', key, 'job_id'), ARGV[8])
+redis.call('HDEL', key, 'lease_owner')
+redis.call('HSET', key, 'updated_at', now)
+if outcome == 'done' then
+    redis.call('HSET', key, 'state', 'done', 'result', ARGV[6])
+    redis.call('HDEL', key, 'error')
+    return 1
+end
+redis.call('HSET', key, 'error', ARGV[6])
+local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+if ARGV[7] ~= '' and attempts < tonumber(redis.call('HGET', key, 'max_attempts')) then
+    local ready = {KEYS[1], KEYS[3]}
+    redis.call('HSET', key, 'state', 'queued')
+    redis.call('ZADD', ready[tonumber(redis.call('HGET', key, 'priority') or '0') + 1], now + tonumber(ARGV[7]), ARGV[2])
+else
+    redis.call('HSET', key, 'state', 'failed')
+end
+return 1
+"""
+
+
+class RedisQueueBackend(QueueBackend):
+    """Queue in Redis, for workers spread over several hosts or replicas."""
+
+    def __init__(self, url: str, prefix: str = 'work_queue', retention: float = WORK_QUEUE_RETENTION):
+        if redis is None:
+            raise RuntimeError("The redis package is required for a redis:// WORK_QUEUE_URL")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        # Jobs expire on their own in Redis, `retention` seconds after their last task
+        # finished (or was queued); `purge` has nothing to do
+        self.retention = retention
+        self._ready = f'{prefix}:ready'
+        self._ready_bulk = f'{prefix}:ready:bulk'
+        self._leased = f'{prefix}:leased'
+        self._claim = self.client.register_script(_REDIS_CLAIM)
+        self._heartbeat = self.client.register_script(_REDIS_HEARTBEAT)
+        self._checkpoint = self.client.register_script(_REDIS_CHECKPOINT)
+        self._finish = self.client.register_script(_REDIS_FINISH)
+
+    def _task_key(self, task_id: str) -> str:
+        return f'{self.prefix}:task:{task_id}'
+
+    def _job_key(self, job_id: str) -> str:
+        return f'{self.prefix}:job:{job_id}'
+
+    def enqueue(self, job_id, tasks, max_attempts, priority=INTERACTIVE_PRIORITY):
+        now = time.time()
+        priority = BULK_PRIORITY if priority >= BULK_PRIORITY else INTERACTIVE_PRIORITY
+        ready = self._ready_bulk if priority == BULK_PRIORITY else self._ready
+        start = self.client.llen(self._job_key(job_id))
+        pipe = self.client.pipeline()
+        count = 0
+        for name, payload in tasks:
+            task_id = _task_id(job_id, start + count)
+            key = self._task_key(task_id)
+            pipe.hset(key, mapping={
+                'job_id': job_id, 'name': name, 'payload': json.dumps(payload), 'state': QUEUED,
+                'attempts': 0, 'max_attempts': max_attempts, 'priority': priority, 'updated_at': now,
+            })
+            pipe.expire(key, int(self.retention))
+            pipe.rpush(self._job_key(job_id), task_id)
+            pipe.zadd(ready, {task_id: now})
+            count += 1
+        pipe.expire(self._job_key(job_id), int(self.retention))
+        pipe.execute()
+        return count
+
+    def claim(self, worker_id, lease_seconds):
+        task_id = self._claim(keys=[self._ready, self._leased, self._ready_bulk],
+                              args=[self.prefix, time.time(), lease_seconds, worker_id])
+        if not task_id:
+            return None
+        task = self.client.hgetall(self._task_key(task_id))
+        return {
+            'id': task_id, 'job_id': task['job_id'], 'name': task['name'], 'state': LEASED,
+            'attempts': int(task['attempts']), 'payload': json.loads(task['payload']),
+            'checkpoint': json.loads(task['checkpoint']) if 'checkpoint' in task else None,
+        }
+
+    def heartbeat(self, task_id, worker_id, lease_seconds):
+        return bool(self._heartbeat(keys=[self._leased],
+                                    args=[self.prefix, task_id, worker_id, time.time(), lease_seconds]))
+
+    def checkpoint(self, task_id, worker_id, checkpoint):
+        return bool(self._checkpoint(keys=[],
+                                     args=[self.prefix, task_id, worker_id, json.dumps(checkpoint), time.time()]))
+
+    def complete(self, task_id, worker_id, result):
+        return bool(self._finish(keys=[self._ready, self._leased, self._ready_bulk],
+                                 args=[self.prefix, task_id, worker_id, time.time(), 'done', json.dumps(result), '',
+                                       int(self.retention)]))
+
+    def fail(self, task_id, worker_id, error, retry_in):
+        return bool(self._finish(keys=[self._ready, self._leased, self._ready_bulk],
+                                 args=[self.prefix, task_id, worker_id, time.time(), 'failed', error,
+                                       '' if retry_in is None else retry_in, int(self.retention)]))
+
+    def job_tasks(self, job_id):
+        task_ids = self.client.lrange(self._job_key(job_id), 0, -1)
+        pipe = self.client.pipeline()
+        for task_id in task_ids:
+            pipe.hmget(self._task_key(task_id), 'job_id', 'name', 'state', 'attempts', 'result', 'error')
+        tasks = []
+        for task_id, (job, name, state, attempts, result, error) in zip(task_ids, pipe.execute()):
+            if state is None:
+                continue  # expired
+            tasks.append({
+                'id': task_id, 'job_id': job, 'name': name, 'state': state, 'attempts': int(attempts),
+                'error': error, 'result': json.loads(result) if result is not None else None,
+            })
+        return tasks
+
+    def purge(self, older_than):
+        return 0
+
+
+_BACKENDS: Dict[str, Callable[[str], QueueBackend]] = {
+    'sqlite': lambda url: SQLiteQueueBackend(urlparse(url).path),
+    'redis': RedisQueueBackend,
+    'rediss': RedisQueueBackend,
+}
+
+
+def register_backend(scheme: str, factory: Callable[[str], QueueBackend]) -> None:
+    """Make `factory(url)` the backend for WORK_QUEUE_URLs starting with `scheme://`."""
+    _BACKENDS[scheme] = factory
+
+
+def create_backend(url: str) -> QueueBackend:
+    scheme = urlparse(url).scheme
+    if scheme not in _BACKENDS:
+        raise ValueError(f"Unsupported WORK_QUEUE_URL scheme: {scheme!r}")
+    return _BACKENDS[scheme](url)
+
+
+class LeasedTask:
+    """A claimed task as seen by a handler: its attempt number and saved checkpoint."""
+
+    def __init__(self, backend: QueueBackend, worker_id: str, task: Dict):
+        self.backend = backend
+        self.worker_id = worker_id
+        self.id = task['id']
+        self.name = task['name']
+        self.attempts = task['attempts']
+        self.checkpoint: Optional[Dict] = task.get('checkpoint')
+
+    def save_checkpoint(self, checkpoint: Dict) -> None:
+        """Store `checkpoint` with the task; raises LeaseLostError if another worker may have it now."""
+        if not self.backend.checkpoint(self.id, self.worker_id, checkpoint):
+            raise LeaseLostError(f'Lease on task {self.name} lost')
+        self.checkpoint = checkpoint
+
+
+class QueueWorker:
+    """
+    Claims and runs tasks on `threads` daemon threads. `handler(payload, task)`
+    gets the task's payload and its `LeasedTask`, and returns the task's
+    JSON-serialisable result; if it raises, the attempt fails and is retried
+    after the exception's `retry_in` attribute (when it has one) or an
+    exponential backoff.
+    """
+
+    def __init__(self, backend: QueueBackend, handler: Callable[[Dict], Any], threads: int = 2,
+                 lease_seconds: float = 60.0, poll_interval: float = 0.5):
+        self.backend = backend
+        self.handler = handler
+        self.threads = threads
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f'queue-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                task = self.backend.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Work queue: claim failed: {e}")
+                task = None
+            if task is None:
+                self._stopped.wait(self.poll_interval)
+                continue
+            self.run_task(task)
+
+    def run_task(self, task: Dict) -> None:
+        """Run one claimed task, heartbeating its lease until the handler returns."""
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    if not self.backend.heartbeat(task['id'], self.worker_id, self.lease_seconds):
+                        return  # lease lost; the result will be rejected
+                except Exception as e:
+                    print(f"Work queue: heartbeat failed for {task['name']}: {e}")
+
+        beat = threading.Thread(target=heartbeat, name='queue-heartbeat', daemon=True)
+        beat.start()
+        try:
+            result = self.handler(task['payload'], LeasedTask(self.backend, self.worker_id, task))
+        except Exception as e:
+            done.set()
+            retry_in = getattr(e, 'retry_in', None)
+            if retry_in is None:
+                retry_in = float(2 ** task['attempts'])
+            self._finish(lambda: self.backend.fail(task['id'], self.worker_id, str(e), retry_in))
+        else:
+            done.set()
+            self._finish(lambda: self.backend.complete(task['id'], self.worker_id, result))
+        beat.join()
+
+    @staticmethod
+    def _finish(call: Callable[[], bool], attempts: int = 3) -> None:
+        for attempt in range(attempts):
+            try:
+                call()
+                return
+            except Exception as e:
+                if attempt + 1 == attempts:
+                    # The lease will expire and the task will be picked up again
+                    print(f"Work queue: unable to record task outcome: {e}")
+                else:
+                    time.sleep(0.5 * 2 ** attempt)
+
+
+_queue_instance: Optional[QueueBackend] = None
+_queue_lock = threading.Lock()
+
+
+def get_work_queue() -> QueueBackend:
+    """Get the process-wide queue backend for WORK_QUEUE_URL."""
+    global _queue_instance
+    with _queue_lock:
+        if _queue_instance is None:
+            _queue_instance = create_backend(os.getenv('WORK_QUEUE_URL', DEFAULT_QUEUE_URL))
+        return _queue_instance
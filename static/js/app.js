@@ -1,6 +1,75 @@
 // Microsynth Auto Aligner - Frontend JavaScript
 
 document.addEventListener('DOMContentLoaded', () => {
+    // Shared polling scheduler. Each task is an async function resolving to true
+    // when it got something new; its next poll comes `minDelay` later then, and
+    // the delay doubles (up to `maxDelay`) while polls come back unchanged or
+    // fail. Polls of a task never overlap, and all tasks pause while the page is
+    // hidden and poll at once when it's shown again.
+    const poller = {
+        tasks: new Map(),
+
+        add(name, run, { minDelay, maxDelay }) {
+            this.remove(name);
+            const task = { run, minDelay, maxDelay, delay: minDelay, timer: null, busy: false, active: true };
+            this.tasks.set(name, task);
+            this._schedule(task, task.delay);
+        },
+
+        remove(name) {
+            const task = this.tasks.get(name);
+            if (task) {
+                task.active = false;
+                clearTimeout(task.timer);
+                this.tasks.delete(name);
+            }
+        },
+
+        // Poll now and go back to the fastest rate (something is expected to change)
+        reset(name) {
+            const task = this.tasks.get(name);
+            if (task) {
+                task.delay = task.minDelay;
+                this._schedule(task, 0);
+            }
+        },
+
+        _schedule(task, delay) {
+            clearTimeout(task.timer);
+            task.timer = null;
+            if (!task.active || document.hidden) return;
+            // Jitter keeps many open browsers from polling in lockstep
+            task.timer = setTimeout(() => this._tick(task), delay * (0.9 + Math.random() * 0.2));
+        },
+
+        async _tick(task) {
+            if (task.busy) return;
+            task.busy = true;
+            let changed = false;
+            try {
+                changed = await task.run();
+            } catch (error) {
+                console.error('Polling failed:', error);
+            } finally {
+                task.busy = false;
+            }
+            task.delay = changed ? task.minDelay : Math.min(task.delay * 2, task.maxDelay);
+            this._schedule(task, task.delay);
+        },
+    };
+
+    document.addEventListener('visibilitychange', () => {
+        poller.tasks.forEach(task => {
+            if (document.hidden) {
+                clearTimeout(task.timer);
+                task.timer = null;
+            } else {
+                task.delay = task.minDelay;
+                poller._schedule(task, 0);
+            }
+        });
+    });
+
     // Tabs
     const tabs = document.querySelectorAll('.tab');
     const panels = {
@@ -9,7 +78,7 @@ document.addEventListener('DOMContentLoaded', () => {
         helper: document.getElementById('tab-helper')
     };
 
-    let helperInterval;
+    let helperSource;
 
     tabs.forEach(tab => {
         tab.addEventListener('click', () => {
@@ -23,14 +92,11 @@ document.addEventListener('DOMContentLoaded', () => {
                     panels[key].classList.add('hidden');
                 }
             });
-            // Manage helper logs polling
-            if (helperInterval) {
-                clearInterval(helperInterval);
-                helperInterval = null;
-            }
+            // Manage helper logs streaming
             if (target === 'helper') {
-                fetchHelperLogs();
-                helperInterval = setInterval(fetchHelperLogs, 3000);
+                startHelperLogs();
+            } else {
+                stopHelperLogs();
             }
         });
     });
@@ -43,99 +109,177 @@ document.addEventListener('DOMContentLoaded', () => {
     const resultsCard = document.getElementById('results-card');
     const resultsContainer = document.getElementById('results-container');
 
-    // Fetch logs and results periodically
-    let logInterval;
-    let resultsInterval;
-
-    // Function to update logs
-    function updateLogs() {
-        fetch('/api/logs')
-            .then(response => response.json())
-            .then(data => {
-                if (data.logs && data.logs.length > 0) {
-                    logContainer.innerHTML = '';
-                    data.logs.forEach(log => {
-                        const logEntry = document.createElement('div');
-                        logEntry.textContent = log;
-                        logEntry.className = 'log-entry';
-                        logContainer.appendChild(logEntry);
-                    });
-                    // Auto-scroll to bottom
-                    logContainer.scrollTop = logContainer.scrollHeight;
-                }
-            })
-            .catch(error => {
-                console.error('Error fetching logs:', error);
+    // Log lines are fetched incrementally: the server sends the lines after
+    // `logsCursor`, or all it has (`full`) when a new run has cleared them
+    const MAX_LOG_LINES = 100;
+    let logsCursor = null;
+    let replaceLogs = true;
+
+    function applyLogs(logs) {
+        if (logs.full) {
+            // Replace what's shown once the new lines arrive, keeping any placeholder until then
+            replaceLogs = true;
+        }
+        if (logs.lines.length > 0) {
+            if (replaceLogs) {
+                logContainer.innerHTML = '';
+                replaceLogs = false;
+            } else {
+                logContainer.querySelectorAll('.log-placeholder').forEach(el => el.remove());
+            }
+            logs.lines.forEach(log => {
+                const logEntry = document.createElement('div');
+                logEntry.textContent = log;
+                logEntry.className = 'log-entry';
+                logContainer.appendChild(logEntry);
             });
+            while (logContainer.children.length > MAX_LOG_LINES) {
+                logContainer.removeChild(logContainer.firstChild);
+            }
+            // Auto-scroll to bottom
+            logContainer.scrollTop = logContainer.scrollHeight;
+        }
+        logsCursor = logs.cursor;
     }
 
-    // Track last displayed results to avoid unnecessary updates
-    let lastResultsHash = null;
+    // Results seen so far, keyed by tube; the server only sends what changed
+    // since `resultsVersion`
+    const resultsByTube = new Map();
+    const resultEntries = new Map();
+    let resultsVersion = null;
+    let statusEtag = null;
     let resultsDisplayed = false;
 
-    // Function to update results
-    function updateResults() {
-        fetch('/api/results')
-            .then(response => response.json())
-            .then(data => {
-                console.log('DEBUG: Results data:', data);  // Console log
-                
-                // Create a hash of current results to detect changes
-                const currentHash = data.results ? JSON.stringify(data.results) : '';
-                
-                // Only update if results changed or if we have results to show
-                if (data.results && data.results.length > 0) {
-                    // Only rebuild if results actually changed
-                    if (currentHash !== lastResultsHash) {
-                        resultsCard.style.display = 'block';
-                        resultsContainer.innerHTML = '';
-                        
-                        data.results.forEach(result => {
-                            console.log('DEBUG: Processing result:', result);  // Console log
-                            const resultEntry = document.createElement('div');
-                            resultEntry.className = 'result-entry';
-                            
-                            if (result.success) {
-                                // Link to DNA sequence in Benchling (not alignment)
-                                const benchlingUrl = result.sequence_url || '#';
-                                const linkText = benchlingUrl !== '#' ? 'View Sequence in Benchling' : 'Sequence URL unavailable';
-                                resultEntry.innerHTML = `
-                                    <div class="result-success">
-                                        <strong>${result.tube_name}</strong> - 
-                                        ${benchlingUrl !== '#' ? `<a href="${benchlingUrl}" target="_blank" class="benchling-link">${linkText}</a>` : `<span class="error-text">${linkText}</span>`}
-                                        ${result.alignment_id ? `<span class="result-id">Alignment ID: ${result.alignment_id}</span>` : ''}
-                                    </div>
-                                `;
-                            } else {
-                                // On error, still try to show sequence link if available
-                                const benchlingUrl = result.sequence_url || null;
-                                resultEntry.innerHTML = `
-                                    <div class="result-error">
-                                        <strong>${result.tube_name}</strong> - 
-                                        <span class="error-text">Failed to create alignment</span>
-                                        ${result.error ? `<span class="error-details">(${result.error})</span>` : ''}
-                                        ${benchlingUrl ? `<a href="${benchlingUrl}" target="_blank" class="benchling-link">View Sequence in Benchling</a>` : ''}
-                                    </div>
-                                `;
-                            }
-                            
-                            resultsContainer.appendChild(resultEntry);
-                        });
-                        
-                        lastResultsHash = currentHash;
-                        resultsDisplayed = true;
-                    }
-                } else {
-                    // Only hide results card if we haven't displayed results yet
-                    // Once results are shown, keep them visible even if polling returns empty
-                    if (!resultsDisplayed) {
-                        resultsCard.style.display = 'none';
-                    }
-                }
-            })
-            .catch(error => {
-                console.error('Error fetching results:', error);
-            });
+    function resetResults() {
+        resultsByTube.clear();
+        resultEntries.clear();
+        resultsVersion = null;
+        statusEtag = null;
+        resultsDisplayed = false;
+        resultsCard.style.display = 'none';
+        resultsContainer.innerHTML = '';
+    }
+
+    // Server-supplied text (tube names, error messages) going into an innerHTML template
+    function escapeHtml(value) {
+        return String(value)
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;')
+            .replace(/'/g, '&#39;');
+    }
+
+    // QC summary line, filled in once the finished alignment has been fetched
+    function formatStats(result) {
+        if (result.stats) {
+            const s = result.stats;
+            const indels = s.insertions + s.deletions;
+            const parts = [
+                `${s.identity.toFixed(1)}% identity`,
+                `${s.mismatches} mismatch${s.mismatches === 1 ? '' : 'es'}`,
+                `${indels} indel${indels === 1 ? '' : 's'}`,
+                `${s.coverage.toFixed(0)}% coverage`,
+            ];
+            if (s.first_mismatch !== null) {
+                parts.push(`first difference at ${s.first_mismatch}`);
+            }
+            const quality = s.identity >= 99.0 ? 'stats-pass' : 'stats-warn';
+            return `<span class="result-stats ${quality}">${parts.join(' · ')}</span>`;
+        }
+        if (result.stats_error) {
+            return `<span class="result-stats stats-pending">QC unavailable: ${escapeHtml(result.stats_error)}</span>`;
+        }
+        return '<span class="result-stats stats-pending">QC summary pending…</span>';
+    }
+
+    function renderResult(resultEntry, result) {
+        if (result.success) {
+            // Link to DNA sequence in Benchling (not alignment)
+            const benchlingUrl = result.sequence_url || '#';
+            const linkText = benchlingUrl !== '#' ? 'View Sequence in Benchling' : 'Sequence URL unavailable';
+            resultEntry.innerHTML = `
+                <div class="result-success">
+                    <strong>${escapeHtml(result.tube_name)}</strong> - 
+                    ${benchlingUrl !== '#' ? `<a href="${escapeHtml(benchlingUrl)}" target="_blank" class="benchling-link">${linkText}</a>` : `<span class="error-text">${linkText}</span>`}
+                    ${result.alignment_id ? `<span class="result-id">Alignment ID: ${escapeHtml(result.alignment_id)}</span>` : ''}
+                    ${formatStats(result)}
+                </div>
+            `;
+        } else {
+            // On error, still try to show sequence link if available
+            const benchlingUrl = result.sequence_url || null;
+            resultEntry.innerHTML = `
+                <div class="result-error">
+                    <strong>${escapeHtml(result.tube_name)}</strong> - 
+                    <span class="error-text">Failed to create alignment</span>
+                    ${result.error ? `<span class="error-details">(${escapeHtml(result.error)})</span>` : ''}
+                    ${benchlingUrl ? `<a href="${escapeHtml(benchlingUrl)}" target="_blank" class="benchling-link">View Sequence in Benchling</a>` : ''}
+                </div>
+            `;
+        }
+    }
+
+    function applyResults(data) {
+        if (data.full) {
+            resultsByTube.clear();
+            resultEntries.clear();
+            resultsContainer.innerHTML = '';
+        }
+        data.results.forEach(result => {
+            resultsByTube.set(result.tube_name, result);
+            let resultEntry = resultEntries.get(result.tube_name);
+            if (!resultEntry) {
+                resultEntry = document.createElement('div');
+                resultEntry.className = 'result-entry';
+                resultEntries.set(result.tube_name, resultEntry);
+                resultsContainer.appendChild(resultEntry);
+            }
+            renderResult(resultEntry, result);
+        });
+        resultsVersion = data.version;
+
+        if (resultsByTube.size > 0) {
+            resultsCard.style.display = 'block';
+            resultsDisplayed = true;
+        } else if (!resultsDisplayed) {
+            // Once results are shown, keep them visible even if a new poll is empty
+            resultsCard.style.display = 'none';
+        }
+    }
+
+    // One poll for logs and results; the server answers 304 while neither changed
+    async function pollStatus() {
+        const params = new URLSearchParams();
+        if (logsCursor !== null) params.set('logs_since', logsCursor);
+        if (resultsVersion !== null) params.set('results_since', resultsVersion);
+        const headers = statusEtag ? { 'If-None-Match': statusEtag } : {};
+        const response = await fetch(`/api/status?${params}`, { headers });
+        if (response.status === 304) {
+            return false;  // Nothing changed since the last poll
+        }
+        if (!response.ok) {
+            throw new Error(`status ${response.status}`);
+        }
+        const data = await response.json();
+        statusEtag = response.headers.get('ETag');
+        applyLogs(data.logs);
+        applyResults(data.results);
+        return true;
+    }
+
+    // Stable id of this browser, so the server schedules its runs' Benchling calls as one user's
+    function clientId() {
+        try {
+            let id = localStorage.getItem('aligner-client-id');
+            if (!id) {
+                id = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+                localStorage.setItem('aligner-client-id', id);
+            }
+            return id;
+        } catch (e) {
+            return undefined;  // Storage disabled: the server falls back to the client address
+        }
     }
 
     // Function to show status message
@@ -157,6 +301,224 @@ document.addEventListener('DOMContentLoaded', () => {
         statusMessage.style.display = 'none';
     }
 
+    // Chunked upload: deliveries above this size are sent as resumable chunks
+    const CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024;
+    const CHUNK_PARALLELISM = 4;
+    const CHUNK_MAX_ATTEMPTS = 5;
+    // Files up to this size are hashed before upload so the server can skip ones it already has;
+    // hashing larger ones would hold up the upload (their chunks are still verified one by one)
+    const DEDUP_HASH_LIMIT = 256 * 1024 * 1024;
+
+    // Identify a selection of files so an interrupted upload can be resumed
+    function uploadSignature(files) {
+        return 'chunked-upload:' + Array.from(files)
+            .map(f => `${f.name}:${f.size}:${f.lastModified}`)
+            .join('|');
+    }
+
+    // Incremental SHA-256: WebCrypto only digests whole buffers, which would mean
+    // holding an entire delivery file in memory (and fails above ~2 GB)
+    const SHA256_K = new Int32Array([
+        0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+        0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+        0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+        0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+        0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+        0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+        0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+        0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+    ]);
+
+    class Sha256 {
+        constructor() {
+            this.h = new Int32Array([
+                0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+            ]);
+            this.w = new Int32Array(64);
+            this.pending = new Uint8Array(64);
+            this.pendingLength = 0;
+            this.length = 0;
+        }
+
+        update(bytes) {
+            this.length += bytes.length;
+            let i = 0;
+            if (this.pendingLength) {
+                i = Math.min(64 - this.pendingLength, bytes.length);
+                this.pending.set(bytes.subarray(0, i), this.pendingLength);
+                this.pendingLength += i;
+                if (this.pendingLength < 64) return;
+                this._block(this.pending, 0);
+                this.pendingLength = 0;
+            }
+            for (; i + 64 <= bytes.length; i += 64) {
+                this._block(bytes, i);
+            }
+            this.pending.set(bytes.subarray(i));
+            this.pendingLength = bytes.length - i;
+        }
+
+        hex() {
+            const bits = this.length * 8;
+            const padding = new Uint8Array(((this.pendingLength + 9 + 63) & ~63) - this.pendingLength);
+            padding[0] = 0x80;
+            const view = new DataView(padding.buffer);
+            view.setUint32(padding.length - 8, Math.floor(bits / 0x100000000));
+            view.setUint32(padding.length - 4, bits >>> 0);
+            this.update(padding);
+            return Array.from(this.h, x => (x >>> 0).toString(16).padStart(8, '0')).join('');
+        }
+
+        _block(bytes, offset) {
+            const w = this.w;
+            for (let t = 0; t < 16; t++) {
+                const j = offset + t * 4;
+                w[t] = (bytes[j] << 24) | (bytes[j + 1] << 16) | (bytes[j + 2] << 8) | bytes[j + 3];
+            }
+            for (let t = 16; t < 64; t++) {
+                const x = w[t - 15];
+                const y = w[t - 2];
+                const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+                const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+                w[t] = (w[t - 16] + s0 + w[t - 7] + s1) | 0;
+            }
+            const h = this.h;
+            let a = h[0], b = h[1], c = h[2], d = h[3], e = h[4], f = h[5], g = h[6], k = h[7];
+            for (let t = 0; t < 64; t++) {
+                const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+                const t1 = (k + S1 + ((e & f) ^ (~e & g)) + SHA256_K[t] + w[t]) | 0;
+                const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+                const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+                k = g; g = f; f = e; e = (d + t1) | 0; d = c; c = b; b = a; a = (t1 + t2) | 0;
+            }
+            h[0] = (h[0] + a) | 0; h[1] = (h[1] + b) | 0; h[2] = (h[2] + c) | 0; h[3] = (h[3] + d) | 0;
+            h[4] = (h[4] + e) | 0; h[5] = (h[5] + f) | 0; h[6] = (h[6] + g) | 0; h[7] = (h[7] + k) | 0;
+        }
+    }
+
+    // SHA-256 of a file or chunk, reading at most HASH_SLICE_SIZE bytes at a time
+    const HASH_SLICE_SIZE = 4 * 1024 * 1024;
+
+    async function sha256Hex(blob) {
+        // One slice fits in memory: use the native digest where available (secure origins only)
+        if (blob.size <= HASH_SLICE_SIZE * 2 && window.crypto && window.crypto.subtle) {
+            const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+            return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+        }
+        const hash = new Sha256();
+        for (let start = 0; start < blob.size; start += HASH_SLICE_SIZE) {
+            hash.update(new Uint8Array(await blob.slice(start, start + HASH_SLICE_SIZE).arrayBuffer()));
+        }
+        return hash.hex();
+    }
+
+    async function putChunk(uploadId, fileIndex, file, start, end) {
+        const chunk = file.slice(start, end);
+        // Verified by the server as the chunk is written
+        const checksum = await sha256Hex(chunk);
+        for (let attempt = 1; ; attempt++) {
+            try {
+                const resp = await fetch(`/api/upload/chunked/${uploadId}/${fileIndex}?offset=${start}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream', 'X-Content-SHA256': checksum },
+                    body: chunk
+                });
+                if (resp.ok) return;
+                // Client errors other than a timeout or a corrupted chunk won't fix themselves on retry
+                if (resp.status >= 400 && resp.status < 500 && resp.status !== 408 && resp.status !== 422) {
+                    const data = await resp.json().catch(() => ({}));
+                    throw Object.assign(new Error(data.error || `Chunk upload failed (${resp.status})`), { fatal: true });
+                }
+            } catch (e) {
+                if (e.fatal || attempt >= CHUNK_MAX_ATTEMPTS) throw e;
+            }
+            await new Promise(r => setTimeout(r, 500 * 2 ** (attempt - 1)));
+        }
+    }
+
+    async function chunkedUpload(files) {
+        const signature = uploadSignature(files);
+        let session = null;
+
+        // Checksums let the server skip files it already has and verify the rest. Dedup is
+        // only an optimisation: a file that is too large or can't be hashed is just sent
+        logContainer.innerHTML = '<div class="log-placeholder">Checking files...</div>';
+        const checksums = {};
+        for (const [index, file] of Array.from(files).entries()) {
+            if (file.size > DEDUP_HASH_LIMIT) continue;
+            try {
+                checksums[index] = await sha256Hex(file);
+            } catch (e) {
+                console.warn(`Unable to hash ${file.name}; uploading it without dedup`, e);
+            }
+        }
+
+        // Resume a previous attempt for the same selection if the server still has it
+        const previousId = localStorage.getItem(signature);
+        if (previousId) {
+            const resp = await fetch(`/api/upload/chunked/${previousId}`);
+            if (resp.ok) session = await resp.json();
+        }
+        if (!session) {
+            const resp = await fetch('/api/upload/chunked', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    files: Array.from(files).map((f, index) => ({ name: f.name, size: f.size, sha256: checksums[index] }))
+                })
+            });
+            session = await resp.json();
+            if (!resp.ok) return { success: false, error: session.error || 'Unable to start upload' };
+            localStorage.setItem(signature, session.upload_id);
+        }
+
+        // Work out which chunks are still missing
+        const pending = [];
+        let totalChunks = 0;
+        Array.from(files).forEach((file, index) => {
+            const received = session.files[index].received || [];
+            for (let start = 0; start < file.size; start += session.chunk_size) {
+                const end = Math.min(start + session.chunk_size, file.size);
+                totalChunks++;
+                if (!received.some(([s, e]) => s <= start && e >= end)) {
+                    pending.push({ index, file, start, end });
+                }
+            }
+        });
+
+        let done = totalChunks - pending.length;
+        const showProgress = () => {
+            const pct = totalChunks ? Math.floor((done / totalChunks) * 100) : 100;
+            logContainer.innerHTML = `<div class="log-placeholder">Uploading files... ${pct}%</div>`;
+        };
+        showProgress();
+
+        const workers = Array.from({ length: CHUNK_PARALLELISM }, async () => {
+            while (pending.length > 0) {
+                const chunk = pending.shift();
+                await putChunk(session.upload_id, chunk.index, chunk.file, chunk.start, chunk.end);
+                done++;
+                showProgress();
+            }
+        });
+        await Promise.all(workers);
+
+        const finalizeResp = await fetch(`/api/upload/chunked/${session.upload_id}/finalize`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ checksums })
+        });
+        const result = await finalizeResp.json();
+        // A checksum mismatch means the stored chunks are bad; start over next time
+        if (finalizeResp.status === 422) {
+            await fetch(`/api/upload/chunked/${session.upload_id}`, { method: 'DELETE' }).catch(() => {});
+        }
+        if (finalizeResp.ok || finalizeResp.status === 422) {
+            localStorage.removeItem(signature);
+        }
+        return result;
+    }
+
     // Form submission
     form.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -179,25 +541,29 @@ document.addEventListener('DOMContentLoaded', () => {
         clearStatus();
         logContainer.innerHTML = '<div class="log-placeholder">Uploading files...</div>';
         
-        // Reset results tracking for new alignment
-        lastResultsHash = null;
-        resultsDisplayed = false;
-        resultsCard.style.display = 'none';
-        resultsContainer.innerHTML = '';
+        // Reset results tracking for new alignment, and poll at full rate while it runs
+        resetResults();
+        poller.reset('status');
 
         try {
-            // Step 1: Upload files
-            const formData = new FormData();
-            for (let file of files) {
-                formData.append('files', file);
-            }
+            // Step 1: Upload files (chunked + resumable for large deliveries)
+            const totalSize = Array.from(files).reduce((sum, f) => sum + f.size, 0);
+            let uploadData;
+            if (totalSize > CHUNKED_UPLOAD_THRESHOLD) {
+                uploadData = await chunkedUpload(files);
+            } else {
+                const formData = new FormData();
+                for (let file of files) {
+                    formData.append('files', file);
+                }
 
-            const uploadResponse = await fetch('/api/upload', {
-                method: 'POST',
-                body: formData
-            });
+                const uploadResponse = await fetch('/api/upload', {
+                    method: 'POST',
+                    body: formData
+                });
 
-            const uploadData = await uploadResponse.json();
+                uploadData = await uploadResponse.json();
+            }
             
             if (!uploadData.success) {
                 showStatus('✗ ' + uploadData.error, 'error');
@@ -212,7 +578,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ upload_dir: uploadData.upload_dir })
+                body: JSON.stringify({ upload_dir: uploadData.upload_dir, user: clientId() })
             });
 
             const data = await runResponse.json();
@@ -220,7 +586,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (data.success) {
                 showStatus('✓ Alignment completed successfully! Results uploaded to Benchling.', 'success');
                 // Update results display
-                updateResults();
+                poller.reset('status');
             } else {
                 showStatus('⚠ Alignment completed but no files were processed. Check the log for details.', 'error');
             }
@@ -242,21 +608,14 @@ document.addEventListener('DOMContentLoaded', () => {
         logContainer.innerHTML = '<p class="log-placeholder">Logs cleared...</p>';
     });
 
-    // Start polling for logs and results when page loads
-    logInterval = setInterval(updateLogs, 500);
-    resultsInterval = setInterval(updateResults, 1000);
+    // Start polling for logs and results when page loads: every 0.5 s while
+    // something changes, backing off to every 10 s on an idle page
+    poller.add('status', pollStatus, { minDelay: 500, maxDelay: 10000 });
 
-    // Cleanup intervals on page unload
+    // Cleanup pollers on page unload
     window.addEventListener('beforeunload', () => {
-        if (logInterval) {
-            clearInterval(logInterval);
-        }
-        if (resultsInterval) {
-            clearInterval(resultsInterval);
-        }
-        if (helperInterval) {
-            clearInterval(helperInterval);
-        }
+        poller.remove('status');
+        stopHelperLogs();
     });
 
     // Primer Registration logic
@@ -402,31 +761,115 @@ document.addEventListener('DOMContentLoaded', () => {
     const helperTailInput = document.getElementById('helper-tail');
     const helperRefreshBtn = document.getElementById('helper-refresh');
 
-    async function fetchHelperLogs() {
-        if (!helperLogContainer) return;
-        const tail = parseInt(helperTailInput?.value || '200', 10) || 200;
+    let helperCursor = null;
+
+    function helperTail() {
+        return parseInt(helperTailInput?.value || '200', 10) || 200;
+    }
+
+    function appendHelperLines(lines) {
+        lines.forEach(line => {
+            const div = document.createElement('div');
+            div.className = 'log-entry';
+            div.textContent = line;
+            helperLogContainer.appendChild(div);
+        });
+        // Keep only the last `tail` lines on screen
+        const tail = helperTail();
+        while (helperLogContainer.children.length > tail) {
+            helperLogContainer.removeChild(helperLogContainer.firstChild);
+        }
+        if (lines.length > 0) {
+            helperLogContainer.scrollTop = helperLogContainer.scrollHeight;
+        }
+    }
+
+    // Full fetch of the last `tail` lines, or only newer lines when `incremental`
+    async function fetchHelperLogs(incremental = false) {
+        if (!helperLogContainer) return false;
+        const since = incremental && helperCursor ? `&since=${helperCursor}` : '';
         try {
-            const resp = await fetch(`/api/benchling-helper/logs?tail=${tail}`);
+            const resp = await fetch(`/api/benchling-helper/logs?tail=${helperTail()}${since}`);
             const data = await resp.json();
             if (!resp.ok) {
-                helperLogContainer.innerHTML = `<div class="log-entry">${data.error || 'Unable to fetch logs'}</div>`;
-                return;
+                const entry = document.createElement('div');
+                entry.className = 'log-entry';
+                entry.textContent = data.error || 'Unable to fetch logs';
+                helperLogContainer.replaceChildren(entry);
+                return false;
             }
-            const lines = data.lines || [];
-            helperLogContainer.innerHTML = '';
-            lines.forEach(line => {
-                const div = document.createElement('div');
-                div.className = 'log-entry';
-                div.textContent = line;
-                helperLogContainer.appendChild(div);
-            });
-            helperLogContainer.scrollTop = helperLogContainer.scrollHeight;
+            if (!incremental) helperLogContainer.innerHTML = '';
+            appendHelperLines(data.lines || []);
+            helperCursor = data.cursor || helperCursor;
+            return true;
         } catch (e) {
             helperLogContainer.innerHTML = `<div class="log-entry">Failed to load logs</div>`;
+            return false;
         }
     }
 
-    helperRefreshBtn?.addEventListener('click', fetchHelperLogs);
+    function stopHelperLogs() {
+        if (helperSource) {
+            helperSource.close();
+            helperSource = null;
+        }
+        poller.remove('helper');
+    }
+
+    function pollHelperLogs() {
+        poller.add('helper', async () => {
+            const before = helperCursor;
+            if (!(await fetchHelperLogs(true))) {
+                throw new Error('helper logs unavailable');
+            }
+            return helperCursor !== before;
+        }, { minDelay: 3000, maxDelay: 30000 });
+    }
+
+    async function startHelperLogs() {
+        stopHelperLogs();
+        helperCursor = null;
+        if (!(await fetchHelperLogs())) return;
+        if (panels.helper.classList.contains('hidden')) return;  // tab left while loading
+
+        if (typeof EventSource === 'undefined') {
+            pollHelperLogs();
+            return;
+        }
+        // Follow the log from where the snapshot ended; only new lines are sent
+        const since = helperCursor ? `&since=${helperCursor}` : '';
+        const source = new EventSource(`/api/benchling-helper/logs/stream?tail=${helperTail()}${since}`);
+        source.onmessage = (event) => {
+            if (event.lastEventId) helperCursor = event.lastEventId;
+            appendHelperLines([event.data]);
+        };
+        source.onerror = () => {
+            // A closed source means the endpoint refused the stream; fall back to polling
+            if (source.readyState === EventSource.CLOSED && helperSource === source) {
+                helperSource = null;
+                pollHelperLogs();
+            }
+        };
+        helperSource = source;
+    }
+
+    // Don't hold a server thread with the log stream for a hidden page; resume from the cursor when shown
+    document.addEventListener('visibilitychange', () => {
+        if (panels.helper.classList.contains('hidden')) return;
+        if (document.hidden) {
+            stopHelperLogs();
+        } else {
+            startHelperLogs();
+        }
+    });
+
+    helperRefreshBtn?.addEventListener('click', () => {
+        if (!panels.helper.classList.contains('hidden')) {
+            startHelperLogs();
+        } else {
+            fetchHelperLogs();
+        }
+    });
 
     downloadEurofinsBtn?.addEventListener('click', async () => {
         try {